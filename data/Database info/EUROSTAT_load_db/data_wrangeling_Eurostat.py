@@ -3,13 +3,41 @@
 Created on Thu Oct  9 11:16:51 2025
 
 @author: baroc
+
+Data sheets are read in parallel across a process pool (--workers), and each
+workbook's per-sheet results are cached as Parquet in .eurostat_cache/
+next to this script (ignored by git), keyed by workbook path, modification
+time and content hash. A rerun loads unchanged workbooks from the cache
+without opening them. Sheets are always combined in workbook and sheet
+order, so the output does not depend on the number of workers or on the
+cache.
+
+Usage:
+    python data_wrangeling_Eurostat.py
+    python data_wrangeling_Eurostat.py --workers 8
+    python data_wrangeling_Eurostat.py --no-cache
 """
+import argparse
+import hashlib
+import json
+import os
 import pandas as pd
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import re
 
 pd.options.mode.chained_assignment = None
 
+WORKBOOKS = [
+    "isoc_r_eb_ain2$defaultview_spreadsheet.xlsx",
+    "isoc_eb_ain2$defaultview_spreadsheet.xlsx",
+    "isoc_eb_ai$defaultview_spreadsheet.xlsx",
+]
+NON_DATA_SHEETS = ("summary", "structure", "flags")
+CACHE_DIR = str(Path(__file__).resolve().parent / ".eurostat_cache")  # Same cache from any working directory
+CACHE_VERSION = 1  # Bump when _read_sheet_tidy's output changes, to invalidate old caches
+
 
 # ---------------------------------------------------------
 # Helper: Extract metadata robustly
@@ -134,21 +162,95 @@ def _read_sheet_tidy(xls, sheet_name):
 
 
 # ---------------------------------------------------------
-# Process a workbook (multiple sheets)
+# Per-sheet cache (Parquet, keyed by path + mtime + content hash)
 # ---------------------------------------------------------
-def process_workbook(file_path):
-    print(f"\nProcessing: {file_path}")
-    xls = pd.ExcelFile(file_path)
-    data_sheets = [s for s in xls.sheet_names if not s.lower().startswith(("summary", "structure", "flags"))]
+def _workbook_key(file_path):
+    """Cache key of a workbook: its resolved path, mtime and SHA-256 of its content."""
+    path = Path(file_path).resolve()
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    stamp = f"{CACHE_VERSION}|{path}|{path.stat().st_mtime_ns}|{digest.hexdigest()}"
+    return hashlib.sha256(stamp.encode()).hexdigest()[:32]
+
+
+def _load_cached(cache_dir, key):
+    """[(sheet_name, df, err)] stored under key, or None if it is not cached."""
+    manifest_path = Path(cache_dir) / key / "manifest.json"
+    if not manifest_path.exists():
+        return None
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    results = []
+    for entry in manifest["sheets"]:
+        if entry["error"]:
+            results.append((entry["sheet"], pd.DataFrame(), entry["error"]))
+            continue
+        df = pd.read_parquet(Path(cache_dir) / key / entry["file"])
+        results.append((entry["sheet"], df.astype(entry["dtypes"]), None))
+    return results
+
+
+def _store_cached(cache_dir, key, file_path, results):
+    """Write one Parquet file per sheet; the manifest goes last, so a partial entry is never read."""
+    entry_dir = Path(cache_dir) / key
+    entry_dir.mkdir(parents=True, exist_ok=True)
+    sheets = []
+    for i, (sheet_name, df, err) in enumerate(results):
+        entry = {"sheet": sheet_name, "error": err, "file": None, "dtypes": None}
+        if not err:
+            entry["file"] = f"{i:03d}.parquet"
+            entry["dtypes"] = {col: str(dtype) for col, dtype in df.dtypes.items()}
+            df.to_parquet(entry_dir / entry["file"], index=False)
+        sheets.append(entry)
+    manifest = {"workbook": str(Path(file_path).resolve()), "sheets": sheets}
+    tmp_path = entry_dir / "manifest.json.tmp"
+    tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp_path, entry_dir / "manifest.json")
+
+    # Drop entries left by earlier versions of the same workbook
+    for other in Path(cache_dir).glob("*/manifest.json"):
+        if other.parent != entry_dir and json.loads(other.read_text(encoding="utf-8"))["workbook"] == manifest["workbook"]:
+            shutil.rmtree(other.parent, ignore_errors=True)
+
+
+# ---------------------------------------------------------
+# Process workbooks (sheets fanned out across processes)
+# ---------------------------------------------------------
+def _data_sheets(file_path):
+    """Names of the data sheets of a workbook (summary/structure/flags sheets are skipped)."""
+    with pd.ExcelFile(file_path) as xls:
+        return [s for s in xls.sheet_names if not s.lower().startswith(NON_DATA_SHEETS)]
+
+
+_open_workbooks = {}  # Workbooks opened by this process, so each is parsed once per process
+
+
+def _process_sheet(task):
+    """Read one (workbook, sheet) task; runs in a worker process."""
+    file_path, sheet_name = task
+    if file_path not in _open_workbooks:
+        _open_workbooks[file_path] = pd.ExcelFile(file_path)
+    df, err = _read_sheet_tidy(_open_workbooks[file_path], sheet_name)
+    return sheet_name, df, err
+
+
+def _close_workbooks():
+    for xls in _open_workbooks.values():
+        xls.close()
+    _open_workbooks.clear()
 
+
+def _combine_workbook(file_path, results):
+    """Concatenate a workbook's sheets in sheet order and save <workbook>_combined.csv."""
+    print(f"\nProcessing: {file_path}")
     frames = []
-    for s in data_sheets:
-        df, err = _read_sheet_tidy(xls, s)
+    for sheet_name, df, err in results:
         if err:
-            print(f"  Skipped {s}: {err}")
+            print(f"  Skipped {sheet_name}: {err}")
             continue
         frames.append(df)
-        print(f"  Processed {s} ({df.shape[0]} rows)")
+        print(f"  Processed {sheet_name} ({df.shape[0]} rows)")
 
     if not frames:
         raise ValueError(f"No usable sheets found in {file_path}")
@@ -162,6 +264,49 @@ def process_workbook(file_path):
     return combined
 
 
+def process_workbooks(files, workers=1, cache_dir=CACHE_DIR):
+    """
+    Process several workbooks, one task per data sheet.
+
+    Cached workbooks are loaded from cache_dir (None disables the cache);
+    the sheets of all other workbooks are read by a pool of `workers`
+    processes (1 reads them in this process). Returns one combined frame
+    per workbook, in the order of files.
+    """
+    keys = {f: _workbook_key(f) for f in files} if cache_dir else {}
+    results = {}
+    for f in files:
+        cached = _load_cached(cache_dir, keys[f]) if cache_dir else None
+        if cached is not None:
+            print(f"Cached: {f} ({len(cached)} sheets)")
+            results[f] = cached
+
+    pending = [f for f in files if f not in results]
+    tasks = [(f, s) for f in pending for s in _data_sheets(f)]
+    if tasks:
+        print(f"Reading {len(tasks)} sheets from {len(pending)} workbooks with {workers} worker(s)...")
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                outputs = list(pool.map(_process_sheet, tasks))
+        else:
+            outputs = [_process_sheet(task) for task in tasks]
+            _close_workbooks()
+
+        for (f, _), output in zip(tasks, outputs):
+            results.setdefault(f, []).append(output)
+    for f in pending:
+        results.setdefault(f, [])
+        if cache_dir:
+            _store_cached(cache_dir, keys[f], f, results[f])
+
+    return [_combine_workbook(f, results[f]) for f in files]
+
+
+def process_workbook(file_path, cache_dir=None):
+    """Process a single workbook in this process."""
+    return process_workbooks([file_path], workers=1, cache_dir=cache_dir)[0]
+
+
 # ---------------------------------------------------------
 # Normalize to 3NF
 # ---------------------------------------------------------
@@ -213,16 +358,15 @@ def normalize_to_3nf(df):
 # Main
 # ---------------------------------------------------------
 if __name__ == "__main__":
-    files = [
-        "isoc_r_eb_ain2$defaultview_spreadsheet.xlsx",
-        "isoc_eb_ain2$defaultview_spreadsheet.xlsx",
-        "isoc_eb_ai$defaultview_spreadsheet.xlsx",
-    ]
-
-    all_frames = []
-    for f in files:
-        df = process_workbook(f)
-        all_frames.append(df)
+    parser = argparse.ArgumentParser(description="Combine Eurostat AI workbooks and normalize them to 3NF.")
+    parser.add_argument("files", nargs="*", default=WORKBOOKS, help="Workbooks (default: the three AI datasets)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes reading sheets (default: CPU count; 1 reads serially)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help=f"Per-sheet Parquet cache (default: {CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="Re-read every workbook and leave the cache as is")
+    args = parser.parse_args()
+
+    all_frames = process_workbooks(args.files, args.workers, None if args.no_cache else args.cache_dir)
 
     combined_all = pd.concat(all_frames, ignore_index=True).convert_dtypes()
     combined_all = combined_all.replace({None: pd.NA, "": pd.NA, " ": pd.NA, "<N.A>": pd.NA})
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Capability Pivot Benchmark
+==========================
+
+Times the pandas reference path (handle_duplicates + pivot_to_wide_format)
+against the single-pass engine in capability_pivot.py and checks that both
+produce identical output.
+
+A second check shuffles the input and varies the metadata within each
+respondent. The reference path then takes metadata from the lowest
+construct_id, so the engine is compared with the first-seen row instead
+(pivot_table scores + groupby().first() metadata).
+
+Usage:
+    python scripts/bench_capability_pivot.py
+    python scripts/bench_capability_pivot.py --respondents 100000 --duplicate-rate 0.05
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from capability_pivot import METADATA_COLUMNS, RESPONDENT_COLUMN, pivot_long_to_wide
+from transform_capability_data import handle_duplicates, pivot_to_wide_format
+
+DEFAULT_INPUT = "data-foundation/capability_demo.zip"
+
+
+def synthetic_long_format(n_respondents: int, duplicate_rate: float, seed: int = 42,
+                          null_rate: float = 0.0) -> pd.DataFrame:
+    """Build a shuffled long-format table with the capability schema (null_rate blanks scores)."""
+    rng = np.random.default_rng(seed)
+
+    respondent_ids = np.char.mod('%08x', rng.choice(2**32, size=n_respondents, replace=False))
+    respondents = np.repeat(respondent_ids, 32)
+    constructs = np.tile(np.arange(1, 33), n_respondents)
+
+    n_duplicates = int(len(respondents) * duplicate_rate)
+    extra = rng.integers(0, len(respondents), size=n_duplicates)
+    respondents = np.concatenate([respondents, respondents[extra]])
+    constructs = np.concatenate([constructs, constructs[extra]])
+
+    meta_idx = pd.factorize(respondents)[0]
+    industries = np.array(['Government', 'Technology', 'Manufacturing', 'Healthcare'])
+    countries = np.array(['India', 'United States', 'France', 'Germany'])
+    continents = np.array(['Asia', 'North America', 'Europe', 'Africa'])
+    roles = np.array(['Staff', 'Leadership', 'IT & Data'])
+
+    scores = rng.uniform(1, 7, size=len(respondents)).round(2)
+    if null_rate:
+        scores[rng.random(len(scores)) < null_rate] = np.nan
+
+    df = pd.DataFrame({
+        'ResponseId_id': respondents,
+        'dimension_id': (constructs - 1) // 4 + 1,
+        'dimension': 'Dimension',
+        'construct_id': constructs,
+        'construct': 'Construct',
+        'score': scores,
+        'industry_synthetic': industries[meta_idx % len(industries)],
+        'country_synthetic': countries[meta_idx % len(countries)],
+        'continent_synthetic': continents[meta_idx % len(continents)],
+        'role_synthetic': roles[meta_idx % len(roles)],
+    })
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def vary_metadata(df: pd.DataFrame, seed: int = 42) -> pd.DataFrame:
+    """Shuffle rows and metadata values independently, so metadata varies within respondents."""
+    rng = np.random.default_rng(seed)
+    varied = df.copy()
+    for col in METADATA_COLUMNS:
+        if col in varied.columns:
+            varied[col] = rng.permutation(varied[col].to_numpy())
+    return varied.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def first_seen_reference(df: pd.DataFrame) -> pd.DataFrame:
+    """Wide frame with pivot_table scores and each respondent's first-seen metadata."""
+    scores = df.pivot_table(index=RESPONDENT_COLUMN, columns='construct_id', values='score', aggfunc='mean')
+    scores.columns = [f'construct_{int(col)}' for col in scores.columns]
+    metadata = df.groupby(RESPONDENT_COLUMN)[[col for col in METADATA_COLUMNS if col in df.columns]].first()
+    return scores.join(metadata).reset_index()
+
+
+def time_call(func, repeat: int) -> tuple:
+    """Run func repeat times with stdout silenced; return (best seconds, result)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default=DEFAULT_INPUT, help='Long-format CSV (or .zip/.gz)')
+    parser.add_argument('--respondents', type=int, help='Use a synthetic table with N respondents instead')
+    parser.add_argument('--duplicate-rate', type=float, default=0.05, help='Synthetic duplicate row rate')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per path (best time is reported)')
+    args = parser.parse_args()
+
+    if args.respondents:
+        df = synthetic_long_format(args.respondents, args.duplicate_rate)
+        source = f"synthetic ({args.respondents:,} respondents, {args.duplicate_rate:.0%} duplicates)"
+    else:
+        df = pd.read_csv(args.input)
+        source = args.input
+
+    print("=" * 80)
+    print("CAPABILITY PIVOT BENCHMARK")
+    print("=" * 80)
+    print(f"Input: {source}")
+    print(f"Rows: {len(df):,}")
+
+    legacy_time, legacy = time_call(lambda: pivot_to_wide_format(handle_duplicates(df)), args.repeat)
+    engine_time, (engine, _) = time_call(lambda: pivot_long_to_wide(df), args.repeat)
+
+    pd.testing.assert_frame_equal(legacy, engine, check_exact=True)
+
+    print(f"\n  pandas groupby + pivot_table: {legacy_time:.3f}s")
+    print(f"  single-pass engine:           {engine_time:.3f}s")
+    print(f"  Speedup: {legacy_time / engine_time:.1f}x")
+    print(f"  ✅ Outputs identical ({len(engine):,} respondents)")
+
+    # Shuffled input with metadata that varies within respondents
+    varied = vary_metadata(df)
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine_varied, _ = pivot_long_to_wide(varied)
+        legacy_varied = pivot_to_wide_format(handle_duplicates(varied))
+    pd.testing.assert_frame_equal(first_seen_reference(varied), engine_varied, check_exact=True)
+    metadata = [col for col in METADATA_COLUMNS if col in varied.columns]
+    differing = int((legacy_varied[metadata].to_numpy() != engine_varied[metadata].to_numpy()).any(axis=1).sum())
+    print(f"  ✅ Varying metadata: first-seen rows match ({differing:,} respondents differ from the "
+          f"lowest-construct_id metadata of the reference path)")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
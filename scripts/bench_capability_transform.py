@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Capability Transform Stage Benchmark
+====================================
+
+Times every stage of transform_capability_data.py on synthetic long-format
+fixtures (real schema, configurable duplicate and null rates) and writes
+machine-readable results so runs can be compared over time.
+
+For each fixture size and stage it records wall time (best of --repeat),
+CPU time, peak traced memory (tracemalloc, one extra run) and rows in/out.
+
+Stages:
+    validate_input_data      input validation (fused statistics)
+    handle_duplicates        pandas groupby reference
+    pivot_to_wide_format     pandas pivot_table reference (on deduplicated rows)
+    pivot_single_pass        scatter pivot engine (duplicates + pivot)
+    add_company_assignments  respondent → company hashing
+    map_metadata_fields      synthetic → schema field renames
+    validate_output_data     output validation (fused statistics)
+
+Usage:
+    python scripts/bench_capability_transform.py
+    python scripts/bench_capability_transform.py --sizes 10000,100000 --null-rate 0.01
+    python scripts/bench_capability_transform.py --compare logs/benchmarks/capability_transform_20251103_120000.json
+
+Outputs:
+    - logs/benchmarks/capability_transform_<timestamp>.json (unless --output is given)
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bench_capability_pivot import synthetic_long_format
+from transform_capability_data import (
+    add_company_assignments,
+    handle_duplicates,
+    map_metadata_fields,
+    pivot_single_pass,
+    pivot_to_wide_format,
+    validate_input_data,
+    validate_output_data,
+)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+RESULTS_DIR = "logs/benchmarks"
+
+STAGES = [
+    'validate_input_data',
+    'handle_duplicates',
+    'pivot_to_wide_format',
+    'pivot_single_pass',
+    'add_company_assignments',
+    'map_metadata_fields',
+    'validate_output_data',
+]
+
+# Stage → stage whose output it consumes (all other stages take the fixture)
+STAGE_INPUTS = {
+    'pivot_to_wide_format': 'handle_duplicates',
+    'add_company_assignments': 'pivot_single_pass',
+    'map_metadata_fields': 'add_company_assignments',
+    'validate_output_data': 'map_metadata_fields',
+}
+
+
+def measure(func, repeat: int) -> dict:
+    """
+    Run func with stdout silenced.
+
+    Timing runs are untraced (best wall time, matching CPU time); one
+    further run under tracemalloc records the peak allocation.
+
+    Returns:
+        dict: {'seconds', 'cpu_seconds', 'peak_bytes', 'result'}
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            result = func()
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        if best is None or wall < best[0]:
+            best = (wall, cpu)
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': best[0], 'cpu_seconds': best[1], 'peak_bytes': peak, 'result': result}
+
+
+def required_stages(selected: list) -> set:
+    """Selected stages plus every stage whose output they (transitively) consume."""
+    required = set(selected)
+    for stage in reversed(STAGES):
+        if stage in required and stage in STAGE_INPUTS:
+            required.add(STAGE_INPUTS[stage])
+    return required
+
+
+def stage_call(stage: str, df: pd.DataFrame, outputs: dict):
+    """Return a zero-argument callable running stage on its input."""
+    if stage == 'add_company_assignments':
+        # add_company_assignments mutates its input; give every run a fresh copy
+        return lambda: add_company_assignments(outputs['pivot_single_pass'].copy())
+
+    func = {
+        'validate_input_data': validate_input_data,
+        'handle_duplicates': handle_duplicates,
+        'pivot_to_wide_format': pivot_to_wide_format,
+        'pivot_single_pass': pivot_single_pass,
+        'map_metadata_fields': map_metadata_fields,
+        'validate_output_data': validate_output_data,
+    }[stage]
+    stage_input = outputs[STAGE_INPUTS[stage]] if stage in STAGE_INPUTS else df
+    return lambda: func(stage_input)
+
+
+def run_fixture(n_respondents: int, args, stages: list) -> list:
+    """Benchmark the selected stages on one fixture; returns result records."""
+    print(f"\n📦 Building fixture: {n_respondents:,} respondents "
+          f"({args.duplicate_rate:.0%} duplicates, {args.null_rate:.0%} null scores)...")
+    start = time.perf_counter()
+    df = synthetic_long_format(n_respondents, args.duplicate_rate, args.seed, args.null_rate)
+    print(f"  ✅ {len(df):,} rows in {time.perf_counter() - start:.1f}s")
+
+    required = required_stages(stages)
+    outputs = {}
+    records = []
+
+    for stage in STAGES:
+        if stage not in required:
+            continue
+
+        call = stage_call(stage, df, outputs)
+        if stage not in stages:
+            # Only needed as input to a selected stage: run once, untimed
+            with contextlib.redirect_stdout(io.StringIO()):
+                outputs[stage] = call()
+            continue
+
+        stage_input = outputs[STAGE_INPUTS[stage]] if stage in STAGE_INPUTS else df
+        measured = measure(call, args.repeat)
+        result = outputs[stage] = measured['result']
+        records.append({
+            'respondents': n_respondents,
+            'fixture_rows': len(df),
+            'stage': stage,
+            'rows_in': len(stage_input),
+            'rows_out': len(result) if isinstance(result, pd.DataFrame) else None,
+            'seconds': round(measured['seconds'], 6),
+            'cpu_seconds': round(measured['cpu_seconds'], 6),
+            'peak_bytes': measured['peak_bytes'],
+        })
+        print(f"  {stage:<24} {measured['seconds']:>9.3f}s  cpu {measured['cpu_seconds']:>8.3f}s  "
+              f"peak {measured['peak_bytes'] / 2**20:>9.1f} MiB")
+
+    return records
+
+
+def compare_results(records: list, config: dict, baseline_path: str):
+    """Print current/baseline time and memory ratios per (respondents, stage)."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    previous = {(r['respondents'], r['stage']): r for r in baseline['results']}
+
+    print(f"\n📊 Compared with {baseline_path} (ratio > 1 is slower / larger):")
+    for key in ('duplicate_rate', 'null_rate', 'seed'):
+        if baseline['config'].get(key) != config[key]:
+            print(f"  ⚠️  Fixtures differ: {key} {baseline['config'].get(key)} → {config[key]}")
+    for record in records:
+        old = previous.get((record['respondents'], record['stage']))
+        if old is None:
+            continue
+        time_ratio = record['seconds'] / old['seconds'] if old['seconds'] else float('nan')
+        memory_ratio = record['peak_bytes'] / old['peak_bytes'] if old['peak_bytes'] else float('nan')
+        flag = "⚠️ " if time_ratio > 1.1 or memory_ratio > 1.1 else "✅"
+        print(f"  {flag} {record['respondents']:>9,}  {record['stage']:<24} "
+              f"time x{time_ratio:.2f}  memory x{memory_ratio:.2f}")
+
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help="Comma-separated respondent counts (default: 10000,100000,1000000)")
+    parser.add_argument('--duplicate-rate', type=float, default=0.05, help="Duplicate row rate (default: 0.05)")
+    parser.add_argument('--null-rate', type=float, default=0.0, help="Null score rate (default: 0)")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help="Comma-separated stages to report (default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage (best time is reported)")
+    parser.add_argument('--seed', type=int, default=42, help="Fixture random seed")
+    parser.add_argument('--output', help=f"Results JSON (default: {RESULTS_DIR}/capability_transform_<timestamp>.json)")
+    parser.add_argument('--compare', help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    unknown = set(args.stages.split(',')) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main():
+    args = parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    stages = args.stages.split(',')
+    output = args.output or f"{RESULTS_DIR}/capability_transform_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+    print("=" * 80)
+    print("CAPABILITY TRANSFORM STAGE BENCHMARK")
+    print("=" * 80)
+
+    records = []
+    for n_respondents in sizes:
+        records.extend(run_fixture(n_respondents, args, stages))
+
+    results = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+        },
+        'config': {
+            'sizes': sizes,
+            'duplicate_rate': args.duplicate_rate,
+            'null_rate': args.null_rate,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'stages': stages,
+        },
+        'results': records,
+    }
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    if args.compare:
+        compare_results(records, results['config'], args.compare)
+
+    print(f"\n📄 Results saved to: {output}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Importer End-to-End Benchmark
+=============================
+
+Runs the import scripts, unmodified and in their own processes, against the
+local PostgREST stand-in (local_postgrest.py) and reports what each one
+costs on the wire.
+
+Fixtures are built in a temporary workspace that the importers run in:
+
+    data-foundation/capability_demo_wide.csv   demo rows resampled to --rows
+                                               respondents (new IDs)
+    data-foundation/capability_real_wide.csv   real rows resampled; half the
+                                               IDs repeat wide-file respondents
+                                               with changed scores (update path)
+    data-foundation/capability_demo.csv        synthetic long format,
+                                               --long-respondents × 32 rows
+                                               plus --long-duplicate-rate
+                                               repeated (respondent, construct)
+                                               keys, as in the demo export
+    data/taboos_extracted.json                 copied from the repository
+    Interventions/                             copied from the repository
+
+The demo companies are seeded first. The importers then run in the order
+below against the same stand-in, so the real-data import diffs against the
+respondents the wide import wrote. For each one it records wall time
+(interpreter start-up included), rows written, rows per second, requests
+by HTTP method and request/response bytes. An importer that fails (e.g.
+import_interventions without openpyxl and python-docx) is reported with its
+exit code and last error line, and the rest still run.
+
+Importers:
+    wide            import_capability_wide.py
+    real            import_real_capability_data.py
+    long            import_capability_long_format.py
+    taboos          import_taboos.py
+    interventions   import_interventions.py
+
+Usage:
+    python scripts/bench_importers.py
+    python scripts/bench_importers.py --rows 20000 --latency 0.02 --jitter 0.01
+    python scripts/bench_importers.py --importers wide,real --error-rate 0.02 --keep-workspace
+    python scripts/bench_importers.py --reject-gzip   # stand-in refuses gzip bodies (415)
+
+Outputs:
+    - logs/benchmarks/importers_<timestamp>.json (unless --output is given)
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bench_capability_pivot import synthetic_long_format
+from import_to_supabase import DEMO_COMPANIES
+from importer_core import ANON_KEY_ENV, SERVICE_KEY_ENV, URL_ENV
+from local_postgrest import STANDIN_KEY, start_server
+from score_reshape import CONSTRUCTS
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+REPO_DIR = SCRIPTS_DIR.parent
+RESULTS_DIR = "logs/benchmarks"
+
+WIDE_SOURCE = REPO_DIR / "data-foundation/capability_demo_wide.csv"
+REAL_SOURCE = REPO_DIR / "data-foundation/capability_real_wide.csv"
+TABOOS_SOURCE = REPO_DIR / "data/taboos_extracted.json"
+INTERVENTIONS_SOURCE = REPO_DIR / "Interventions"
+
+# Name → (script, arguments); run in this order
+IMPORTERS = {
+    'wide': ('import_capability_wide.py', []),
+    'real': ('import_real_capability_data.py', []),
+    'long': ('import_capability_long_format.py', []),
+    'taboos': ('import_taboos.py', []),
+    'interventions': ('import_interventions.py', []),
+}
+
+DEFAULT_ROWS = 5_000
+DEFAULT_LONG_RESPONDENTS = 1_000
+DEFAULT_LONG_DUPLICATE_RATE = 0.1  # Extra rows repeating a key, as a share of the distinct keys
+OUTPUT_TAIL_LINES = 20  # Lines of importer output kept in the results
+
+
+def new_respondent_ids(rng: np.random.Generator, n: int, taken=()) -> np.ndarray:
+    """n distinct 8-hex-digit respondent IDs not in taken."""
+    taken = set(taken)
+    ids = []
+    while len(ids) < n:
+        for value in np.char.mod('%08x', rng.choice(2**32, size=n - len(ids), replace=False)):
+            if value not in taken:
+                taken.add(value)
+                ids.append(value)
+    return np.array(ids, dtype=object)
+
+
+def build_fixtures(workspace: Path, rows: int, long_respondents: int, seed: int,
+                   long_duplicate_rate: float = DEFAULT_LONG_DUPLICATE_RATE) -> dict:
+    """
+    Write every importer's input into workspace.
+
+    Returns:
+        dict: {fixture name: rows}
+    """
+    rng = np.random.default_rng(seed)
+    (workspace / "data-foundation").mkdir(parents=True)
+    (workspace / "data").mkdir()
+
+    wide = pd.read_csv(WIDE_SOURCE, dtype={'respondent_id': str})
+    wide = wide.sample(n=rows, replace=True, random_state=seed).reset_index(drop=True)
+    wide['respondent_id'] = new_respondent_ids(rng, rows)
+    wide.to_csv(workspace / "data-foundation/capability_demo_wide.csv", index=False)
+
+    # Half existing respondents with changed scores, half new ones
+    real = pd.read_csv(REAL_SOURCE, dtype={'respondent_id': str})
+    real = real.sample(n=rows, replace=True, random_state=seed + 1).reset_index(drop=True)
+    existing = rows // 2
+    real['respondent_id'] = np.concatenate([
+        wide['respondent_id'].to_numpy()[:existing],
+        new_respondent_ids(rng, rows - existing, taken=wide['respondent_id']),
+    ])
+    constructs = [col for col in CONSTRUCTS.columns if col in real.columns]
+    noise = rng.normal(0, 0.25, size=(rows, len(constructs))).round(2)
+    real[constructs] = (real[constructs] + noise).clip(1, 7).round(2)
+    real.to_csv(workspace / "data-foundation/capability_real_wide.csv", index=False)
+
+    # Repeated keys exercise the importer's duplicate averaging before the staged publish
+    long = synthetic_long_format(long_respondents, duplicate_rate=long_duplicate_rate, seed=seed)
+    long.to_csv(workspace / "data-foundation/capability_demo.csv", index=False)
+
+    shutil.copy(TABOOS_SOURCE, workspace / "data/taboos_extracted.json")
+    shutil.copytree(INTERVENTIONS_SOURCE, workspace / "Interventions")
+    with open(TABOOS_SOURCE) as f:
+        taboos = len(json.load(f))
+
+    return {'wide': len(wide), 'real': len(real), 'long': len(long), 'taboos': taboos}
+
+
+def importer_env(url: str) -> dict:
+    """Environment pointing the importers at the stand-in."""
+    env = dict(os.environ)
+    env.update({URL_ENV: url, ANON_KEY_ENV: STANDIN_KEY, SERVICE_KEY_ENV: STANDIN_KEY})
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(SCRIPTS_DIR), env.get('PYTHONPATH')]))
+    env['PYTHONUNBUFFERED'] = '1'
+    return env
+
+
+def reported_error(output: str, exit_code: int):
+    """
+    The error a run ended with, or None if it succeeded.
+
+    The importers print "❌ Error: ..." and return without a non-zero exit
+    code on most failures, so that line counts as a failure too.
+    """
+    lines = [line.strip() for line in output.splitlines() if line.strip()]
+    for line in reversed(lines):
+        if line.startswith('❌ Error') or (exit_code and ('Error' in line or 'Traceback' in line)):
+            return line
+    return (lines[-1] if lines else f"exit code {exit_code}") if exit_code else None
+
+
+def run_importer(name: str, server, workspace: Path, env: dict) -> dict:
+    """Run one importer against the stand-in and measure it; returns a result record."""
+    script, arguments = IMPORTERS[name]
+    server.reset()
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, str(SCRIPTS_DIR / script), *arguments], cwd=workspace, env=env,
+                               capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    stats = server.snapshot()
+
+    output = completed.stdout + completed.stderr
+    (workspace / "logs").mkdir(exist_ok=True)
+    (workspace / "logs" / f"bench_{name}.out").write_text(output)
+
+    return {
+        'importer': name,
+        'script': script,
+        'exit_code': completed.returncode,
+        'error': reported_error(output, completed.returncode),
+        'seconds': round(seconds, 3),
+        'rows_written': stats['rows_written'],
+        'rows_per_second': round(stats['rows_written'] / seconds, 1) if seconds else None,
+        'requests': stats['requests'],
+        'requests_by_method': stats['requests_by_method'],
+        'bytes_sent': stats['bytes_received'],
+        'bytes_sent_decoded': stats['bytes_decoded'],
+        'bytes_received': stats['bytes_sent'],
+        'gzip_requests': stats['gzip_requests'],
+        'error_responses': stats['errors'],
+        'injected_errors': stats['injected_errors'],
+        'rows_by_table': stats['rows_by_table'],
+        'output_tail': output.splitlines()[-OUTPUT_TAIL_LINES:],
+    }
+
+
+def print_results(records: list):
+    """One line per importer (bytes are as sent by the importer, after gzip)."""
+    print(f"\n  {'importer':<14}{'seconds':>9}{'rows':>10}{'rows/s':>10}{'requests':>10}"
+          f"{'sent MiB':>10}{'recv MiB':>10}  methods")
+    for record in records:
+        methods = ' '.join(f"{method}:{count}" for method, count in sorted(record['requests_by_method'].items()))
+        print(f"  {record['importer']:<14}{record['seconds']:>9.2f}{record['rows_written']:>10,}"
+              f"{record['rows_per_second'] or 0:>10,.0f}{record['requests']:>10,}"
+              f"{record['bytes_sent'] / 2**20:>10.2f}{record['bytes_received'] / 2**20:>10.2f}  {methods}")
+        if record['error']:
+            print(f"  {'':<14}❌ exit {record['exit_code']}: {record['error']}")
+
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS,
+                        help=f"Respondents in the wide and real fixtures (default: {DEFAULT_ROWS})")
+    parser.add_argument('--long-respondents', type=int, default=DEFAULT_LONG_RESPONDENTS,
+                        help=f"Respondents in the long-format fixture, 32 rows each "
+                             f"(default: {DEFAULT_LONG_RESPONDENTS})")
+    parser.add_argument('--long-duplicate-rate', type=float, default=DEFAULT_LONG_DUPLICATE_RATE,
+                        help=f"Extra long-format rows repeating a (respondent, construct) key, as a share "
+                             f"of the keys (default: {DEFAULT_LONG_DUPLICATE_RATE})")
+    parser.add_argument('--importers', default=','.join(IMPORTERS),
+                        help="Comma-separated importers to run (default: all)")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds the stand-in adds per request")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Up to this many more seconds, at random")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Share of requests the stand-in fails with a transient 503")
+    parser.add_argument('--reject-gzip', action='store_true',
+                        help="Stand-in answers gzip request bodies with 415 (exercises the plain-JSON fallback)")
+    parser.add_argument('--seed', type=int, default=42, help="Fixture and injection random seed")
+    parser.add_argument('--workspace', help="Directory for fixtures and importer output (default: a temporary one)")
+    parser.add_argument('--keep-workspace', action='store_true', help="Keep the temporary workspace")
+    parser.add_argument('--output', help=f"Results JSON (default: {RESULTS_DIR}/importers_<timestamp>.json)")
+    args = parser.parse_args()
+
+    unknown = set(args.importers.split(',')) - set(IMPORTERS)
+    if unknown:
+        parser.error(f"Unknown importers: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main():
+    args = parse_args()
+    selected = [name for name in IMPORTERS if name in args.importers.split(',')]
+    output = args.output or f"{RESULTS_DIR}/importers_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+    print("=" * 80)
+    print("IMPORTER END-TO-END BENCHMARK")
+    print("=" * 80)
+
+    workspace = Path(args.workspace or tempfile.mkdtemp(prefix='bench_importers_')).resolve()
+    if args.workspace:
+        if workspace.exists() and any(workspace.iterdir()):
+            sys.exit(f"❌ Error: Workspace is not empty: {workspace}")
+        workspace.mkdir(parents=True, exist_ok=True)
+
+    print(f"\n📦 Building fixtures in {workspace}...")
+    fixtures = build_fixtures(workspace, args.rows, args.long_respondents, args.seed, args.long_duplicate_rate)
+    for name, count in fixtures.items():
+        print(f"  {name:<8} {count:>10,} rows")
+
+    server, url = start_server(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                               accept_gzip=not args.reject_gzip, seed=args.seed)
+    print(f"\n🔌 Stand-in listening on {url} (latency {args.latency}s, jitter {args.jitter}s, "
+          f"error rate {args.error_rate:.0%}{', gzip rejected' if args.reject_gzip else ''})")
+    server.store.write('companies', DEMO_COMPANIES, on_conflict='name', resolution='ignore-duplicates')
+
+    env = importer_env(url)
+    records = []
+    try:
+        for name in selected:
+            print(f"\n▶️  {name}: {IMPORTERS[name][0]}")
+            record = run_importer(name, server, workspace, env)
+            status = "✅" if not record['error'] else f"❌ exit {record['exit_code']}"
+            print(f"  {status}  {record['seconds']:.2f}s, {record['rows_written']:,} rows, "
+                  f"{record['requests']:,} requests")
+            records.append(record)
+        table_rows = server.snapshot()['table_rows']
+    finally:
+        server.shutdown()
+        server.server_close()
+        if not args.workspace and not args.keep_workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    print_results(records)
+
+    results = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+        },
+        'config': {
+            'rows': args.rows,
+            'long_respondents': args.long_respondents,
+            'long_duplicate_rate': args.long_duplicate_rate,
+            'importers': selected,
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'error_rate': args.error_rate,
+            'reject_gzip': args.reject_gzip,
+            'seed': args.seed,
+        },
+        'fixtures': fixtures,
+        'table_rows': table_rows,
+        'results': records,
+    }
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    if args.keep_workspace or args.workspace:
+        print(f"\n📁 Workspace kept: {workspace} (importer output in logs/bench_*.out)")
+    print(f"\n📄 Results saved to: {output}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Capability Transform Manifest
+=============================
+
+Per-respondent content hashes for incremental capability transforms.
+
+The manifest sits next to the wide output (capability_demo_wide.csv →
+capability_demo_wide.manifest.csv) and records one hash per respondent over
+every long-format row that feeds that respondent's wide row. On the next
+run only respondents whose hash changed (or who are new) are re-pivoted;
+everyone else is carried over from the existing wide output.
+
+The manifest also counts each respondent's scored rows. Respondents with
+none are left out of the wide output, so only those with scores > 0 are
+expected in it (output_respondents).
+
+Row hashes include each row's position within its respondent, because the
+first-seen metadata and the order duplicates are averaged in both depend on
+it. Appending a survey wave therefore changes exactly the respondents that
+received new rows.
+
+Usage:
+    from capability_manifest import respondent_content_hashes, diff_manifest
+
+    current = respondent_content_hashes(long_df)
+    delta = diff_manifest(current, load_manifest(manifest_path_for(output_file)))
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from capability_pivot import CONSTRUCT_COLUMN, METADATA_COLUMNS, NUM_CONSTRUCTS, RESPONDENT_COLUMN, SCORE_COLUMN
+
+MANIFEST_SUFFIX = '.manifest.csv'
+
+# Long-format columns that determine a respondent's wide row
+HASHED_COLUMNS = [RESPONDENT_COLUMN, CONSTRUCT_COLUMN, SCORE_COLUMN] + METADATA_COLUMNS
+
+# Odd 64-bit constant used to mix a row's position into its hash
+_POSITION_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def manifest_path_for(output_path: str) -> str:
+    """capability_demo_wide.csv → capability_demo_wide.manifest.csv"""
+    path = Path(output_path)
+    return str(path.with_name(path.stem + MANIFEST_SUFFIX))
+
+
+def respondent_content_hashes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Hash each respondent's long-format rows.
+
+    Rows are hashed column-wise in one vectorized pass, mixed with their
+    position within the respondent, and summed per respondent (mod 2**64).
+
+    Args:
+        df: Long-format dataframe
+
+    Returns:
+        pd.DataFrame: respondent_id, content_hash (int64), rows, scores
+                      (rows the pivot averages); sorted by respondent_id
+    """
+    columns = [col for col in HASHED_COLUMNS if col in df.columns]
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+    construct_ids = pd.to_numeric(df[CONSTRUCT_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+    scored = (
+        (construct_ids >= 1)
+        & (construct_ids <= NUM_CONSTRUCTS)
+        & pd.to_numeric(df[SCORE_COLUMN], errors='coerce').notna().to_numpy()
+    )
+
+    codes, uniques = pd.factorize(df[RESPONDENT_COLUMN], sort=True)
+    valid = codes >= 0
+    scores = np.bincount(codes[valid & scored], minlength=len(uniques))
+    codes = codes[valid]
+    row_hashes = row_hashes[valid]
+
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    rows = np.bincount(sorted_codes, minlength=len(uniques))
+    starts = np.cumsum(rows) - rows
+
+    positions = (np.arange(len(order)) - np.repeat(starts, rows)).astype(np.uint64)
+    mixed = pd.util.hash_array(row_hashes[order] ^ (positions * _POSITION_MIX))
+
+    hashes = np.zeros(len(uniques), dtype=np.uint64)
+    if len(order):
+        present = rows > 0
+        hashes[present] = np.add.reduceat(mixed, starts[present])
+
+    return pd.DataFrame({
+        'respondent_id': np.asarray(uniques, dtype=object).astype(str).astype(object),
+        'content_hash': hashes.view(np.int64),
+        'rows': rows,
+        'scores': scores,
+    })
+
+
+def load_manifest(path: str):
+    """Load a manifest written by save_manifest (None if it does not exist)."""
+    if not Path(path).exists():
+        return None
+    return pd.read_csv(path, dtype={'respondent_id': str, 'content_hash': np.int64, 'rows': np.int64})
+
+
+def output_respondents(manifest: pd.DataFrame) -> set:
+    """Respondents the manifest expects in the wide output (those with scores)."""
+    if 'scores' not in manifest.columns:  # Manifests from before the scores column
+        return set(manifest['respondent_id'])
+    return set(manifest.loc[manifest['scores'] > 0, 'respondent_id'])
+
+
+def save_manifest(manifest: pd.DataFrame, path: str):
+    """Write the manifest next to the wide output."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    manifest.to_csv(path, index=False)
+
+
+def diff_manifest(current: pd.DataFrame, previous: pd.DataFrame) -> dict:
+    """
+    Compare the current content hashes with the previous manifest.
+
+    Returns:
+        dict: {'changed': ids new or with a different hash,
+               'removed': ids no longer in the input,
+               'unchanged': count of carried-over respondents}
+    """
+    previous_hashes = pd.Series(previous['content_hash'].to_numpy(), index=previous['respondent_id'])
+    current_ids = current['respondent_id']
+
+    known = current_ids.isin(previous_hashes.index).to_numpy()
+    unchanged = known.copy()
+    unchanged[known] = (previous_hashes.loc[current_ids[known]].to_numpy()
+                        == current['content_hash'].to_numpy()[known])
+
+    removed = previous.loc[~previous['respondent_id'].isin(current_ids), 'respondent_id']
+
+    return {
+        'changed': current_ids[~unchanged].to_numpy(dtype=object),
+        'removed': removed.to_numpy(dtype=object),
+        'unchanged': int(unchanged.sum()),
+    }
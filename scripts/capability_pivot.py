@@ -0,0 +1,556 @@
+"""
+Capability Pivot Engine
+=======================
+
+Single-pass long → wide pivot for capability assessment data.
+
+The pandas path in transform_capability_data.py (groupby dedup, pivot_table,
+second groupby for metadata, merge) hashes the full long table several times.
+This engine factorizes the respondent IDs once and scatters every score into a
+preallocated respondents × constructs matrix using sum/count accumulators, so
+duplicate (respondent, construct) scores are averaged in the same pass.
+Metadata comes from each respondent's first-seen row.
+
+For inputs too large to load at once, ScoreAccumulator folds CSV chunks
+(read straight out of a .zip/.gz) into the same accumulators, and
+partition_long_format() can spill the rows into respondent-hash partitions so
+only one partition's accumulators are held in memory at a time.
+
+Usage:
+    from capability_pivot import pivot_long_to_wide
+
+    wide_df, stats = pivot_long_to_wide(long_df)
+"""
+
+import gzip
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+NUM_CONSTRUCTS = 32
+
+RESPONDENT_COLUMN = 'ResponseId_id'
+CONSTRUCT_COLUMN = 'construct_id'
+SCORE_COLUMN = 'score'
+
+# Per-respondent metadata carried into the wide output (in output order)
+METADATA_COLUMNS = [
+    'industry_synthetic',
+    'country_synthetic',
+    'continent_synthetic',
+    'role_synthetic',
+]
+
+
+def factorize_respondents(respondent_ids: pd.Series) -> tuple:
+    """
+    Factorize respondent IDs into dense integer codes.
+
+    Uniques are sorted so the output row order matches groupby/pivot_table.
+
+    Returns:
+        tuple: (codes ndarray with -1 for missing IDs, uniques ndarray)
+    """
+    codes, uniques = pd.factorize(respondent_ids, sort=True)
+    return codes, np.asarray(uniques, dtype=object)
+
+
+def new_accumulators(n_respondents: int, n_constructs: int = NUM_CONSTRUCTS) -> dict:
+    """
+    Allocate flat respondents × constructs accumulators.
+
+    Returns:
+        dict: {'sums', 'compensation', 'counts'} zero-filled ndarrays
+    """
+    size = n_respondents * n_constructs
+    return {
+        'sums': np.zeros(size, dtype=np.float64),
+        'compensation': np.zeros(size, dtype=np.float64),
+        'counts': np.zeros(size, dtype=np.int64),
+    }
+
+
+def accumulate_cells(cells: np.ndarray, scores: np.ndarray, accumulators: dict):
+    """
+    Fold scores into their flat cell accumulators in place.
+
+    Sums are Kahan-compensated in input row order, exactly like pandas'
+    groupby mean, so averaged duplicates match the pandas path bit for bit.
+    Rows are processed by their rank within the cell: every pass touches each
+    cell at most once, so a table without duplicates costs a single pass.
+    """
+    sums = accumulators['sums']
+    compensation = accumulators['compensation']
+    counts = accumulators['counts']
+
+    if len(cells) == 0:
+        return
+
+    order = np.argsort(cells, kind='stable')
+    cells = cells[order]
+    scores = scores[order]
+
+    positions = np.arange(len(cells))
+    group_start = np.r_[True, cells[1:] != cells[:-1]]
+    starts = np.flatnonzero(group_start)
+    counts[cells[starts]] += np.diff(np.r_[starts, len(cells)])
+
+    rank = positions - np.maximum.accumulate(np.where(group_start, positions, 0))
+
+    by_rank = np.argsort(rank, kind='stable')
+    start = 0
+    for stop in np.cumsum(np.bincount(rank)):
+        idx = by_rank[start:stop]
+        cell = cells[idx]
+        y = scores[idx] - compensation[cell]
+        t = sums[cell] + y
+        comp = (t - sums[cell]) - y
+        comp[np.isnan(comp)] = 0.0  # inf - inf, same reset as pandas
+        compensation[cell] = comp
+        sums[cell] = t
+        start = stop
+
+
+def scatter_scores(codes: np.ndarray,
+                   construct_ids: np.ndarray,
+                   scores: np.ndarray,
+                   n_respondents: int,
+                   n_constructs: int = NUM_CONSTRUCTS,
+                   accumulators: dict = None) -> dict:
+    """
+    Scatter scores into respondents × constructs sum/count accumulators.
+
+    Rows with a missing respondent, an out-of-range construct_id or a null
+    score are ignored (pandas mean skips them the same way).
+
+    Args:
+        codes: Respondent codes from factorize_respondents (-1 = missing)
+        construct_ids: construct_id per row (1-based)
+        scores: score per row
+        n_respondents: Number of respondent rows in the matrix
+        n_constructs: Number of construct columns in the matrix
+        accumulators: Existing accumulators to fold into (new ones if None)
+
+    Returns:
+        dict: Accumulators ({'sums', 'compensation', 'counts'})
+    """
+    if accumulators is None:
+        accumulators = new_accumulators(n_respondents, n_constructs)
+
+    construct_ids = np.asarray(construct_ids, dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float64)
+
+    valid = (
+        (codes >= 0)
+        & (construct_ids >= 1)
+        & (construct_ids <= n_constructs)
+        & ~np.isnan(scores)
+    )
+    cells = codes[valid].astype(np.int64) * n_constructs + (construct_ids[valid].astype(np.int64) - 1)
+    accumulate_cells(cells, scores[valid], accumulators)
+
+    return accumulators
+
+
+def finalize_means(accumulators: dict, n_constructs: int = NUM_CONSTRUCTS, score_dtype=np.float64) -> tuple:
+    """
+    Turn accumulators into a respondents × constructs mean matrix.
+
+    Returns:
+        tuple: (means ndarray, NaN where a cell has no score; counts ndarray)
+    """
+    sums = accumulators['sums'].reshape(-1, n_constructs)
+    counts = accumulators['counts'].reshape(-1, n_constructs)
+
+    means = np.full(sums.shape, np.nan, dtype=np.float64)
+    np.divide(sums, counts, out=means, where=counts > 0)
+    return means.astype(score_dtype, copy=False), counts
+
+
+def first_seen_metadata(df: pd.DataFrame,
+                        codes: np.ndarray,
+                        n_respondents: int,
+                        columns: list = METADATA_COLUMNS) -> dict:
+    """
+    Take each respondent's metadata from the first row it appears in.
+
+    If that row has a null for a column, the first non-null value for the
+    respondent is used instead (mirrors groupby().first()).
+
+    Returns:
+        dict: {column: ndarray of length n_respondents}
+    """
+    present = np.flatnonzero(codes >= 0)
+    first_codes, first_pos = np.unique(codes[present], return_index=True)
+    first_rows = present[first_pos]
+
+    metadata = {}
+    for col in columns:
+        if col not in df.columns:
+            continue
+
+        series = df[col]
+        values = np.full(n_respondents, np.nan, dtype=object)
+        values[first_codes] = series.iloc[first_rows].to_numpy(dtype=object)
+
+        missing = pd.isna(values)
+        if missing.any():
+            # Only respondents whose first row is null get a second look
+            candidates = present[missing[codes[present]] & series.notna().to_numpy()[present]]
+            fill_codes, fill_pos = np.unique(codes[candidates], return_index=True)
+            values[fill_codes] = series.iloc[candidates[fill_pos]].to_numpy(dtype=object)
+
+        metadata[col] = values
+
+    return metadata
+
+
+def pivot_long_to_wide(df: pd.DataFrame,
+                       n_constructs: int = NUM_CONSTRUCTS,
+                       score_dtype=np.float64) -> tuple:
+    """
+    Pivot long-format capability data to one row per respondent.
+
+    Rows are sorted by ResponseId_id, with construct_<n> columns for every
+    construct with at least one score, then the metadata columns taken from
+    each respondent's first-seen row (groupby().first() on the input).
+    Respondents without any score are dropped, as pivot_table does. Scores
+    match handle_duplicates() + pivot_to_wide_format(); the metadata only
+    does when it is constant within a respondent, because that path takes
+    it from the respondent's lowest construct_id instead.
+
+    Args:
+        df: Long-format dataframe (ResponseId_id, construct_id, score, metadata)
+        n_constructs: Number of construct columns in the score matrix
+        score_dtype: dtype of the output construct columns (float32 halves
+                     the matrix for large exports)
+
+    Returns:
+        tuple: (wide dataframe, stats dict)
+    """
+    codes, uniques = factorize_respondents(df[RESPONDENT_COLUMN])
+    n_respondents = len(uniques)
+
+    construct_ids = pd.to_numeric(df[CONSTRUCT_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+    scores = pd.to_numeric(df[SCORE_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+
+    accumulators = scatter_scores(codes, construct_ids, scores, n_respondents, n_constructs)
+    means, counts = finalize_means(accumulators, n_constructs, score_dtype)
+    metadata = first_seen_metadata(df, codes, n_respondents)
+
+    keep_rows = counts.any(axis=1)
+    keep_cols = np.flatnonzero(counts.any(axis=0))
+
+    wide = {RESPONDENT_COLUMN: uniques[keep_rows]}
+    for j in keep_cols:
+        wide[f'construct_{j + 1}'] = means[keep_rows, j]
+    for col, values in metadata.items():
+        wide[col] = values[keep_rows]
+
+    wide_df = pd.DataFrame(wide)
+
+    stats = {
+        'rows_in': len(df),
+        'respondents': int(keep_rows.sum()),
+        'scored_cells': int(np.count_nonzero(counts)),
+        'duplicates_averaged': int(counts.sum() - np.count_nonzero(counts)),
+        'construct_columns': len(keep_cols),
+    }
+
+    return wide_df, stats
+
+
+# ---------------------------------------------------------------------------
+# Streaming mode
+# ---------------------------------------------------------------------------
+
+def open_long_format(path: str):
+    """
+    Open a long-format CSV for reading, looking inside .zip/.gz archives.
+
+    For a .zip the first .csv member is read directly from the archive, so
+    data-foundation/capability_demo.zip does not need to be unpacked first.
+
+    Returns:
+        file object (binary), to be closed by the caller
+    """
+    path = str(path)
+    if path.endswith('.zip'):
+        archive = zipfile.ZipFile(path)
+        members = [name for name in archive.namelist() if name.endswith('.csv')]
+        if not members:
+            archive.close()
+            raise ValueError(f"No CSV member found in {path}")
+        handle = archive.open(members[0])
+        # Close the archive together with the member
+        handle.close = _chain_close(handle.close, archive.close)
+        return handle
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _chain_close(*closers):
+    def close():
+        for closer in closers:
+            closer()
+    return close
+
+
+def read_long_format_chunks(path: str, chunksize: int, usecols: list = None):
+    """
+    Yield long-format chunks of at most chunksize rows from a CSV/.zip/.gz.
+    """
+    with open_long_format(path) as handle:
+        yield from pd.read_csv(handle, chunksize=chunksize, usecols=usecols)
+
+
+class ScoreAccumulator:
+    """
+    Running per-respondent/per-construct sums and counts across chunks.
+
+    Only the accumulators, one code per respondent and the dictionary-coded
+    metadata are kept, so memory grows with the number of respondents rather
+    than the number of long-format rows. Folding the chunks of a table gives
+    exactly the same result as pivot_long_to_wide() on the whole table.
+
+    The column names default to capability_demo.csv's; score_reshape passes
+    its own for other score families.
+    """
+
+    def __init__(self, n_constructs: int = NUM_CONSTRUCTS, metadata_columns: list = METADATA_COLUMNS,
+                 respondent_column: str = RESPONDENT_COLUMN, construct_column: str = CONSTRUCT_COLUMN,
+                 score_column: str = SCORE_COLUMN, column_prefix: str = 'construct'):
+        self.n_constructs = n_constructs
+        self.metadata_columns = list(metadata_columns)
+        self.respondent_column = respondent_column
+        self.construct_column = construct_column
+        self.score_column = score_column
+        self.column_prefix = column_prefix
+        self.rows_in = 0
+
+        self._seen_columns = set()
+        self._index = {}
+        self._capacity = 0
+        self._accumulators = new_accumulators(0, n_constructs)
+        self._meta_codes = {col: np.empty(0, dtype=np.int32) for col in self.metadata_columns}
+        self._meta_lookup = {col: {} for col in self.metadata_columns}
+        self._meta_values = {col: [] for col in self.metadata_columns}
+
+    @property
+    def n_respondents(self) -> int:
+        return len(self._index)
+
+    def _grow(self, needed: int):
+        """Grow the per-respondent arrays (amortized doubling)."""
+        if needed <= self._capacity:
+            return
+        capacity = max(needed, 2 * self._capacity, 1024)
+        size = capacity * self.n_constructs
+
+        for key, values in self._accumulators.items():
+            grown = np.zeros(size, dtype=values.dtype)
+            grown[:len(values)] = values
+            self._accumulators[key] = grown
+
+        for col, codes in self._meta_codes.items():
+            grown = np.full(capacity, -1, dtype=np.int32)
+            grown[:len(codes)] = codes
+            self._meta_codes[col] = grown
+
+        self._capacity = capacity
+
+    def add_chunk(self, chunk: pd.DataFrame):
+        """Fold one long-format chunk into the accumulators."""
+        self.rows_in += len(chunk)
+
+        local_codes, local_uniques = pd.factorize(chunk[self.respondent_column])
+        index = self._index
+        global_codes = np.fromiter(
+            (index.setdefault(respondent, len(index)) for respondent in local_uniques),
+            dtype=np.int64,
+            count=len(local_uniques),
+        )
+        self._grow(len(index))
+
+        codes = np.where(local_codes >= 0, global_codes[local_codes], -1)
+
+        construct_ids = pd.to_numeric(chunk[self.construct_column], errors='coerce').to_numpy(dtype=np.float64)
+        scores = pd.to_numeric(chunk[self.score_column], errors='coerce').to_numpy(dtype=np.float64)
+        scatter_scores(codes, construct_ids, scores, self._capacity, self.n_constructs, self._accumulators)
+
+        for col in self.metadata_columns:
+            if col in chunk.columns:
+                self._seen_columns.add(col)
+                self._add_metadata(col, chunk[col], codes)
+
+    def _add_metadata(self, col: str, series: pd.Series, codes: np.ndarray):
+        """Record the first non-null value for respondents that have none yet."""
+        meta_codes = self._meta_codes[col]
+        present = codes >= 0
+        need = np.zeros(len(codes), dtype=bool)
+        need[present] = meta_codes[codes[present]] == -1
+        need &= series.notna().to_numpy()
+
+        rows = np.flatnonzero(need)
+        if len(rows) == 0:
+            return
+
+        respondents, first_pos = np.unique(codes[rows], return_index=True)
+        lookup = self._meta_lookup[col]
+        values = self._meta_values[col]
+        value_codes = []
+        for value in series.iloc[rows[first_pos]]:
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(values)
+                values.append(value)
+            value_codes.append(code)
+
+        meta_codes[respondents] = value_codes
+
+    def finalize(self, score_dtype=np.float64, keep_cols: np.ndarray = None) -> dict:
+        """
+        Freeze the accumulators into the arrays the wide output is built from.
+
+        Args:
+            score_dtype: dtype of the mean matrix
+            keep_cols: 0-based construct columns to output (default: those
+                       this accumulator holds any score for). Partitions of
+                       one input must all be given the same columns.
+
+        Returns:
+            dict: {'respondent_ids', 'order', 'means', 'counts', 'keep_cols'}
+                  where order lists kept respondents sorted by ID
+        """
+        n = self.n_respondents
+        size = n * self.n_constructs
+        accumulators = {key: values[:size] for key, values in self._accumulators.items()}
+        means, counts = finalize_means(accumulators, self.n_constructs, score_dtype)
+
+        respondent_ids = np.empty(n, dtype=object)
+        respondent_ids[list(self._index.values())] = list(self._index.keys())
+
+        kept = np.flatnonzero(counts.any(axis=1))
+        order = kept[np.argsort(respondent_ids[kept], kind='stable')]
+
+        return {
+            'respondent_ids': respondent_ids,
+            'order': order,
+            'means': means,
+            'counts': counts,
+            'keep_cols': np.flatnonzero(counts.any(axis=0)) if keep_cols is None else np.asarray(keep_cols),
+        }
+
+    def stats(self, frozen: dict) -> dict:
+        """Summary statistics in the same shape as pivot_long_to_wide()."""
+        counts = frozen['counts']
+        return {
+            'rows_in': self.rows_in,
+            'respondents': len(frozen['order']),
+            'scored_cells': int(np.count_nonzero(counts)),
+            'duplicates_averaged': int(counts.sum() - np.count_nonzero(counts)),
+            'construct_columns': len(frozen['keep_cols']),
+        }
+
+    def iter_frames(self, frozen: dict, rows_per_frame: int = 100_000):
+        """
+        Yield the wide output in blocks of rows_per_frame respondents.
+
+        Blocks come out in ResponseId_id order with the same columns as
+        pivot_long_to_wide(), so writing them one after another reproduces
+        the batch output without building the whole frame.
+        """
+        order = frozen['order']
+        means = frozen['means']
+
+        for start in range(0, len(order), rows_per_frame):
+            rows = order[start:start + rows_per_frame]
+            block = {self.respondent_column: frozen['respondent_ids'][rows]}
+            for j in frozen['keep_cols']:
+                block[f'{self.column_prefix}_{j + 1}'] = means[rows, j]
+            for col in self.metadata_columns:
+                if col not in self._seen_columns:
+                    continue
+                values = np.array(self._meta_values[col] + [np.nan], dtype=object)
+                block[col] = values[self._meta_codes[col][rows]]
+            yield pd.DataFrame(block)
+
+
+def scored_constructs(chunk: pd.DataFrame, n_constructs: int = NUM_CONSTRUCTS) -> np.ndarray:
+    """
+    Which construct columns a long-format chunk scores (same rules as scatter_scores).
+
+    Returns:
+        np.ndarray: Boolean mask over the n_constructs columns
+    """
+    construct_ids = pd.to_numeric(chunk[CONSTRUCT_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+    scores = pd.to_numeric(chunk[SCORE_COLUMN], errors='coerce').to_numpy(dtype=np.float64)
+    valid = (
+        chunk[RESPONDENT_COLUMN].notna().to_numpy()
+        & (construct_ids >= 1)
+        & (construct_ids <= n_constructs)
+        & ~np.isnan(scores)
+    )
+    mask = np.zeros(n_constructs, dtype=bool)
+    mask[construct_ids[valid].astype(np.int64) - 1] = True
+    return mask
+
+
+def partition_long_format(path: str, partitions: int, chunksize: int, workdir: str, on_chunk=None) -> list:
+    """
+    Split a long-format file into respondent-hash partitions on disk.
+
+    Every respondent lands in exactly one partition and keeps its original
+    row order, so each partition can be pivoted on its own with identical
+    results.
+
+    Args:
+        path: Long-format CSV (or .zip/.gz)
+        partitions: Number of partition files
+        chunksize: Rows read per chunk
+        workdir: Directory for the partition files
+        on_chunk: Optional callback invoked with every input chunk
+
+    Returns:
+        list: Paths of the non-empty partition files
+    """
+    paths = [os.path.join(workdir, f"partition_{i:04d}.csv") for i in range(partitions)]
+    written = set()
+
+    for chunk in read_long_format_chunks(path, chunksize):
+        if on_chunk is not None:
+            on_chunk(chunk)
+        keys = chunk[RESPONDENT_COLUMN].astype(object).fillna('').to_numpy()
+        buckets = pd.util.hash_array(keys) % partitions
+        for bucket, part in chunk.groupby(buckets, sort=False):
+            part.to_csv(paths[bucket], mode='a', header=bucket not in written, index=False)
+            written.add(bucket)
+
+    return [paths[i] for i in sorted(written)]
+
+
+def iter_partitioned_accumulators(path: str, partitions: int, chunksize: int, on_chunk=None):
+    """
+    Yield one filled ScoreAccumulator per respondent-hash partition.
+
+    Partition files live in a temporary directory that is removed once the
+    generator is exhausted.
+
+    Args:
+        path: Long-format CSV (or .zip/.gz)
+        partitions: Number of respondent-hash partitions
+        chunksize: Rows read per chunk
+        on_chunk: Optional callback invoked with every input chunk; all of
+                  them are seen before the first accumulator is yielded
+    """
+    with tempfile.TemporaryDirectory(prefix='capability_partitions_') as workdir:
+        for part_path in partition_long_format(path, partitions, chunksize, workdir, on_chunk):
+            accumulator = ScoreAccumulator()
+            for chunk in read_long_format_chunks(part_path, chunksize):
+                accumulator.add_chunk(chunk)
+            os.remove(part_path)
+            yield accumulator
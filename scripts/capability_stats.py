@@ -0,0 +1,332 @@
+"""
+Capability Statistics Kernel
+============================
+
+Fused validation statistics for the capability transform scripts.
+
+Instead of one pandas scan per check (nunique, drop_duplicates, min/max,
+value_counts, and min/max/mean/isnull per construct column), every count,
+range, mean, null count and distribution is computed from a single pass
+over the score matrix and the factorized metadata codes.
+
+Results are plain JSON objects (ints, floats, lists, dicts; None for
+undefined values), so they can be rendered into the text report and
+written to disk as-is. The partial states are mergeable, which lets the
+streaming transform fold chunk statistics together.
+
+Usage:
+    from capability_stats import input_statistics, output_statistics
+
+    report = {'input': input_statistics(long_df), 'output': output_statistics(wide_df)}
+"""
+
+import numpy as np
+import pandas as pd
+
+NUM_CONSTRUCTS = 32
+
+# Long-format metadata distributions reported by validate_input_data
+INPUT_DISTRIBUTIONS = {
+    'industries': 'industry_synthetic',
+    'countries': 'country_synthetic',
+    'roles': 'role_synthetic',
+}
+
+
+def _json_number(value):
+    """Convert a numpy scalar to a JSON-native number (None for NaN/inf)."""
+    if value is None:
+        return None
+    value = float(value)
+    if not np.isfinite(value):
+        return None
+    return int(value) if value.is_integer() and abs(value) < 2**53 else value
+
+
+def distribution(values: pd.Series) -> dict:
+    """
+    Count occurrences of each non-null value in one hash pass.
+
+    Returns:
+        dict: {value: count}, most frequent first
+    """
+    counts = values.value_counts()
+    return {str(key): int(count) for key, count in counts.items()}
+
+
+def merge_distributions(left: dict, right: dict) -> dict:
+    """Add two distributions together, most frequent first."""
+    merged = dict(left)
+    for key, count in right.items():
+        merged[key] = merged.get(key, 0) + count
+    return dict(sorted(merged.items(), key=lambda item: -item[1]))
+
+
+# ---------------------------------------------------------------------------
+# Score matrix (wide format)
+# ---------------------------------------------------------------------------
+
+def score_matrix_partial(matrix: np.ndarray) -> dict:
+    """
+    Column-wise partial statistics of a respondents × constructs matrix.
+
+    One NaN mask and one reduction per statistic over the whole matrix,
+    instead of a separate pandas scan per column.
+
+    Returns:
+        dict: Mergeable partial state (see merge_score_partials)
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(-1, 1)
+
+    null_mask = np.isnan(matrix)
+    n_cols = matrix.shape[1]
+
+    if matrix.shape[0] == 0:
+        mins = np.full(n_cols, np.nan)
+        maxs = np.full(n_cols, np.nan)
+    else:
+        mins = np.fmin.reduce(matrix, axis=0)
+        maxs = np.fmax.reduce(matrix, axis=0)
+
+    return {
+        'rows': matrix.shape[0],
+        'min': mins,
+        'max': maxs,
+        'sum': np.where(null_mask, 0.0, matrix).sum(axis=0),
+        'nulls': null_mask.sum(axis=0),
+        'all_null_rows': int(null_mask.all(axis=1).sum()) if n_cols else 0,
+    }
+
+
+def merge_score_partials(left: dict, right: dict) -> dict:
+    """Combine two score_matrix_partial states (None acts as empty)."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return {
+        'rows': left['rows'] + right['rows'],
+        'min': np.fmin(left['min'], right['min']),
+        'max': np.fmax(left['max'], right['max']),
+        'sum': left['sum'] + right['sum'],
+        'nulls': left['nulls'] + right['nulls'],
+        'all_null_rows': left['all_null_rows'] + right['all_null_rows'],
+    }
+
+
+def finalize_score_stats(partial: dict, columns: list) -> dict:
+    """
+    Turn a score partial into per-column statistics.
+
+    Returns:
+        dict: {column: {'min', 'max', 'mean', 'null_count'}}
+    """
+    non_null = partial['rows'] - partial['nulls']
+    means = np.full(len(columns), np.nan)
+    np.divide(partial['sum'], non_null, out=means, where=non_null > 0)
+
+    return {
+        col: {
+            'min': _json_number(partial['min'][j]),
+            'max': _json_number(partial['max'][j]),
+            'mean': _json_number(means[j]),
+            'null_count': int(partial['nulls'][j]),
+        }
+        for j, col in enumerate(columns)
+    }
+
+
+def score_matrix_stats(matrix: np.ndarray, columns: list) -> dict:
+    """Per-column min/max/mean/null_count of a score matrix in one pass."""
+    return finalize_score_stats(score_matrix_partial(matrix), columns)
+
+
+# ---------------------------------------------------------------------------
+# Output (wide format)
+# ---------------------------------------------------------------------------
+
+def output_partial(df: pd.DataFrame) -> dict:
+    """Mergeable output statistics for one block of wide-format rows."""
+    construct_cols = [col for col in df.columns if col.startswith('construct_')]
+    other_cols = [col for col in df.columns if col not in construct_cols]
+
+    return {
+        'columns': list(df.columns),
+        'construct_columns': construct_cols,
+        'scores': score_matrix_partial(df[construct_cols].to_numpy(dtype=np.float64)),
+        'other_nulls': {col: int(df[col].isnull().sum()) for col in other_cols},
+        'company_distribution': distribution(df['company_name']) if 'company_name' in df.columns else {},
+    }
+
+
+def merge_output_partials(left: dict, right: dict) -> dict:
+    """Combine two output_partial states (None acts as empty)."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return {
+        'columns': left['columns'],
+        'construct_columns': left['construct_columns'],
+        'scores': merge_score_partials(left['scores'], right['scores']),
+        'other_nulls': {
+            col: left['other_nulls'].get(col, 0) + right['other_nulls'].get(col, 0)
+            for col in left['other_nulls']
+        },
+        'company_distribution': merge_distributions(left['company_distribution'],
+                                                    right['company_distribution']),
+    }
+
+
+def finalize_output_stats(partial: dict) -> dict:
+    """
+    Turn an output partial into the output statistics object.
+
+    Returns:
+        dict: {'total_respondents', 'columns', 'construct_columns',
+               'null_counts', 'score_ranges', 'company_distribution',
+               'completely_null'}
+    """
+    score_ranges = finalize_score_stats(partial['scores'], partial['construct_columns'])
+
+    null_counts = {}
+    for col in partial['columns']:
+        if col in score_ranges:
+            null_counts[col] = score_ranges[col]['null_count']
+        else:
+            null_counts[col] = partial['other_nulls'][col]
+
+    return {
+        'total_respondents': partial['scores']['rows'],
+        'columns': len(partial['columns']),
+        'construct_columns': len(partial['construct_columns']),
+        'null_counts': null_counts,
+        'score_ranges': score_ranges,
+        'company_distribution': partial['company_distribution'],
+        'completely_null': partial['scores']['all_null_rows'] if partial['construct_columns'] else 0,
+    }
+
+
+def output_statistics(df: pd.DataFrame) -> dict:
+    """Output statistics of a complete wide-format dataframe."""
+    return finalize_output_stats(output_partial(df))
+
+
+# ---------------------------------------------------------------------------
+# Input (long format)
+# ---------------------------------------------------------------------------
+
+def input_partial(df: pd.DataFrame) -> dict:
+    """
+    Mergeable input statistics for one long-format chunk.
+
+    Respondent-level counts (unique respondents, duplicate entries) are not
+    mergeable across chunks and are filled in by input_statistics() or by
+    the caller from the pivot accumulators.
+    """
+    scores = pd.to_numeric(df['score'], errors='coerce').to_numpy(dtype=np.float64)
+    construct_ids = pd.to_numeric(df['construct_id'], errors='coerce').to_numpy(dtype=np.float64)
+
+    valid_constructs = construct_ids[~np.isnan(construct_ids)].astype(np.int64)
+    construct_counts = {}
+    if len(valid_constructs):
+        offset = valid_constructs.min()
+        counts = np.bincount(valid_constructs - offset)
+        construct_counts = {int(i + offset): int(c) for i, c in enumerate(counts) if c}
+
+    null_mask = np.isnan(scores)
+    has_scores = not null_mask.all()
+
+    return {
+        'total_rows': len(df),
+        'null_scores': int(null_mask.sum()),
+        'score_min': float(np.nanmin(scores)) if has_scores else np.nan,
+        'score_max': float(np.nanmax(scores)) if has_scores else np.nan,
+        'construct_counts': construct_counts,
+        'distributions': {
+            key: distribution(df[col]) for key, col in INPUT_DISTRIBUTIONS.items() if col in df.columns
+        },
+    }
+
+
+def merge_input_partials(left: dict, right: dict) -> dict:
+    """Combine two input_partial states (None acts as empty)."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+
+    construct_counts = dict(left['construct_counts'])
+    for construct, count in right['construct_counts'].items():
+        construct_counts[construct] = construct_counts.get(construct, 0) + count
+
+    return {
+        'total_rows': left['total_rows'] + right['total_rows'],
+        'null_scores': left['null_scores'] + right['null_scores'],
+        'score_min': float(np.fmin(left['score_min'], right['score_min'])),
+        'score_max': float(np.fmax(left['score_max'], right['score_max'])),
+        'construct_counts': construct_counts,
+        'distributions': {
+            key: merge_distributions(left['distributions'].get(key, {}), right['distributions'].get(key, {}))
+            for key in set(left['distributions']) | set(right['distributions'])
+        },
+    }
+
+
+def finalize_input_stats(partial: dict, unique_respondents: int, duplicate_entries: int) -> dict:
+    """
+    Turn an input partial plus respondent-level counts into the input
+    statistics object.
+
+    Returns:
+        dict: {'total_rows', 'unique_respondents', 'unique_constructs',
+               'score_range', 'null_scores', 'duplicate_entries',
+               'expected_rows', 'construct_range', 'missing_constructs',
+               'industries', 'countries', 'roles'}
+    """
+    constructs = sorted(partial['construct_counts'])
+    stats = {
+        'total_rows': partial['total_rows'],
+        'unique_respondents': unique_respondents,
+        'unique_constructs': len(constructs),
+        'score_range': [_json_number(partial['score_min']), _json_number(partial['score_max'])],
+        'null_scores': partial['null_scores'],
+        'duplicate_entries': duplicate_entries,
+        'expected_rows': unique_respondents * NUM_CONSTRUCTS,
+        'construct_range': [constructs[0], constructs[-1]] if constructs else [None, None],
+        'missing_constructs': sorted(set(range(1, NUM_CONSTRUCTS + 1)) - set(constructs)),
+    }
+    for key in INPUT_DISTRIBUTIONS:
+        stats[key] = partial['distributions'].get(key, {})
+    return stats
+
+
+def input_statistics(df: pd.DataFrame) -> dict:
+    """
+    Input statistics of a complete long-format dataframe.
+
+    Respondents are factorized once; duplicate (respondent, construct)
+    entries are counted from one integer key per row.
+    """
+    codes, uniques = pd.factorize(df['ResponseId_id'])
+    construct_codes, construct_uniques = pd.factorize(df['construct_id'])
+
+    # Null respondents/constructs factorize to -1; shifting by one keeps them as
+    # their own key so they pair up like drop_duplicates() does (NaN as a value)
+    stride = len(construct_uniques) + 1
+    keys = (codes.astype(np.int64) + 1) * stride + (construct_codes + 1)
+    key_space = (len(uniques) + 1) * stride
+
+    if key_space <= 8 * len(df):
+        # Dense key space (the normal case): mark pairs in a bitmap
+        seen = np.zeros(key_space, dtype=bool)
+        seen[keys] = True
+        distinct_pairs = int(seen.sum())
+    else:
+        distinct_pairs = len(pd.unique(keys))
+
+    duplicate_entries = len(df) - distinct_pairs
+
+    return finalize_input_stats(input_partial(df), len(uniques), int(duplicate_entries))
@@ -0,0 +1,152 @@
+"""
+Company Assignment
+==================
+
+Deterministic respondent → company assignment shared by the capability
+transform and import scripts.
+
+Only the unique respondent IDs are hashed (one MD5 each), and the resulting
+company codes are broadcast back to every row. That matters for the long
+format, where each respondent appears 32 times.
+
+Two schemes are supported:
+    modulo  MD5(respondent_id) as a 128-bit integer modulo the number of
+            companies. With DEMO_COMPANIES this is byte-identical to the
+            original `int(md5(...).hexdigest(), 16) % 3` assignment.
+    ring    Consistent-hash ring with virtual nodes per company. Adding or
+            removing a company only moves ~1/N of the respondents.
+
+Usage:
+    from company_assignment import assign_companies
+
+    df['company_name'] = assign_companies(df['respondent_id'])
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# Demo companies, in assignment order
+DEMO_COMPANIES = ["acme-corp", "tech-innovations", "global-solutions"]
+
+RING_VIRTUAL_NODES = 64
+
+
+def hash_respondent_to_company(respondent_id: str, companies: list = DEMO_COMPANIES) -> str:
+    """
+    Deterministically assign one respondent to a company (modulo scheme).
+
+    Args:
+        respondent_id: Unique respondent identifier
+        companies: Company names in assignment order
+
+    Returns:
+        company_name: One of companies
+    """
+    hash_value = int(hashlib.md5(respondent_id.encode()).hexdigest(), 16)
+    return companies[hash_value % len(companies)]
+
+
+def md5_words(keys) -> np.ndarray:
+    """
+    MD5 each key and return the digests as big-endian uint64 word pairs.
+
+    Returns:
+        np.ndarray: shape (len(keys), 2), [:, 0] high word, [:, 1] low word
+    """
+    md5 = hashlib.md5
+    digests = b''.join(md5(str(key).encode()).digest() for key in keys)
+    return np.frombuffer(digests, dtype='>u8').reshape(-1, 2).astype(np.uint64)
+
+
+def modulo_codes(words: np.ndarray, n_companies: int) -> np.ndarray:
+    """
+    Reduce 128-bit digests modulo n_companies without Python big ints.
+
+    (hi * 2**64 + lo) % n == ((hi % n) * (2**64 % n) + lo % n) % n, and every
+    intermediate stays far below 2**64 for any realistic company count.
+    """
+    n = np.uint64(n_companies)
+    base = np.uint64(2**64 % n_companies)
+    high = words[:, 0] % n
+    low = words[:, 1] % n
+    return ((high * base + low) % n).astype(np.int64)
+
+
+def build_ring(companies: list, virtual_nodes: int = RING_VIRTUAL_NODES) -> tuple:
+    """
+    Build a consistent-hash ring for the given companies.
+
+    Returns:
+        tuple: (sorted ring positions uint64 ndarray, company index per position)
+    """
+    labels = [f"{company}#{node}" for company in companies for node in range(virtual_nodes)]
+    positions = md5_words(labels)[:, 0]
+    owners = np.repeat(np.arange(len(companies)), virtual_nodes)
+
+    order = np.argsort(positions, kind='stable')
+    return positions[order], owners[order]
+
+
+def ring_codes(words: np.ndarray, ring: tuple) -> np.ndarray:
+    """Map digests to the first ring position at or after them (wrapping)."""
+    positions, owners = ring
+    slots = np.searchsorted(positions, words[:, 0], side='left')
+    slots[slots == len(positions)] = 0
+    return owners[slots]
+
+
+def assign_company_codes(respondent_ids: pd.Series,
+                         n_companies: int = len(DEMO_COMPANIES),
+                         scheme: str = 'modulo',
+                         companies: list = DEMO_COMPANIES,
+                         virtual_nodes: int = RING_VIRTUAL_NODES) -> np.ndarray:
+    """
+    Assign every row a company index, hashing each unique respondent once.
+
+    Args:
+        respondent_ids: Respondent ID per row (repeats allowed)
+        n_companies: Number of companies for the modulo scheme
+        scheme: 'modulo' or 'ring'
+        companies: Company names (ring node labels for the ring scheme)
+        virtual_nodes: Ring positions per company
+
+    Returns:
+        np.ndarray: Company index per row (-1 for missing IDs)
+    """
+    codes, uniques = pd.factorize(respondent_ids)
+    words = md5_words(uniques)
+
+    if scheme == 'modulo':
+        unique_codes = modulo_codes(words, n_companies)
+    elif scheme == 'ring':
+        unique_codes = ring_codes(words, build_ring(companies, virtual_nodes))
+    else:
+        raise ValueError(f"Unknown assignment scheme: {scheme}")
+
+    return np.where(codes >= 0, unique_codes[codes] if len(uniques) else -1, -1)
+
+
+def assign_companies(respondent_ids: pd.Series,
+                     companies: list = DEMO_COMPANIES,
+                     scheme: str = 'modulo',
+                     virtual_nodes: int = RING_VIRTUAL_NODES) -> pd.Series:
+    """
+    Assign every row a company name, hashing each unique respondent once.
+
+    With the default modulo scheme the result matches
+    hash_respondent_to_company() row for row.
+
+    Args:
+        respondent_ids: Respondent ID per row (repeats allowed)
+        companies: Company names in assignment order
+        scheme: 'modulo' or 'ring'
+        virtual_nodes: Ring positions per company (ring scheme only)
+
+    Returns:
+        pd.Series: Company name per row, aligned with respondent_ids
+    """
+    codes = assign_company_codes(respondent_ids, len(companies), scheme, companies, virtual_nodes)
+    names = np.array(list(companies) + [None], dtype=object)
+    return pd.Series(names[codes], index=respondent_ids.index, name='company_name')
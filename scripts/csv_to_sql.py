@@ -1,89 +1,182 @@
 #!/usr/bin/env python3
 """
-Convert sentiment_demo.csv to SQL INSERT statements
+Convert sentiment_demo.csv to a SQL import script
+
+Rows are built by import_to_supabase.respondent_record(), so the SQL file and
+the API import always load the same values.
+
+The CSV is streamed: respondents are written as they are read, in INSERT
+statements of at most --rows-per-statement rows (or as one COPY data section
+with --format copy), so memory stays flat and no statement grows with the
+input. The whole script runs in one transaction, so a failed statement
+leaves the tables as they were.
+
+--format copy writes a psql-style `COPY ... FROM stdin` section, the fastest
+way into Postgres, but it needs psql (psql -f); the Supabase SQL editor only
+runs the INSERT form. --upsert updates respondents that already exist
+(company_id, respondent_id) instead of failing on them. An output path ending
+in .gz (or --gzip) is gzip-compressed; psql reads it with
+`gunzip -c import_all_data.sql.gz | psql ...`.
+
+Usage:
+    python scripts/csv_to_sql.py
+    python scripts/csv_to_sql.py data-foundation/sentiment_demo.csv --rows-per-statement 500
+    python scripts/csv_to_sql.py --format copy --upsert --gzip
 """
+import argparse
 import csv
-import sys
-
-# Company ID for Acme Corp
-COMPANY_ID = '550e8400-e29b-41d4-a716-446655440001'
-
-def csv_to_sql(csv_path, output_path):
-    """Convert CSV to SQL INSERT statements"""
-    
-    with open(csv_path, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        
-        with open(output_path, 'w', encoding='utf-8') as sqlfile:
-            # Write header
-            sqlfile.write("-- =============================================\n")
-            sqlfile.write("-- AI Navigator - Complete Demo Data Import\n")
-            sqlfile.write("-- =============================================\n\n")
-            
-            # Insert companies
-            sqlfile.write("-- Insert demo companies\n")
-            sqlfile.write("INSERT INTO public.companies (id, name, display_name, logo_url) VALUES\n")
-            sqlfile.write("  ('550e8400-e29b-41d4-a716-446655440001', 'acme-corp', 'Acme Corporation', null),\n")
-            sqlfile.write("  ('550e8400-e29b-41d4-a716-446655440002', 'tech-innovations', 'Tech Innovations', null),\n")
-            sqlfile.write("  ('550e8400-e29b-41d4-a716-446655440003', 'global-solutions', 'Global Solutions', null)\n")
-            sqlfile.write("ON CONFLICT (name) DO NOTHING;\n\n")
-            
-            # Insert demo users
-            sqlfile.write("-- Insert demo users (password is 'demo123' for all)\n")
-            sqlfile.write("INSERT INTO public.demo_users (email, password_hash, company_id, full_name, role) VALUES\n")
-            sqlfile.write("  ('demo@acme-corp.com', 'demo123', '550e8400-e29b-41d4-a716-446655440001', 'Sarah Johnson', 'Chief AI Officer'),\n")
-            sqlfile.write("  ('demo@tech-innovations.com', 'demo123', '550e8400-e29b-41d4-a716-446655440002', 'Michael Chen', 'VP of Digital Transformation'),\n")
-            sqlfile.write("  ('demo@global-solutions.com', 'demo123', '550e8400-e29b-41d4-a716-446655440003', 'Emma Rodriguez', 'Director of AI Strategy')\n")
-            sqlfile.write("ON CONFLICT (email) DO NOTHING;\n\n")
-            
-            # Start respondents insert
-            sqlfile.write("-- Insert all respondent data from CSV\n")
-            sqlfile.write("INSERT INTO public.respondents (\n")
-            sqlfile.write("  company_id, respondent_id, region, department, employment_type, age, user_language,\n")
-            sqlfile.write("  sentiment_1, sentiment_2, sentiment_3, sentiment_4, sentiment_5,\n")
-            sqlfile.write("  sentiment_6, sentiment_7, sentiment_8, sentiment_9, sentiment_10,\n")
-            sqlfile.write("  sentiment_11, sentiment_12, sentiment_13, sentiment_14, sentiment_15,\n")
-            sqlfile.write("  sentiment_16, sentiment_17, sentiment_18, sentiment_19, sentiment_20,\n")
-            sqlfile.write("  sentiment_21, sentiment_22, sentiment_23, sentiment_24, sentiment_25\n")
-            sqlfile.write(") VALUES\n")
-            
-            # Process CSV rows
-            rows = []
-            for row in reader:
-                values = [
-                    f"'{COMPANY_ID}'",
-                    f"'{row['RespondentID']}'",
-                    f"'{row['Region'].replace(chr(39), chr(39)+chr(39))}'",  # Escape single quotes
-                    f"'{row['Department'].replace(chr(39), chr(39)+chr(39))}'",
-                    f"'{row['Employment_type'].replace(chr(39), chr(39)+chr(39))}'",
-                    f"'{row['Age']}'",
-                    f"'{row['UserLanguage']}'"
-                ]
-                
-                # Add all sentiment scores
-                for i in range(1, 26):
-                    sentiment_key = f'Sentiment_{i}'
-                    value = row[sentiment_key]
-                    # Handle NULL/empty values
-                    if value and value.strip():
-                        values.append(value)
-                    else:
-                        values.append('NULL')
-                
-                rows.append(f"  ({', '.join(values)})")
-            
-            # Write all rows
-            sqlfile.write(',\n'.join(rows))
-            sqlfile.write(';\n')
-            
-            print(f"Successfully converted {len(rows)} rows to SQL")
-            print(f"Output file: {output_path}")
+import gzip
 
-if __name__ == '__main__':
-    csv_path = 'data-foundation/sentiment_demo.csv'
-    output_path = 'supabase/import_all_data.sql'
-    
-    print(f"Converting {csv_path} to SQL...")
-    csv_to_sql(csv_path, output_path)
+from import_to_supabase import DEMO_COMPANIES, DEMO_USERS, RESPONDENT_COLUMNS, SENTIMENT_CSV, respondent_record
+from importer_core import batched
+
+OUTPUT_FILE = 'supabase/import_all_data.sql'
+SQL_FORMATS = ('insert', 'copy')
+ROWS_PER_STATEMENT = 1000  # Respondents per INSERT statement
+RESPONDENT_KEY = ['company_id', 'respondent_id']  # UNIQUE(company_id, respondent_id)
+STAGING_TABLE = 'respondents_import'  # Temporary table a --format copy --upsert load goes through
+
+def sql_literal(value) -> str:
+    """Python value as a SQL literal (None → NULL, strings quoted and escaped)"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return repr(value)
+
+def values_rows(records: list, columns: list) -> str:
+    """VALUES rows for a list of dicts, one per line"""
+    return ',\n'.join(
+        f"  ({', '.join(sql_literal(record[col]) for col in columns)})" for record in records
+    )
+
+def copy_value(value) -> str:
+    """Python value as a COPY text-format field (None → \\N, separators escaped)"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return (value.replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+    return repr(value)
+
+def upsert_clause(key: list, columns: list) -> str:
+    """ON CONFLICT clause that overwrites the non-key columns of an existing row"""
+    updates = ',\n  '.join(f"{col} = EXCLUDED.{col}" for col in columns if col not in key)
+    return f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET\n  {updates}"
+
+def insert_statements(table: str, columns: list, records, rows_per_statement: int = ROWS_PER_STATEMENT,
+                      on_conflict: str = None):
+    """Yield multi-row INSERT statements of at most rows_per_statement records each"""
+    head = f"INSERT INTO {table} (\n  {', '.join(columns)}\n) VALUES\n"
+    tail = f"\n{on_conflict};\n\n" if on_conflict else ";\n\n"
+    for chunk in batched(records, rows_per_statement):
+        yield head + values_rows(chunk, columns) + tail
+
+def copy_section(table: str, columns: list, records, rows_per_write: int = ROWS_PER_STATEMENT):
+    """Yield a psql COPY FROM stdin section (header, data lines, terminator) in pieces"""
+    yield f"COPY {table} ({', '.join(columns)}) FROM stdin;\n"
+    for chunk in batched(records, rows_per_write):
+        yield ''.join('\t'.join(copy_value(record[col]) for col in columns) + '\n' for record in chunk)
+    yield "\\.\n\n"
+
+def respondent_sql(records, fmt: str = 'insert', upsert: bool = False,
+                   rows_per_statement: int = ROWS_PER_STATEMENT):
+    """
+    Yield the SQL that loads respondent records, piece by piece.
+
+    A COPY cannot resolve conflicts itself, so --format copy --upsert copies
+    into a temporary table and upserts from it with one INSERT ... SELECT.
+    """
+    table = 'public.respondents'
+    on_conflict = upsert_clause(RESPONDENT_KEY, RESPONDENT_COLUMNS) if upsert else None
+
+    if fmt == 'insert':
+        yield from insert_statements(table, RESPONDENT_COLUMNS, records, rows_per_statement, on_conflict)
+    elif not upsert:
+        yield from copy_section(table, RESPONDENT_COLUMNS, records, rows_per_statement)
+    else:
+        yield (f"CREATE TEMP TABLE {STAGING_TABLE} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP;\n\n")
+        yield from copy_section(STAGING_TABLE, RESPONDENT_COLUMNS, records, rows_per_statement)
+        columns = ', '.join(RESPONDENT_COLUMNS)
+        yield (f"INSERT INTO {table} (\n  {columns}\n)\nSELECT {columns}\nFROM {STAGING_TABLE}\n"
+               f"{on_conflict};\n\n")
+
+def open_output(output_path: str):
+    """Text file for the SQL script, gzip-compressed if the path ends in .gz"""
+    if output_path.endswith('.gz'):
+        return gzip.open(output_path, 'wt', encoding='utf-8', compresslevel=6)
+    return open(output_path, 'w', encoding='utf-8')
+
+def csv_to_sql(csv_path, output_path, fmt: str = 'insert', upsert: bool = False,
+               rows_per_statement: int = ROWS_PER_STATEMENT) -> int:
+    """
+    Convert CSV to a SQL import script, streaming the respondents.
+
+    Returns:
+        int: Respondents written
+    """
+    if fmt not in SQL_FORMATS:
+        raise ValueError(f"Unknown SQL format: {fmt}")
+
+    with open(csv_path, 'r', encoding='utf-8', newline='') as csvfile, open_output(output_path) as sqlfile:
+        # Write header
+        sqlfile.write("-- =============================================\n")
+        sqlfile.write("-- AI Navigator - Complete Demo Data Import\n")
+        sqlfile.write("-- =============================================\n\n")
+        sqlfile.write("BEGIN;\n\n")
+
+        # Insert companies
+        company_columns = list(DEMO_COMPANIES[0])
+        sqlfile.write("-- Insert demo companies\n")
+        sqlfile.write(f"INSERT INTO public.companies ({', '.join(company_columns)}) VALUES\n")
+        sqlfile.write(values_rows(DEMO_COMPANIES, company_columns) + "\n")
+        sqlfile.write("ON CONFLICT (name) DO NOTHING;\n\n")
+
+        # Insert demo users
+        user_columns = list(DEMO_USERS[0])
+        sqlfile.write("-- Insert demo users (password is 'demo123' for all)\n")
+        sqlfile.write(f"INSERT INTO public.demo_users ({', '.join(user_columns)}) VALUES\n")
+        sqlfile.write(values_rows(DEMO_USERS, user_columns) + "\n")
+        sqlfile.write("ON CONFLICT (email) DO NOTHING;\n\n")
+
+        # Insert respondents as they are read
+        count = 0
+
+        def records():
+            nonlocal count
+            for row in csv.DictReader(csvfile):
+                count += 1
+                yield respondent_record(row)
+
+        sqlfile.write("-- Insert all respondent data from CSV\n")
+        for piece in respondent_sql(records(), fmt, upsert, rows_per_statement):
+            sqlfile.write(piece)
+        sqlfile.write("COMMIT;\n")
+
+    print(f"Successfully converted {count} rows to SQL ({fmt}{', upsert' if upsert else ''})")
+    print(f"Output file: {output_path}")
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the sentiment CSV to a SQL import script.")
+    parser.add_argument('csv', nargs='?', default=SENTIMENT_CSV, help=f"Sentiment CSV (default: {SENTIMENT_CSV})")
+    parser.add_argument('--output', default=OUTPUT_FILE, help=f"SQL file to write (default: {OUTPUT_FILE})")
+    parser.add_argument('--format', choices=SQL_FORMATS, default='insert',
+                        help="Multi-row INSERT statements, or a psql COPY data section (default: insert)")
+    parser.add_argument('--rows-per-statement', type=int, default=ROWS_PER_STATEMENT,
+                        help=f"Respondents per INSERT statement (default: {ROWS_PER_STATEMENT})")
+    parser.add_argument('--upsert', action='store_true',
+                        help="Update respondents that already exist instead of failing on them")
+    parser.add_argument('--gzip', action='store_true', help="gzip the output (adds .gz to the file name)")
+    args = parser.parse_args()
+
+    output_path = args.output
+    if args.gzip and not output_path.endswith('.gz'):
+        output_path += '.gz'
+
+    print(f"Converting {args.csv} to SQL...")
+    csv_to_sql(args.csv, output_path, args.format, args.upsert, args.rows_per_statement)
     print("Done!")
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Dead-Letter Files
+=================
+
+Records the server rejected during an import, kept for fixing and replay.
+
+When a row-level error (a bad value, a constraint violation) rejects a
+batch, the uploader bisects it (see supabase_uploader.isolate_failures) so
+the good records are still committed and only the records that fail on
+their own reach the dead-letter file. Batch-wide errors (RLS, an unknown
+column, a duplicate key within one upsert) and batches that still fail
+after their transient retries send the whole batch there. Each entry is
+a JSON line holding the table, the upsert key, the batch, the error and
+the record exactly as it was sent.
+
+Dead-letter files live next to the journals and import logs:
+    logs/<input name>.<table>.rejected.jsonl   (file imports)
+    logs/<table>.rejected.jsonl                (record lists, e.g. taboos)
+
+A run starts its file afresh, so it only ever holds that run's rejects.
+Replaying writes the records again and leaves only the ones that still fail.
+The original file is kept until the replay has finished; the records that
+still fail are collected in a temporary file that then replaces it.
+
+Staged reloads (migration 010) label their rejects with the staging table
+they were written to (e.g. taboos_staging). Those are not replayed: the
+next staged_load_begin empties staging and nothing would publish the
+replayed rows, while writing them to the live table would bypass the
+publish check. Fix the source data and rerun the reload instead
+(--resume, for the long-format importer).
+
+Usage:
+    python scripts/dead_letter.py logs/capability_demo_wide.csv.respondents.rejected.jsonl
+    python scripts/dead_letter.py logs/taboos.rejected.jsonl --dry-run
+"""
+
+import argparse
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from supabase_uploader import encode_json
+
+DEAD_LETTER_DIR = "logs"
+DEAD_LETTER_SUFFIX = ".rejected.jsonl"
+
+
+def dead_letter_path(table: str, input_file: str = None) -> str:
+    """Dead-letter file for table (loaded from input_file, if any)."""
+    name = f"{Path(input_file).name}.{table}" if input_file else table
+    return str(Path(DEAD_LETTER_DIR) / f"{name}{DEAD_LETTER_SUFFIX}")
+
+
+class DeadLetterFile:
+    """
+    Append-only file of rejected records for one table.
+
+    Any previous file at path is removed (unless fresh=False); the new one
+    is only created once the first record is rejected. add() is safe to
+    call from the uploader's worker threads.
+
+    Args:
+        path: Dead-letter file
+        table: Table the records were written to
+        on_conflict: Upsert key the records were written with, if any
+        fresh: Start a new file instead of appending to an existing one
+    """
+
+    def __init__(self, path: str, table: str, on_conflict: str = None, fresh: bool = True):
+        self.path = path
+        self.table = table
+        self.on_conflict = on_conflict
+        self.count = 0
+        self._file = None
+        self._lock = threading.Lock()
+        if fresh and os.path.exists(path):
+            os.remove(path)
+
+    def add(self, record: dict, error: str, batch: int = None):
+        """Write one rejected record with its error."""
+        entry = {
+            'table': self.table,
+            'on_conflict': self.on_conflict,
+            'batch': batch,
+            'error': error,
+            'failed_at': datetime.now().isoformat(timespec='seconds'),
+            'record': record,
+        }
+        line = encode_json(entry) + b'\n'
+        with self._lock:
+            if self._file is None:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, 'ab')
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_dead_letters(path: str) -> list:
+    """Entries of a dead-letter file (a torn final line is skipped)."""
+    entries = []
+    with open(path) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return entries
+
+
+def replay(client, path: str, batch_size: int = 500) -> dict:
+    """
+    Write a dead-letter file's records again, table by table.
+
+    Records that still fail (rejected, or in a batch that failed after all
+    retries) are written to <path>.tmp, which replaces the file once every
+    table has been replayed. Until then the original file is left as it
+    was, so a crash loses nothing.
+
+    Raises:
+        ValueError: The file holds rejects of a staged reload (staging
+                    tables are refilled by rerunning the reload)
+
+    Returns:
+        dict: {table: write_records() statistics}
+    """
+    from importer_core import STAGING_SUFFIX, write_records
+
+    groups = defaultdict(list)
+    for entry in read_dead_letters(path):
+        groups[(entry['table'], entry.get('on_conflict'))].append(entry['record'])
+
+    staged = sorted({table for table, _ in groups if table.endswith(STAGING_SUFFIX)})
+    if staged:
+        raise ValueError(f"{path} holds rejects of a staged reload ({', '.join(staged)}); "
+                         f"fix the input and rerun the reload instead of replaying")
+
+    pending = path + '.tmp'
+    if os.path.exists(pending):
+        os.remove(pending)
+
+    results = {}
+    still_failing = 0
+    for (table, on_conflict), records in groups.items():
+        print(f"  🔁 Replaying {len(records):,} records into {table}")
+        dead_letter = DeadLetterFile(pending, table, on_conflict, fresh=False)
+        results[table] = write_records(client, table, records, batch_size, on_conflict=on_conflict,
+                                       dead_letter=dead_letter)
+        dead_letter.close()
+        still_failing += dead_letter.count
+
+    if still_failing:
+        os.replace(pending, path)
+    else:
+        os.remove(path)
+    return results
+
+
+def main():
+    from importer_core import get_client, print_header, print_step
+
+    parser = argparse.ArgumentParser(description="Replay the records of a dead-letter file.")
+    parser.add_argument('path', help="Dead-letter file (logs/*.rejected.jsonl)")
+    parser.add_argument('--batch-size', type=int, default=500, help="Records per request (default: 500)")
+    parser.add_argument('--dry-run', action='store_true', help="Only summarize the rejected records")
+    args = parser.parse_args()
+
+    print_header("DEAD-LETTER REPLAY")
+    try:
+        entries = read_dead_letters(args.path)
+    except FileNotFoundError:
+        print(f"❌ Error: File not found: {args.path}")
+        return
+
+    errors = defaultdict(int)
+    for entry in entries:
+        errors[(entry['table'], entry['error'])] += 1
+    print(f"{len(entries):,} rejected records in {args.path}")
+    for (table, error), count in sorted(errors.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {count:>6,}  {table}: {error[:120]}")
+    if args.dry_run or not entries:
+        return
+
+    print_step("🔐 Initializing Supabase connection...")
+    try:
+        client = get_client()
+    except ValueError as e:
+        print(f"  ❌ Error: {e}")
+        return
+
+    try:
+        results = replay(client, args.path, args.batch_size)
+    except ValueError as e:
+        print(f"  ❌ Error: {e}")
+        return
+    inserted = sum(stats['inserted'] for stats in results.values())
+    rejected = sum(stats['errors'] for stats in results.values())
+    print_header("✅ REPLAY COMPLETE!" if not rejected else "⚠️  REPLAY FINISHED WITH REJECTED RECORDS")
+    print(f"Written: {inserted:,}")
+    if rejected:
+        print(f"Still rejected: {rejected:,} (left in the dead-letter file)")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,65 +5,262 @@ Import Capability Data (LONG Format) to Supabase
 Loads capability_demo.csv directly into capability_scores table.
 Assigns company_id deterministically based on respondent_id hash.
 
-Requires environment variables:
+Requires environment variables (or .env.local):
   NEXT_PUBLIC_SUPABASE_URL
-  NEXT_PUBLIC_SUPABASE_ANON_KEY
+  SUPABASE_SERVICE_ROLE_KEY  (the staging tables and RPCs are service-role only)
+
+Usage:
+  python scripts/import_capability_long_format.py
+  python scripts/import_capability_long_format.py --backend copy
+  python scripts/import_capability_long_format.py --resume
+  python scripts/import_capability_long_format.py --layout compact
+
+Scores are loaded into capability_scores_staging and published to
+capability_scores in one transaction once every batch has committed
+(supabase/migrations/010_staged_reload.sql), so readers see the old scores
+until the new ones are complete. --load-mode delete clears the live table
+first instead.
+
+Scores are upserted and every committed batch is written to a checkpoint
+journal (logs/capability_demo.csv.capability_scores.journal.jsonl). --resume
+keeps the table (or the staged rows) and sends only the records the journal
+does not hold; see import_journal.py.
+
+--backend copy loads over a direct Postgres connection ($SUPABASE_DB_URL or
+--dsn) instead: the clear and a single COPY run in one transaction, so the
+table is replaced atomically (see postgres_copy.py).
+
+--layout compact loads the dictionary-encoded tables of
+supabase/migrations/011_capability_scores_compact.sql instead: dimension and
+construct names go to two lookup tables, each respondent's company and
+*_synthetic metadata is sent once as a profile row, and each score is sent as
+{respondent_id, construct_id, score}. capability_scores_expanded reads them
+back in the capability_scores layout. Its scores and respondent profiles
+are staged the same way and published together in one transaction. Both layouts print the request payload
+per respondent of each, measured on a sample of respondents.
 """
 
+import argparse
 import os
 import sys
+import time
+import numpy as np
 import pandas as pd
-from supabase import create_client, Client
+from supabase import Client
 from datetime import datetime
-import hashlib
+
+from company_assignment import assign_companies
+from dead_letter import DeadLetterFile, dead_letter_path
+from import_journal import ImportJournal, journal_path_for, row_hashes
+from importer_core import (
+    SERVICE_KEY_ENV, begin_staged_load, fetch_company_map, get_client, head_count, print_header, print_step,
+    publish_staged_load, publish_staged_loads, staged_load_missing, staging_table, write_records,
+)
+from postgres_copy import COPY_FORMATS, connect, copy_rows, query_company_mapping
+from supabase_uploader import committed_mask, encode_records, round_decimal
 
 # Configuration
 INPUT_FILE = "data-foundation/capability_demo.csv"
 BATCH_SIZE = 1000
 LOG_DIR = "logs"
 
-# Demo companies for respondent assignment
-DEMO_COMPANIES = ["acme-corp", "tech-innovations", "global-solutions"]
-
-def print_header(text: str):
-    """Print formatted header"""
-    print("=" * 80)
-    print(text)
-    print("=" * 80)
-
-def print_step(text: str):
-    """Print formatted step"""
-    print(f"\n{text}")
+# Upsert conflict target: capability_scores' UNIQUE(company_id, respondent_id, construct_id)
+UPSERT_KEY = 'company_id,respondent_id,construct_id'
+SCORE_DECIMALS = 2  # capability_scores.score is DECIMAL(5,2)
+
+SCORE_COLUMNS = [
+    'respondent_id', 'company_id', 'dimension_id', 'dimension', 'construct_id', 'construct', 'score',
+    'industry_synthetic', 'country_synthetic', 'continent_synthetic', 'role_synthetic',
+]
+
+# Compact layout (migration 011): one profile row per respondent, narrow score rows
+PROFILE_COLUMNS = [
+    'respondent_id', 'company_id',
+    'industry_synthetic', 'country_synthetic', 'continent_synthetic', 'role_synthetic',
+]
+VALUE_COLUMNS = ['respondent_id', 'construct_id', 'score']
+COMPACT_UPSERT_KEY = 'respondent_id,construct_id'
+PROFILE_TABLE = 'capability_respondent_profiles'  # Compact layout; staged and published with the scores
+PAYLOAD_SAMPLE_RESPONDENTS = 1000  # Respondents encoded to compare the layouts' payload sizes
+
+def object_values(df: pd.DataFrame, col: str, rows: np.ndarray) -> list:
+    """Values of col for the selected rows as Python objects, NaN → None."""
+    if col not in df.columns:
+        return [None] * int(rows.sum())
+    values = df[col].to_numpy(dtype=object)[rows]
+    values[pd.isna(values)] = None
+    return values.tolist()
+
+
+def average_duplicate_scores(df: pd.DataFrame) -> tuple:
+    """
+    One row per (respondent, construct), as transform_capability_data.py builds them.
+
+    Duplicate scores are averaged (nulls skipped) and every other column
+    takes the group's first non-null value. Rows keep the order in which
+    their key first appears.
+
+    Returns:
+        tuple: (deduplicated frame, rows merged away)
+    """
+    keys = ['ResponseId_id', 'construct_id']
+    if not df.duplicated(keys).any():
+        return df, 0
+    aggregations = {col: 'mean' if col == 'score' else 'first' for col in df.columns if col not in keys}
+    deduplicated = df.groupby(keys, sort=False, dropna=False).agg(aggregations).reset_index()
+    return deduplicated[df.columns], len(df) - len(deduplicated)
+
+
+def build_score_columns(df: pd.DataFrame, companies: dict) -> tuple:
+    """
+    Prepare capability_scores rows column by column.
+
+    Each respondent is hashed to a company once, rows whose company is not
+    in the database are skipped, and every column is converted in one pass.
+
+    Returns:
+        tuple: (one value list per SCORE_COLUMNS entry, skipped row indices)
+    """
+    company_names = assign_companies(df['ResponseId_id'])
+    company_ids = company_names.map(companies)
+    known = company_ids.notna().to_numpy()
+
+    columns = [
+        df['ResponseId_id'].to_numpy(dtype=object)[known].tolist(),
+        company_ids.to_numpy(dtype=object)[known].tolist(),
+        df['dimension_id'].to_numpy(dtype=np.int64)[known].tolist(),
+        object_values(df, 'dimension', known),
+        df['construct_id'].to_numpy(dtype=np.int64)[known].tolist(),
+        object_values(df, 'construct', known),
+        round_decimal(df['score'].to_numpy(dtype=np.float64)[known], SCORE_DECIMALS).tolist(),
+    ]
+    for col in SCORE_COLUMNS[7:]:
+        columns.append(object_values(df, col, known))
+
+    return columns, df.index[~known].tolist()
+
+
+def lookup_records(df: pd.DataFrame) -> tuple:
+    """
+    capability_dimensions and capability_constructs rows from the input.
+
+    Returns:
+        tuple: (dimension records, construct records), ordered by id
+    """
+    dimensions = df[['dimension_id', 'dimension']].drop_duplicates('dimension_id').sort_values('dimension_id')
+    constructs = (df[['construct_id', 'dimension_id', 'construct']]
+                  .drop_duplicates('construct_id').sort_values('construct_id'))
+    return (
+        [{'dimension_id': int(i), 'dimension': name} for i, name in dimensions.itertuples(index=False)],
+        [{'construct_id': int(i), 'dimension_id': int(d), 'construct': name}
+         for i, d, name in constructs.itertuples(index=False)],
+    )
+
+
+def profile_records(columns: list) -> list:
+    """One capability_respondent_profiles row per respondent, from its first score row."""
+    picks = [SCORE_COLUMNS.index(col) for col in PROFILE_COLUMNS]
+    profiles = {}
+    for values in zip(*(columns[i] for i in picks)):
+        if values[0] not in profiles:
+            profiles[values[0]] = dict(zip(PROFILE_COLUMNS, values))
+    return list(profiles.values())
+
+
+def layout_records(columns: list, layout: str, rows=None) -> list:
+    """
+    Score records for the full (capability_scores) or compact
+    (capability_score_values) layout.
+
+    Args:
+        columns: build_score_columns() value lists
+        layout: 'full' or 'compact'
+        rows: Optional boolean mask selecting records
+    """
+    record_columns = SCORE_COLUMNS if layout == 'full' else VALUE_COLUMNS
+    values = zip(*(columns[SCORE_COLUMNS.index(col)] for col in record_columns))
+    if rows is not None:
+        values = (row for row, send in zip(values, rows) if send)
+    return [dict(zip(record_columns, row)) for row in values]
+
+
+def payload_bytes_per_respondent(columns: list, sample: int = PAYLOAD_SAMPLE_RESPONDENTS) -> dict:
+    """
+    JSON request bytes per respondent in each layout, for the first `sample`
+    respondents. The compact layout counts the profile row and the score rows;
+    its lookup rows are sent once per import and left out.
+
+    Returns:
+        dict: {'respondents', 'full', 'compact', 'saving'} (bytes, saving as a fraction)
+    """
+    respondent_ids = pd.unique(np.asarray(columns[0], dtype=object))[:sample]
+    rows = np.isin(np.asarray(columns[0], dtype=object), respondent_ids)
+    sample_columns = [np.asarray(col, dtype=object)[rows].tolist() for col in columns]
+    full = len(encode_records(layout_records(sample_columns, 'full')))
+    compact = (len(encode_records(profile_records(sample_columns)))
+               + len(encode_records(layout_records(sample_columns, 'compact'))))
+    count = max(len(respondent_ids), 1)
+    return {
+        'respondents': len(respondent_ids),
+        'full': full / count,
+        'compact': compact / count,
+        'saving': 1 - compact / full if full else 0.0,
+    }
 
-def hash_respondent_to_company(respondent_id: str) -> str:
-    """Deterministically assign respondent to company using hash"""
-    hash_value = int(hashlib.md5(respondent_id.encode()).hexdigest(), 16)
-    company_index = hash_value % 3
-    return DEMO_COMPANIES[company_index]
 
 def main():
+    parser = argparse.ArgumentParser(description="Import long-format capability data into capability_scores.")
+    parser.add_argument('--backend', choices=['postgrest', 'copy'], default='postgrest',
+                        help="Load through PostgREST inserts or a direct Postgres COPY (default: postgrest)")
+    parser.add_argument('--copy-format', choices=COPY_FORMATS, default='binary',
+                        help="COPY wire format for --backend copy (default: binary)")
+    parser.add_argument('--dsn', help="Postgres connection string for --backend copy (default: $SUPABASE_DB_URL)")
+    parser.add_argument('--load-mode', choices=['staged', 'delete'], default='staged',
+                        help="PostgREST reloads: fill the staging table and publish it atomically, "
+                             "or clear the live table first (default: staged)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Keep existing scores and skip batches the checkpoint journal records as committed")
+    parser.add_argument('--layout', choices=['full', 'compact'], default='full',
+                        help="Load capability_scores, or the dictionary-encoded tables of migration 011 "
+                             "(default: full)")
+    args = parser.parse_args()
+    if args.resume and args.backend == 'copy':
+        parser.error("--resume applies to --backend postgrest (a COPY load commits all rows or none)")
+    if args.layout == 'compact' and args.backend == 'copy':
+        parser.error("--layout compact applies to --backend postgrest")
+
     print_header("CAPABILITY DATA IMPORT (LONG FORMAT)")
     print(f"Input: {INPUT_FILE}")
+    print(f"Backend: {args.backend}")
+    print(f"Layout: {args.layout}")
     print_header("")
 
-    # Check environment variables
-    print_step("🔐 Initializing Supabase connection...")
-    supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-    supabase_key = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
-
-    if not supabase_url or not supabase_key:
-        print("  ❌ Error: Missing Supabase credentials")
-        sys.exit(1)
+    if args.backend == 'copy':
+        print_step("🔐 Connecting to Postgres...")
+        try:
+            conn = connect(args.dsn)
+        except Exception as e:
+            print(f"  ❌ Error: {e}")
+            sys.exit(1)
+        print("  ✅ Connected to Postgres")
 
-    # Initialize Supabase client
-    supabase: Client = create_client(supabase_url, supabase_key)
-    print("  ✅ Connected to Supabase")
+        print_step("🏢 Fetching company IDs...")
+        companies = query_company_mapping(conn)
+        print(f"  ✅ Found {len(companies)} companies")
+    else:
+        # Initialize Supabase client
+        print_step("🔐 Initializing Supabase connection...")
+        try:
+            supabase: Client = get_client(SERVICE_KEY_ENV)
+        except ValueError as e:
+            print(f"  ❌ Error: {e}")
+            sys.exit(1)
+        print("  ✅ Connected to Supabase")
 
-    # Fetch company IDs
-    print_step("🏢 Fetching company IDs...")
-    companies_response = supabase.table('companies').select('id,name').execute()
-    companies = {c['name']: c['id'] for c in companies_response.data}
-    print(f"  ✅ Found {len(companies)} companies")
+        # Fetch company IDs
+        print_step("🏢 Fetching company IDs...")
+        companies = fetch_company_map(supabase)
+        print(f"  ✅ Found {len(companies)} companies")
 
     # Load capability data
     print_step(f"📂 Loading capability data from {INPUT_FILE}...")
@@ -84,89 +281,179 @@ def main():
     print(f"  Expected rows per respondent: 32")
     print(f"  Actual avg rows per respondent: {len(df) / unique_respondents:.1f}")
 
-    # Clear existing capability scores
-    print_step("🗑️  Clearing existing capability scores...")
-    try:
-        supabase.table('capability_scores').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
-        print("  ✅ Cleared existing data")
-    except Exception as e:
-        print(f"  ⚠️  Warning: {e}")
+    # capability_scores holds one row per (company, respondent, construct):
+    # send each key once, or staging ends up with fewer rows than were sent
+    df, merged = average_duplicate_scores(df)
+    if merged:
+        print(f"  ⚠️  Averaged duplicate scores: {merged:,} rows merged into {len(df):,} "
+              f"(respondent, construct) pairs")
 
     # Prepare insert records
     print_step("📦 Preparing records for import...")
-    insert_records = []
-
-    for idx, row in df.iterrows():
-        # Assign company via hash
-        company_name = hash_respondent_to_company(row['ResponseId_id'])
-        company_id = companies.get(company_name)
-
-        if not company_id:
-            print(f"  ⚠️  Warning: Company {company_name} not found, skipping row {idx}")
-            continue
-
-        insert_data = {
-            'respondent_id': row['ResponseId_id'],
-            'company_id': company_id,
-            'dimension_id': int(row['dimension_id']),
-            'dimension': row['dimension'],
-            'construct_id': int(row['construct_id']),
-            'construct': row['construct'],
-            'score': float(row['score']),
-            'industry_synthetic': row.get('industry_synthetic'),
-            'country_synthetic': row.get('country_synthetic'),
-            'continent_synthetic': row.get('continent_synthetic'),
-            'role_synthetic': row.get('role_synthetic')
-        }
-
-        insert_records.append(insert_data)
-
-    print(f"  ✅ Prepared {len(insert_records):,} records")
-
-    # Insert in batches
-    print_step(f"📤 Importing {len(insert_records):,} records in batches of {BATCH_SIZE}...")
-    total_batches = (len(insert_records) + BATCH_SIZE - 1) // BATCH_SIZE
-    insert_count = 0
-
-    for batch_num in range(total_batches):
-        start_idx = batch_num * BATCH_SIZE
-        end_idx = min(start_idx + BATCH_SIZE, len(insert_records))
-        batch = insert_records[start_idx:end_idx]
-
-        print(f"  Batch {batch_num + 1}/{total_batches}: rows {start_idx + 1:,}-{end_idx:,}...", end=" ", flush=True)
 
+    # Assign companies via hash (each unique respondent hashed once, not 32x)
+    columns, skipped = build_score_columns(df, companies)
+    record_count = len(columns[0])
+    kept = np.setdiff1d(np.arange(len(df)), skipped)  # input row position of each record
+    resumed_count = 0
+
+    if skipped:
+        print(f"  ⚠️  Warning: Company not found for {len(skipped):,} rows, skipping "
+              f"(rows {', '.join(str(idx) for idx in skipped[:10])}{', ...' if len(skipped) > 10 else ''})")
+
+    print(f"  ✅ Prepared {record_count:,} records")
+
+    payload = payload_bytes_per_respondent(columns)
+    print(f"  📏 Payload per respondent ({payload['respondents']:,} sampled): "
+          f"full {payload['full']:,.0f} B, compact {payload['compact']:,.0f} B "
+          f"({payload['saving']:.0%} smaller)")
+
+    started = time.perf_counter()
+    failure = None
+    if args.backend == 'copy':
+        # Clear and load in one transaction: readers see the old or the new scores, never neither
+        print_step(f"📤 Replacing capability scores with {record_count:,} records via COPY ({args.copy_format})...")
+        stats = copy_rows(conn, 'capability_scores', SCORE_COLUMNS, zip(*columns), fmt=args.copy_format,
+                          before="DELETE FROM capability_scores", total_rows=record_count)
+        insert_count = stats['inserted']
+    else:
+        table = 'capability_scores' if args.layout == 'full' else 'capability_score_values'
+        upsert_key = UPSERT_KEY if args.layout == 'full' else COMPACT_UPSERT_KEY
+        journal_path = journal_path_for(INPUT_FILE, table)
+        journal = ImportJournal(journal_path, row_hashes(df), resume=args.resume)
+        print(f"  📒 Checkpoint journal: {journal_path}")
+
+        # Staged (default): load into <table>_staging and publish it in one
+        # transaction at the end, so the dashboards never see a partial table.
+        # The compact layout stages its respondent profiles too and publishes
+        # them together with the scores.
+        target = table
+        profile_target = PROFILE_TABLE
+        profiles = []
+        if args.layout == 'compact':
+            # The lookups are the fixed construct catalogue: upserting them live is a no-op
+            # for readers, and the profile and score rows reference them
+            print_step("📚 Upserting lookups...")
+            dimensions, constructs = lookup_records(df)
+            profiles = profile_records(columns)
+            write_records(supabase, 'capability_dimensions', dimensions, on_conflict='dimension_id')
+            write_records(supabase, 'capability_constructs', constructs, on_conflict='construct_id')
+            print(f"  ✅ {len(dimensions)} dimensions, {len(constructs)} constructs")
+
+        if args.resume:
+            print(f"  ⏭️  Resuming: {journal.verified_batches:,} committed batches "
+                  f"({journal.stale_batches:,} changed since)")
+            if args.load_mode == 'staged':
+                target = staging_table(table)
+                if args.layout == 'compact':
+                    # Profiles are not journaled; they are restaged in full
+                    profile_target = begin_staged_load(supabase, PROFILE_TABLE)
+        elif args.load_mode == 'staged':
+            print_step("🧺 Emptying staging table...")
+            try:
+                target = begin_staged_load(supabase, table)
+                if args.layout == 'compact':
+                    profile_target = begin_staged_load(supabase, PROFILE_TABLE)
+                print(f"  ✅ Loading into {target}{f' and {profile_target}' if args.layout == 'compact' else ''}")
+            except Exception as e:
+                if not staged_load_missing(e):
+                    raise
+                print(f"  ⚠️  Staged reload unavailable ({e}); apply migration 010_staged_reload.sql. "
+                      f"Falling back to clearing the live table.")
+                args.load_mode = 'delete'
+
+        if not args.resume and args.load_mode == 'delete':
+            # Clear the existing scores (PostgREST refuses a DELETE without a filter)
+            print_step(f"🗑️  Clearing existing {table}...")
+            try:
+                query = supabase.table(table).delete()
+                if args.layout == 'full':
+                    query = query.neq('id', '00000000-0000-0000-0000-000000000000')
+                else:
+                    query = query.gte('construct_id', 0)
+                query.execute()
+                if args.layout == 'compact':
+                    # Profiles of respondents no longer in the input go too
+                    supabase.table(PROFILE_TABLE).delete().neq('respondent_id', '').execute()
+                print("  ✅ Cleared existing data")
+            except Exception as e:
+                print(f"  ⚠️  Warning: {e}")
+
+        profile_errors = 0
+        if profiles:
+            # Before the scores, which reference them
+            print_step(f"👤 Writing {len(profiles):,} respondent profiles to {profile_target}...")
+            profile_stats = write_records(supabase, profile_target, profiles, BATCH_SIZE,
+                                          on_conflict='respondent_id')
+            profile_errors = profile_stats['errors']
+            print(f"  ✅ {profile_stats['inserted']:,} / {len(profiles):,} profiles")
+
+        # Only records the journal does not hold as committed
+        pending = ~journal.committed[kept]
+        positions = kept[pending]
+        resumed_count = record_count - len(positions)
+        insert_records = layout_records(columns, args.layout, pending)
+
+        # Upsert in batches
+        print_step(f"📤 Importing {len(insert_records):,} records into {target} in batches of {BATCH_SIZE}"
+                   f"{f' ({resumed_count:,} already committed)' if resumed_count else ''}...")
+
+        def on_result(result):
+            if result['committed']:
+                journal.record(positions[result['batch']['index'][committed_mask(result)]])
+
+        dead_letter = DeadLetterFile(dead_letter_path(target, INPUT_FILE), target, upsert_key)
         try:
-            response = supabase.table('capability_scores').insert(batch).execute()
-            inserted = len(response.data)
-            insert_count += inserted
-            print(f"✅ {inserted} rows")
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            # Continue with next batch
-            continue
-
-    print(f"\n  ✅ Inserted {insert_count:,} / {len(insert_records):,} records")
+            stats = write_records(supabase, target, insert_records, BATCH_SIZE,
+                                  on_conflict=upsert_key, on_result=on_result, dead_letter=dead_letter)
+        finally:
+            journal.close()
+        insert_count = stats['inserted']
+
+        if args.load_mode == 'staged':
+            live = f"{table}{f' and {PROFILE_TABLE}' if profiles else ''}"
+            if stats['errors'] or profile_errors:
+                failure = f"{stats['errors'] + profile_errors:,} records failed; {live} left unchanged"
+                print(f"\n  ⚠️  {failure}. Rerun with --resume to finish the staged load.")
+            else:
+                print_step("🔁 Publishing staged scores...")
+                try:
+                    # Every record is a distinct key, so staging must hold all of them
+                    if profiles:
+                        published = publish_staged_loads(supabase, {PROFILE_TABLE: len(profiles),
+                                                                    table: record_count})[table]
+                    else:
+                        published = publish_staged_load(supabase, table, record_count)
+                    journal.discard()  # staging is empty again; nothing left to resume
+                    print(f"  ✅ Published {published:,} records to {live}")
+                except Exception as e:
+                    failure = f"Publish failed, {live} left unchanged: {e}"
+                    print(f"  ❌ {failure}")
+
+    elapsed = time.perf_counter() - started
+    rows_per_second = insert_count / elapsed if elapsed else 0.0
+    print(f"\n  ✅ Inserted {insert_count:,} / {record_count - resumed_count:,} records ({rows_per_second:,.0f} rows/s)")
+    expected_count = resumed_count + insert_count
 
     # Verify import
     print_step("🔍 Verifying import...")
-    count_response = supabase.table('capability_scores').select('id', count='exact').execute()
-    actual_count = count_response.count
+    if args.backend == 'copy':
+        actual_count = conn.execute("SELECT COUNT(*) FROM capability_scores").fetchone()[0]
+        conn.close()
+    else:
+        actual_count = head_count(supabase, table)
 
-    print(f"  Expected: {insert_count:,}")
+    print(f"  Expected: {expected_count:,}")
     print(f"  Actual in database: {actual_count:,}")
 
-    if actual_count == insert_count:
+    if actual_count == expected_count:
         print(f"  Match: ✅")
     else:
         print(f"  Mismatch: ⚠️")
 
     # Company distribution
     print_step("📊 Company distribution:")
-    company_counts = {}
-    for record in insert_records:
-        company_id = record['company_id']
-        company_name = [name for name, uuid in companies.items() if uuid == company_id][0]
-        company_counts[company_name] = company_counts.get(company_name, 0) + 1
+    company_counts = companies.names(columns[1]).value_counts().to_dict()
 
     for company_name, count in sorted(company_counts.items()):
         respondent_count = count // 32  # Each respondent has 32 constructs
@@ -180,17 +467,31 @@ def main():
         f.write(f"=" * 80 + "\n\n")
         f.write(f"Input file: {INPUT_FILE}\n")
         f.write(f"Total rows: {len(df):,}\n")
+        f.write(f"Backend: {args.backend}{f' ({args.copy_format})' if args.backend == 'copy' else ''}\n")
+        f.write(f"Layout: {args.layout}\n")
+        f.write(f"Payload per respondent: full {payload['full']:,.0f} B, compact {payload['compact']:,.0f} B "
+                f"({payload['saving']:.0%} smaller, {payload['respondents']:,} respondents sampled)\n")
         f.write(f"Records inserted: {insert_count:,}\n")
+        f.write(f"Already committed (resumed): {resumed_count:,}\n")
+        f.write(f"Throughput: {rows_per_second:,.0f} rows/s\n")
         f.write(f"Database count: {actual_count:,}\n")
         f.write(f"\nCompany Distribution:\n")
         for company_name, count in sorted(company_counts.items()):
             f.write(f"  {company_name}: {count:,} scores\n")
-        f.write(f"\nStatus: {'SUCCESS' if actual_count == insert_count else 'PARTIAL'}\n")
+        f.write(f"\nStatus: {'FAILED' if failure else 'SUCCESS' if actual_count == expected_count else 'PARTIAL'}\n")
+        if failure:
+            f.write(f"Failure: {failure}\n")
 
     print_step(f"📄 Import log saved to: {log_file}")
 
+    if failure:
+        print_header("❌ IMPORT FAILED")
+        print(failure)
+        print(f"Log file: {log_file}")
+        sys.exit(1)
+
     print_header("✅ IMPORT COMPLETE!")
-    print(f"Loaded: {insert_count:,} / {len(insert_records):,} capability scores")
+    print(f"Loaded: {expected_count:,} / {record_count:,} capability scores")
     print(f"Database count: {actual_count:,}")
     print(f"Log file: {log_file}")
     print(f"\nNext steps:")
@@ -11,41 +11,87 @@ Version: 1.0 (Web Summit MVP)
 
 Prerequisites:
     - Run transform_capability_data.py first
-    - Supabase credentials in environment variables:
+    - Supabase credentials in environment variables (or .env.local):
         NEXT_PUBLIC_SUPABASE_URL
         NEXT_PUBLIC_SUPABASE_ANON_KEY
 
 Usage:
     python scripts/import_capability_wide.py
+    python scripts/import_capability_wide.py --input data-foundation/capability_demo_wide.parquet
+    python scripts/import_capability_wide.py --workers 8 --batch-size 1000
+    python scripts/import_capability_wide.py --backend copy --copy-format csv
+    python scripts/import_capability_wide.py --resume
+
+    Parquet/Arrow inputs (transform_capability_data.py --format ...) are
+    memory-mapped instead of parsed as CSV.
+
+    Batches are uploaded concurrently (--workers) while the next one is
+    prepared, start at --batch-size rows and adapt to payload size and
+    latency. Transient failures are retried with backoff, honouring
+    Retry-After. The default http transport POSTs to
+    $NEXT_PUBLIC_SUPABASE_URL/rest/v1/respondents, so pointing that variable
+    at a local PostgREST-compatible server measures throughput offline.
+    Scores are rounded to the stored DECIMAL(5,2) precision before encoding
+    (orjson when installed), and http bodies are gzipped unless the server
+    refuses them (--no-compress turns that off). Encode time, JSON size and
+    bytes on the wire are logged.
+
+    Rows are upserted on (company_id, respondent_id) and each committed batch
+    is written to a checkpoint journal (logs/<input>.respondents.journal.jsonl).
+    After a crash or failed batches, --resume sends only the rows the journal
+    does not hold; see import_journal.py.
+
+    A batch the server rejects is bisected so its good rows are still
+    written. The rows that fail on their own are logged with their error in
+    logs/<input>.respondents.rejected.jsonl; fix them and replay that file
+    with dead_letter.py.
+
+    --backend copy skips PostgREST and streams all rows through one Postgres
+    COPY over $SUPABASE_DB_URL (or --dsn) in a single transaction; see
+    postgres_copy.py. Both paths report rows/s in the log.
 """
 
+import argparse
+import numpy as np
 import pandas as pd
-import os
-from supabase import create_client, Client
+from supabase import Client
 from pathlib import Path
 from datetime import datetime
 
+from dead_letter import DeadLetterFile, dead_letter_path
+from importer_core import fetch_company_map, get_client, head_count, rest_transport
+from postgres_copy import COPY_FORMATS, connect, copy_rows, query_company_mapping
+from score_reshape import CONSTRUCTS
+from import_journal import ImportJournal, journal_path_for, row_hashes
+from supabase_uploader import BatchSizer, SupabaseTransport, committed_mask, round_decimal, upload_dataframe
+from wide_format_io import read_wide
+
 # Configuration
 INPUT_FILE = "data-foundation/capability_demo_wide.csv"
-BATCH_SIZE = 500  # Insert in batches to avoid timeout
+BATCH_SIZE = 500  # Initial batch size; adapted to payload size and latency
+UPLOAD_WORKERS = 4  # Concurrent insert requests
 LOG_FILE = "logs/import_log.txt"
 
 # Company name to ID mapping (will be fetched from database)
 COMPANY_MAPPING = {}
 
+CONSTRUCT_COLUMNS = CONSTRUCTS.columns
+SCORE_DECIMALS = 2  # respondents.construct_N are DECIMAL(5,2) (migration 003)
 
-def initialize_supabase() -> Client:
-    """Initialize Supabase client."""
-    url = os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
-    key = os.environ.get("NEXT_PUBLIC_SUPABASE_ANON_KEY")
-
-    if not url or not key:
-        raise ValueError(
-            "Missing Supabase credentials. Set NEXT_PUBLIC_SUPABASE_URL and "
-            "NEXT_PUBLIC_SUPABASE_ANON_KEY environment variables."
-        )
+# Upsert conflict target: respondents' UNIQUE(company_id, respondent_id). The
+# company is a pure function of respondent_id, so this keys on respondent_id.
+UPSERT_KEY = 'company_id,respondent_id'
 
-    return create_client(url, key)
+# Insert payload layout: respondents column → source column (None = always NULL)
+RECORD_FIELDS = {
+    'region': 'region',
+    'department': None,  # Capability data doesn't have department
+    'employment_type': 'employment_type',
+    'age': None,  # Capability data doesn't have age
+    'user_language': None,  # Capability data doesn't have language
+    'industry': 'industry',
+    'continent': 'continent',
+}
 
 
 def fetch_company_mapping(supabase: Client) -> dict:
@@ -53,16 +99,11 @@ def fetch_company_mapping(supabase: Client) -> dict:
     Fetch company name to UUID mapping from database.
 
     Returns:
-        dict: {company_name: company_uuid}
+        CompanyMap: {company_name: company_uuid}
     """
     print("🏢 Fetching company IDs from database...")
 
-    response = supabase.table('companies').select('id,name').execute()
-
-    if not response.data:
-        raise ValueError("No companies found in database. Run demo schema migration first.")
-
-    mapping = {company['name']: company['id'] for company in response.data}
+    mapping = fetch_company_map(supabase)
 
     print(f"  ✅ Found {len(mapping)} companies:")
     for name, uuid in mapping.items():
@@ -71,194 +112,328 @@ def fetch_company_mapping(supabase: Client) -> dict:
     return mapping
 
 
-def prepare_row_for_insert(row: pd.Series, company_mapping: dict) -> dict:
+def object_column(df: pd.DataFrame, col: str, rows: np.ndarray) -> list:
+    """Values of col for the selected rows as Python objects, NaN → None."""
+    if col not in df.columns:
+        return [None] * int(rows.sum())
+    values = df[col].to_numpy(dtype=object)[rows]
+    values[pd.isna(values)] = None
+    return values.tolist()
+
+
+def build_insert_columns(df: pd.DataFrame, company_mapping: dict) -> tuple:
     """
-    Prepare a single row for database insertion.
+    Prepare a whole batch for database insertion at once, column by column.
+
+    Company names are factorized and mapped to UUIDs once per distinct
+    name, rows with unknown companies are split out in bulk, and the
+    construct matrix is rounded to SCORE_DECIMALS (what the database stores
+    anyway) and converted with one vectorized NaN → None pass. Missing
+    metadata values become None as well (float NaN is not valid JSON).
 
     Args:
-        row: Pandas Series representing one respondent
+        df: Wide-format batch
         company_mapping: Dict mapping company names to UUIDs
 
     Returns:
-        dict: Row data formatted for Supabase insert
+        tuple: (column names, one value list per column,
+                error details for rows with unknown companies)
     """
-    # Map company name to UUID
-    company_id = company_mapping.get(row['company_name'])
-
-    if not company_id:
-        raise ValueError(f"Unknown company: {row['company_name']}")
-
-    # Build insert data
-    insert_data = {
-        'company_id': company_id,
-        'respondent_id': row['respondent_id'],
-        'region': row.get('region'),
-        'department': None,  # Capability data doesn't have department
-        'employment_type': row.get('employment_type'),
-        'age': None,  # Capability data doesn't have age
-        'user_language': None,  # Capability data doesn't have language
-        'industry': row.get('industry'),
-        'continent': row.get('continent'),
-    }
-
-    # Add all 32 construct scores
-    for i in range(1, 33):
-        col_name = f'construct_{i}'
-        value = row.get(col_name)
+    codes, names = pd.factorize(df['company_name'])
+    uuids = np.array([company_mapping.get(name) for name in names] + [None], dtype=object)
+    known_name = np.array([bool(uuid) for uuid in uuids])
+    known = known_name[codes]
+
+    rejected = []
+    if not known.all():
+        unknown_ids = df['respondent_id'].to_numpy(dtype=object)[~known]
+        unknown_names = df['company_name'].to_numpy(dtype=object)[~known]
+        rejected = [
+            {'respondent_id': respondent_id, 'error': f"Unknown company: {name}"}
+            for respondent_id, name in zip(unknown_ids.tolist(), unknown_names.tolist())
+        ]
+
+    n_rows = int(known.sum())
+    columns = [
+        uuids[codes][known].tolist(),
+        df['respondent_id'].to_numpy(dtype=object)[known].tolist(),
+    ]
+    for source in RECORD_FIELDS.values():
+        columns.append(object_column(df, source, known) if source else [None] * n_rows)
 
-        # Convert NaN to None for database insertion
-        if pd.isna(value):
-            insert_data[col_name] = None
-        else:
-            insert_data[col_name] = float(value)
+    present = [col for col in CONSTRUCT_COLUMNS if col in df.columns]
+    scores = round_decimal(df[present].to_numpy(dtype=np.float64)[known], SCORE_DECIMALS)
+    score_values = scores.astype(object)
+    score_values[np.isnan(scores)] = None
+    score_columns = dict(zip(present, score_values.T.tolist()))
+    for col in CONSTRUCT_COLUMNS:
+        columns.append(score_columns.get(col, [None] * n_rows))
 
-    return insert_data
+    keys = ['company_id', 'respondent_id'] + list(RECORD_FIELDS) + CONSTRUCT_COLUMNS
+    return keys, columns, rejected
 
 
-def import_in_batches(supabase: Client, df: pd.DataFrame, company_mapping: dict) -> dict:
+def build_insert_records(df: pd.DataFrame, company_mapping: dict) -> tuple:
     """
-    Import data in batches to avoid timeouts.
+    Insert records (one dict per row) for a batch; see build_insert_columns().
 
     Returns:
-        dict: Import statistics
+        tuple: (insert records, error details for rows with unknown companies)
     """
-    total_rows = len(df)
-    batches = (total_rows // BATCH_SIZE) + 1
-
-    stats = {
-        'total_rows': total_rows,
-        'inserted': 0,
-        'errors': 0,
-        'error_details': []
-    }
+    keys, columns, rejected = build_insert_columns(df, company_mapping)
+    records = [dict(zip(keys, values)) for values in zip(*columns)]
+    return records, rejected
 
-    print(f"\n📤 Importing {total_rows:,} respondents in {batches} batches...")
 
-    for batch_num in range(batches):
-        start_idx = batch_num * BATCH_SIZE
-        end_idx = min((batch_num + 1) * BATCH_SIZE, total_rows)
+def create_transport(kind: str, supabase: Client, compress: bool = True):
+    """
+    Uploader transport for the respondents table ('http' or 'supabase'), upserting on UPSERT_KEY.
 
-        batch_df = df.iloc[start_idx:end_idx]
+    Both share the client's keep-alive connection pool (importer_core.get_client).
+    Only the http transport can gzip request bodies.
+    """
+    if kind == 'supabase':
+        return SupabaseTransport(supabase, 'respondents', on_conflict=UPSERT_KEY)
+    return rest_transport(supabase, 'respondents', on_conflict=UPSERT_KEY, compress=compress)
 
-        print(f"  Batch {batch_num + 1}/{batches}: rows {start_idx+1}-{end_idx}... ", end='')
 
-        # Prepare batch data
-        batch_data = []
-        for _, row in batch_df.iterrows():
-            try:
-                batch_data.append(prepare_row_for_insert(row, company_mapping))
-            except Exception as e:
-                stats['errors'] += 1
-                stats['error_details'].append({
-                    'respondent_id': row.get('respondent_id', 'unknown'),
-                    'error': str(e)
-                })
-                continue
+def import_in_batches(transport, df: pd.DataFrame, company_mapping: dict,
+                      workers: int = UPLOAD_WORKERS, batch_size: int = BATCH_SIZE,
+                      journal: ImportJournal = None, name: str = None,
+                      dead_letter: DeadLetterFile = None) -> dict:
+    """
+    Import data in concurrent, adaptively sized batches.
 
-        # Insert batch
-        try:
-            response = supabase.table('respondents').insert(batch_data).execute()
-            stats['inserted'] += len(batch_data)
-            print(f"✅ {len(batch_data)} rows")
-        except Exception as e:
-            stats['errors'] += len(batch_data)
-            print(f"❌ Error: {str(e)}")
-            stats['error_details'].append({
-                'batch': batch_num + 1,
-                'error': str(e)
-            })
+    The next batch is built while earlier ones upload; transient failures are
+    retried with backoff (see supabase_uploader.py).
+
+    With a journal, rows it already holds are skipped and every committed
+    batch is journaled (only the rows actually sent, not rows rejected for
+    an unknown company, nor rows the server rejected). name labels the
+    progress lines (import_tenants.py runs one import per company at once).
+    Rejected rows go to dead_letter, if given.
+
+    Returns:
+        dict: Import statistics ('resumed_rows' counts rows skipped as already committed)
+    """
+    on_result = None
+    pending_df = df
+    if journal is not None:
+        pending_df = df.iloc[journal.pending()]
+        sendable = df['company_name'].map(company_mapping).notna().to_numpy()
+
+        def on_result(result):
+            if result['committed']:
+                index = result['batch']['index']
+                journal.record(index[sendable[index]][committed_mask(result)])
+
+    label = f"[{name}] " if name else ""
+    resumed_rows = len(df) - len(pending_df)
+    if resumed_rows:
+        print(f"\n⏭️  {label}Resuming: {resumed_rows:,} rows already committed, {len(pending_df):,} to go")
+
+    print(f"\n📤 {label}Importing {len(pending_df):,} respondents "
+          f"({workers} workers, batches start at {batch_size} rows)...")
+
+    stats = upload_dataframe(
+        pending_df,
+        lambda batch_df: build_insert_records(batch_df, company_mapping),
+        transport,
+        workers=workers,
+        sizer=BatchSizer(initial_rows=batch_size),
+        on_result=on_result,
+        name=name,
+        dead_letter=dead_letter,
+    )
+    stats['total_rows'] = len(df)
+    stats['resumed_rows'] = resumed_rows
+    return stats
+
+
+def import_with_copy(conn, df: pd.DataFrame, company_mapping: dict, fmt: str = 'binary') -> dict:
+    """
+    Import data with one Postgres COPY (see postgres_copy.py).
+
+    Rows get the same company mapping and validation as the PostgREST path
+    (build_insert_columns); rows with unknown companies are reported as
+    errors and the rest are loaded in a single transaction.
+
+    Returns:
+        dict: Import statistics
+    """
+    print(f"\n📤 Importing {len(df):,} respondents with COPY ({fmt})...")
 
+    keys, columns, rejected = build_insert_columns(df, company_mapping)
+    stats = copy_rows(conn, 'respondents', keys, zip(*columns), fmt=fmt,
+                      total_rows=len(df) - len(rejected))
+
+    stats['total_rows'] = len(df)
+    stats['errors'] += len(rejected)
+    stats['error_details'] = rejected + stats['error_details']
     return stats
 
 
-def verify_import(supabase: Client, expected_count: int) -> dict:
+def fetch_construct_stats(supabase: Client) -> dict:
+    """
+    Per-construct statistics computed in the database.
+
+    Calls the capability_construct_stats() RPC (supabase/migrations/
+    009_capability_verification_rpc.sql), which returns one row per construct.
+
+    Returns:
+        dict: {construct: {'min', 'max', 'mean', 'null_count', 'count'}}
+    """
+    response = supabase.rpc('capability_construct_stats', {}).execute()
+
+    def number(value):
+        return float(value) if value is not None else None
+
+    return {
+        row['construct']: {
+            'min': number(row['min_score']),
+            'max': number(row['max_score']),
+            'mean': number(row['mean_score']),
+            'null_count': row['null_count'],
+            'count': row['respondents'],
+        }
+        for row in response.data
+    }
+
+
+def verify_import(supabase: Client, expected_count: int, company_mapping: dict) -> dict:
     """
     Verify imported data in database.
 
+    Counts are HEAD requests (total and one per company) and score
+    statistics come from a server-side aggregate, so no respondent rows
+    are downloaded and PostgREST's row limit cannot truncate the result.
+
+    Args:
+        supabase: Supabase client
+        expected_count: Rows in the input file
+        company_mapping: {company_name: company_uuid}
+
     Returns:
         dict: Verification results
     """
     print("\n🔍 Verifying import...")
 
-    # Count total respondents with capability data
-    response = supabase.table('respondents')\
-        .select('*', count='exact')\
-        .not_.is_('construct_1', 'null')\
-        .execute()
+    capability_filter = {'construct_1': 'not.is.null'}
 
-    actual_count = response.count if hasattr(response, 'count') else len(response.data)
+    # Count total respondents with capability data
+    actual_count = head_count(supabase, 'respondents', capability_filter)
 
     # Get company distribution
-    response_all = supabase.table('respondents')\
-        .select('company_id')\
-        .not_.is_('construct_1', 'null')\
-        .execute()
-
     company_distribution = {}
-    for row in response_all.data:
-        company_id = row['company_id']
-        company_distribution[company_id] = company_distribution.get(company_id, 0) + 1
-
-    # Get score ranges
-    response_scores = supabase.table('respondents')\
-        .select('construct_1,construct_16,construct_32')\
-        .not_.is_('construct_1', 'null')\
-        .limit(1000)\
-        .execute()
-
-    score_stats = {
-        'construct_1': [],
-        'construct_16': [],
-        'construct_32': []
+    for company_id in company_mapping.values():
+        count = head_count(supabase, 'respondents', {**capability_filter, 'company_id': f'eq.{company_id}'})
+        if count:
+            company_distribution[company_id] = count
+
+    # Get score statistics
+    try:
+        score_ranges = fetch_construct_stats(supabase)
+    except Exception as e:
+        print(f"  ⚠️  Score statistics unavailable ({e}); apply migration 009_capability_verification_rpc.sql")
+        score_ranges = {}
+
+    verification = {
+        'expected_count': expected_count,
+        'actual_count': actual_count,
+        'match': actual_count == expected_count,
+        'company_distribution': company_distribution,
+        'score_ranges': score_ranges
     }
 
-    for row in response_scores.data:
-        for col in score_stats.keys():
-            if row.get(col) is not None:
-                score_stats[col].append(float(row[col]))
+    print_verification(verification)
+    return verification
+
+
+def verify_import_postgres(conn, expected_count: int, company_mapping: dict) -> dict:
+    """
+    Verify imported data over a direct Postgres connection (copy backend).
+
+    Same checks and result layout as verify_import(): one grouped count
+    and the capability_construct_stats() aggregate, computed in the database.
+
+    Returns:
+        dict: Verification results
+    """
+    print("\n🔍 Verifying import...")
+
+    counts = dict(conn.execute(
+        "SELECT company_id::text, COUNT(*) FROM respondents "
+        "WHERE construct_1 IS NOT NULL GROUP BY company_id"
+    ).fetchall())
+    actual_count = sum(counts.values())
+    company_distribution = {
+        company_id: counts[company_id] for company_id in company_mapping.values() if counts.get(company_id)
+    }
+
+    rows = conn.execute("SELECT * FROM capability_construct_stats()").fetchall()
+    score_ranges = {
+        construct: {
+            'min': float(min_score) if min_score is not None else None,
+            'max': float(max_score) if max_score is not None else None,
+            'mean': float(mean_score) if mean_score is not None else None,
+            'null_count': null_count,
+            'count': respondents,
+        }
+        for construct, respondents, null_count, min_score, max_score, mean_score in rows
+    }
 
     verification = {
         'expected_count': expected_count,
         'actual_count': actual_count,
         'match': actual_count == expected_count,
         'company_distribution': company_distribution,
-        'score_ranges': {}
+        'score_ranges': score_ranges
     }
 
-    for col, values in score_stats.items():
-        if values:
-            verification['score_ranges'][col] = {
-                'min': min(values),
-                'max': max(values),
-                'mean': sum(values) / len(values),
-                'sample_size': len(values)
-            }
-
-    print(f"  Expected respondents: {expected_count:,}")
-    print(f"  Actual respondents: {actual_count:,}")
+    print_verification(verification)
+    return verification
+
+
+def print_verification(verification: dict):
+    """Print verification counts and the company distribution."""
+    print(f"  Expected respondents: {verification['expected_count']:,}")
+    print(f"  Actual respondents: {verification['actual_count']:,}")
     print(f"  Match: {'✅' if verification['match'] else '❌'}")
 
     print(f"\n  Company distribution:")
-    for company_id, count in company_distribution.items():
+    for company_id, count in verification['company_distribution'].items():
         print(f"    {company_id}: {count:,}")
 
-    return verification
 
+def payload_size(bytes_sent) -> str:
+    """Payload size for the log (binary COPY does not report one)."""
+    return f"{bytes_sent / 2**20:.1f} MiB" if bytes_sent is not None else "n/a"
 
-def generate_log(stats: dict, verification: dict, log_path: str):
+
+def generate_log(stats: dict, verification: dict, log_path: str, input_file: str = INPUT_FILE,
+                 backend: str = 'postgrest'):
     """Generate import log file."""
     log_lines = [
         "=" * 80,
         "CAPABILITY DATA IMPORT LOG",
         "=" * 80,
         f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-        f"Input file: {INPUT_FILE}",
+        f"Input file: {input_file}",
+        f"Backend: {backend}",
         "",
         "IMPORT STATISTICS",
         "-" * 80,
         f"Total rows processed: {stats['total_rows']:,}",
         f"Successfully inserted: {stats['inserted']:,}",
+        f"Already committed (resumed): {stats.get('resumed_rows', 0):,}",
         f"Errors encountered: {stats['errors']}",
+        f"Batches: {stats['batches']:,} ({stats['retries']:,} retries)",
+        *([f"Rejected rows isolated: {stats['rejected_records']:,} "
+           f"({stats['isolation_requests']:,} bisection requests)"] if stats.get('rejected_records') else []),
+        f"Payload sent: {payload_size(stats['bytes_sent'])}"
+        + (f" ({payload_size(stats['payload_bytes'])} JSON, encoded in {stats['encode_seconds']:.2f}s)"
+           if 'payload_bytes' in stats else ""),
+        f"Elapsed: {stats['elapsed_seconds']:.1f}s ({stats['rows_per_second']:,.0f} rows/s)",
         "",
         "VERIFICATION RESULTS",
         "-" * 80,
@@ -275,14 +450,17 @@ def generate_log(stats: dict, verification: dict, log_path: str):
 
     log_lines.extend([
         "",
-        "SCORE RANGES (Sample)",
+        "SCORE RANGES",
         "-" * 80,
     ])
 
+    def score(value):
+        return f"{value:.2f}" if value is not None else "n/a"
+
     for col, ranges in verification['score_ranges'].items():
         log_lines.append(
-            f"{col}: min={ranges['min']:.2f}, max={ranges['max']:.2f}, "
-            f"mean={ranges['mean']:.2f} (n={ranges['sample_size']})"
+            f"{col}: min={score(ranges['min'])}, max={score(ranges['max'])}, "
+            f"mean={score(ranges['mean'])} (n={ranges['count']:,}, nulls={ranges['null_count']:,})"
         )
 
     if stats['error_details']:
@@ -311,45 +489,99 @@ def generate_log(stats: dict, verification: dict, log_path: str):
 
 def main():
     """Main import pipeline."""
+    parser = argparse.ArgumentParser(description="Import wide-format capability data into Supabase.")
+    parser.add_argument('--input', default=INPUT_FILE,
+                        help=f"Wide-format .csv, .parquet or .arrow (default: {INPUT_FILE})")
+    parser.add_argument('--workers', type=int, default=UPLOAD_WORKERS,
+                        help=f"Concurrent insert requests (default: {UPLOAD_WORKERS})")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"Initial rows per batch (default: {BATCH_SIZE})")
+    parser.add_argument('--transport', choices=['http', 'supabase'], default='http',
+                        help="Insert via direct PostgREST HTTP (honours Retry-After) or supabase-py (default: http)")
+    parser.add_argument('--no-compress', action='store_true',
+                        help="Send http batches as plain JSON instead of gzip")
+    parser.add_argument('--backend', choices=['postgrest', 'copy'], default='postgrest',
+                        help="Load through PostgREST inserts or a direct Postgres COPY (default: postgrest)")
+    parser.add_argument('--copy-format', choices=COPY_FORMATS, default='binary',
+                        help="COPY wire format for --backend copy (default: binary)")
+    parser.add_argument('--dsn', help="Postgres connection string for --backend copy (default: $SUPABASE_DB_URL)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip batches the checkpoint journal records as committed by an earlier run")
+    args = parser.parse_args()
+    if args.resume and args.backend == 'copy':
+        parser.error("--resume applies to --backend postgrest (a COPY load commits all rows or none)")
+    input_file = args.input
+
     print("=" * 80)
     print("CAPABILITY DATA IMPORT PIPELINE")
     print("=" * 80)
-    print(f"Input: {INPUT_FILE}")
+    print(f"Input: {input_file}")
+    print(f"Backend: {args.backend}")
     print("=" * 80)
 
-    # Step 1: Initialize Supabase
-    print("\n🔐 Initializing Supabase connection...")
-    try:
-        supabase = initialize_supabase()
-        print("  ✅ Connected to Supabase")
-    except Exception as e:
-        print(f"  ❌ Error: {e}")
-        return
+    # Step 1: Initialize Supabase (or a direct Postgres connection)
+    if args.backend == 'copy':
+        print("\n🔐 Connecting to Postgres...")
+        try:
+            conn = connect(args.dsn)
+            print("  ✅ Connected to Postgres")
+        except Exception as e:
+            print(f"  ❌ Error: {e}")
+            return
+    else:
+        print("\n🔐 Initializing Supabase connection...")
+        try:
+            supabase = get_client()
+            print("  ✅ Connected to Supabase")
+        except Exception as e:
+            print(f"  ❌ Error: {e}")
+            return
 
     # Step 2: Fetch company mapping
     try:
-        company_mapping = fetch_company_mapping(supabase)
+        if args.backend == 'copy':
+            print("🏢 Fetching company IDs from database...")
+            company_mapping = query_company_mapping(conn)
+            print(f"  ✅ Found {len(company_mapping)} companies")
+        else:
+            company_mapping = fetch_company_mapping(supabase)
     except Exception as e:
         print(f"  ❌ Error: {e}")
         return
 
     # Step 3: Load transformed data
-    print(f"\n📂 Loading transformed data from {INPUT_FILE}...")
+    print(f"\n📂 Loading transformed data from {input_file}...")
     try:
-        df = pd.read_csv(INPUT_FILE)
+        df = read_wide(input_file)
         print(f"  ✅ Loaded {len(df):,} rows")
     except Exception as e:
         print(f"  ❌ Error: {e}")
         return
 
-    # Step 4: Import data in batches
-    stats = import_in_batches(supabase, df, company_mapping)
-
-    # Step 5: Verify import
-    verification = verify_import(supabase, expected_count=len(df))
+    # Steps 4-5: Import data and verify
+    if args.backend == 'copy':
+        with conn:
+            stats = import_with_copy(conn, df, company_mapping, args.copy_format)
+            verification = verify_import_postgres(conn, expected_count=len(df), company_mapping=company_mapping)
+    else:
+        journal_path = journal_path_for(input_file, 'respondents')
+        journal = ImportJournal(journal_path, row_hashes(df), resume=args.resume)
+        print(f"  📒 Checkpoint journal: {journal_path}"
+              + (f" ({journal.verified_batches:,} committed batches, {journal.stale_batches:,} changed)"
+                 if args.resume else ""))
+        transport = create_transport(args.transport, supabase, compress=not args.no_compress)
+        dead_letter = DeadLetterFile(dead_letter_path('respondents', input_file), 'respondents', UPSERT_KEY)
+        try:
+            stats = import_in_batches(transport, df, company_mapping, args.workers, args.batch_size, journal,
+                                      dead_letter=dead_letter)
+        finally:
+            transport.close()
+            journal.close()
+        verification = verify_import(supabase, expected_count=len(df), company_mapping=company_mapping)
 
     # Step 6: Generate log
-    generate_log(stats, verification, LOG_FILE)
+    backend = f"copy ({args.copy_format})" if args.backend == 'copy' else f"postgrest ({args.transport})"
+    generate_log(stats, verification, LOG_FILE, input_file, backend)
 
     # Final summary
     print("\n" + "=" * 80)
@@ -359,8 +591,10 @@ def main():
         print("⚠️  IMPORT COMPLETED WITH ISSUES")
 
     print("=" * 80)
-    print(f"Inserted: {stats['inserted']:,} / {stats['total_rows']:,}")
+    print(f"Inserted: {stats['inserted']:,} / {stats['total_rows']:,}"
+          + (f" ({stats['resumed_rows']:,} already committed)" if stats.get('resumed_rows') else ""))
     print(f"Errors: {stats['errors']}")
+    print(f"Throughput: {stats['rows_per_second']:,.0f} rows/s")
     print(f"Database count: {verification['actual_count']:,}")
     print(f"Log file: {LOG_FILE}")
     print("\nNext steps:")
@@ -14,23 +14,9 @@ Usage:
 import os
 import sys
 import pandas as pd
-from supabase import create_client, Client
 from docx import Document
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-# Supabase configuration
-SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Error: SUPABASE_URL and SUPABASE_KEY environment variables required")
-    sys.exit(1)
-
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from importer_core import credentials, get_client, head_count, write_records
 
 # File paths
 EXCEL_FILE = 'Interventions/0 - Overview of interventions per area.xlsx'
@@ -107,7 +93,7 @@ def map_sentiment_level_to_id(level_text: str) -> int:
     }
     return mapping.get(level_text, 0)
 
-def import_interventions():
+def import_interventions(supabase):
     """Import master list of interventions."""
     print("\n" + "="*80)
     print("📋 Step 1: Importing Interventions")
@@ -131,15 +117,14 @@ def import_interventions():
         print(f"  ✓ {code}: {row['Intervention Name'][:60]}...")
 
     # Insert into database
-    try:
-        result = supabase.table('interventions').upsert(interventions, on_conflict='code').execute()
-        print(f"\n✅ Inserted {len(interventions)} interventions")
-        return True
-    except Exception as e:
-        print(f"\n❌ Error inserting interventions: {e}")
+    stats = write_records(supabase, 'interventions', interventions, on_conflict='code')
+    if stats['errors']:
+        print(f"\n❌ Error inserting interventions: {stats['error_details'][0]['error']}")
         return False
+    print(f"\n✅ Inserted {len(interventions)} interventions")
+    return True
 
-def import_sentiment_mappings():
+def import_sentiment_mappings(supabase):
     """Import sentiment heatmap cell → intervention mappings."""
     print("\n" + "="*80)
     print("📊 Step 2: Importing Sentiment Heatmap Mappings (25 cells)")
@@ -170,18 +155,14 @@ def import_sentiment_mappings():
         print(f"  ✓ L{level_id}×C{category_id}: {mapping['primary_intervention_code']}, {mapping['secondary_intervention_code']}, {mapping['tertiary_intervention_code']}")
 
     # Insert into database
-    try:
-        result = supabase.table('intervention_sentiment_mappings').upsert(
-            mappings,
-            on_conflict='level_id,category_id'
-        ).execute()
-        print(f"\n✅ Inserted {len(mappings)} sentiment mappings")
-        return True
-    except Exception as e:
-        print(f"\n❌ Error inserting sentiment mappings: {e}")
+    stats = write_records(supabase, 'intervention_sentiment_mappings', mappings, on_conflict='level_id,category_id')
+    if stats['errors']:
+        print(f"\n❌ Error inserting sentiment mappings: {stats['error_details'][0]['error']}")
         return False
+    print(f"\n✅ Inserted {len(mappings)} sentiment mappings")
+    return True
 
-def import_capability_mappings():
+def import_capability_mappings(supabase):
     """Import capability dimension → intervention mappings."""
     print("\n" + "="*80)
     print("🔷 Step 3: Importing Capability Dimension Mappings (8 dimensions)")
@@ -206,18 +187,14 @@ def import_capability_mappings():
         print(f"    → {mapping['primary_intervention_code']}, {mapping['secondary_intervention_code']}, {mapping['tertiary_intervention_code']}")
 
     # Insert into database
-    try:
-        result = supabase.table('intervention_capability_mappings').upsert(
-            mappings,
-            on_conflict='dimension_id'
-        ).execute()
-        print(f"\n✅ Inserted {len(mappings)} capability mappings")
-        return True
-    except Exception as e:
-        print(f"\n❌ Error inserting capability mappings: {e}")
+    stats = write_records(supabase, 'intervention_capability_mappings', mappings, on_conflict='dimension_id')
+    if stats['errors']:
+        print(f"\n❌ Error inserting capability mappings: {stats['error_details'][0]['error']}")
         return False
+    print(f"\n✅ Inserted {len(mappings)} capability mappings")
+    return True
 
-def import_next_steps():
+def import_next_steps(supabase):
     """Import intervention → next steps progression logic."""
     print("\n" + "="*80)
     print("➡️  Step 4: Importing Next Steps / Progression Logic (10 interventions)")
@@ -240,18 +217,14 @@ def import_next_steps():
         print(f"  ✓ {intervention_code} → {next_step['primary_next_code']}, {next_step['secondary_next_code']}, {next_step['tertiary_next_code']}")
 
     # Insert into database
-    try:
-        result = supabase.table('intervention_next_steps').upsert(
-            next_steps,
-            on_conflict='intervention_code'
-        ).execute()
-        print(f"\n✅ Inserted {len(next_steps)} next step mappings")
-        return True
-    except Exception as e:
-        print(f"\n❌ Error inserting next steps: {e}")
+    stats = write_records(supabase, 'intervention_next_steps', next_steps, on_conflict='intervention_code')
+    if stats['errors']:
+        print(f"\n❌ Error inserting next steps: {stats['error_details'][0]['error']}")
         return False
+    print(f"\n✅ Inserted {len(next_steps)} next step mappings")
+    return True
 
-def verify_import():
+def verify_import(supabase):
     """Verify all data was imported correctly."""
     print("\n" + "="*80)
     print("🔍 Step 5: Verification")
@@ -259,10 +232,10 @@ def verify_import():
 
     # Count records in each table
     try:
-        interventions_count = len(supabase.table('interventions').select('code').execute().data)
-        sentiment_count = len(supabase.table('intervention_sentiment_mappings').select('id').execute().data)
-        capability_count = len(supabase.table('intervention_capability_mappings').select('id').execute().data)
-        next_steps_count = len(supabase.table('intervention_next_steps').select('id').execute().data)
+        interventions_count = head_count(supabase, 'interventions')
+        sentiment_count = head_count(supabase, 'intervention_sentiment_mappings')
+        capability_count = head_count(supabase, 'intervention_capability_mappings')
+        next_steps_count = head_count(supabase, 'intervention_next_steps')
 
         print(f"  📋 Interventions: {interventions_count} (expected: 10)")
         print(f"  📊 Sentiment mappings: {sentiment_count} (expected: 25)")
@@ -292,9 +265,16 @@ def main():
     print("\n" + "="*80)
     print("🚀 INTERVENTION DATA IMPORT")
     print("="*80)
+
+    try:
+        supabase = get_client()
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return 1
+
     print(f"Source: {EXCEL_FILE}")
     print(f"Descriptions: {INTERVENTIONS_DIR}/*.docx")
-    print(f"Database: {SUPABASE_URL}")
+    print(f"Database: {credentials()[0]}")
 
     # Install python-docx if needed
     try:
@@ -307,11 +287,11 @@ def main():
 
     # Run import steps
     success = True
-    success = import_interventions() and success
-    success = import_sentiment_mappings() and success
-    success = import_capability_mappings() and success
-    success = import_next_steps() and success
-    success = verify_import() and success
+    success = import_interventions(supabase) and success
+    success = import_sentiment_mappings(supabase) and success
+    success = import_capability_mappings(supabase) and success
+    success = import_next_steps(supabase) and success
+    success = verify_import(supabase) and success
 
     if success:
         print("\n" + "="*80)
@@ -0,0 +1,138 @@
+"""
+Import Checkpoint Journal
+=========================
+
+Append-only record of committed import batches, so an interrupted import
+can resume without resending finished work.
+
+Every committed batch appends one JSON line holding the input rows it
+covered (as [first, last] runs of row positions) and a digest of their
+content hashes. On --resume a batch only counts as done if its rows still
+hash to the recorded digest; rows of batches whose content changed, and of
+batches that never committed, are imported again. Writes are upserts, so
+rows that were committed but not journaled (a crash between the response
+and the journal write) are simply rewritten.
+
+Journals live next to the import logs:
+    logs/<input name>.<table>.journal.jsonl
+
+Usage:
+    from import_journal import ImportJournal, journal_path_for, row_hashes
+
+    journal = ImportJournal(journal_path_for(input_file, 'respondents'), row_hashes(df), resume=True)
+    pending_df = df.iloc[journal.pending()]
+    ...
+    journal.record(batch_positions)   # after each committed batch
+    journal.close()
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+JOURNAL_DIR = "logs"
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+
+def journal_path_for(input_file: str, table: str) -> str:
+    """Journal file for loading input_file into table."""
+    return str(Path(JOURNAL_DIR) / f"{Path(input_file).name}.{table}{JOURNAL_SUFFIX}")
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """64-bit content hash of every row (values only, not the index)."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def position_runs(positions: np.ndarray) -> list:
+    """Sorted row positions → [[first, last], ...] runs of consecutive positions."""
+    if len(positions) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(positions) != 1)
+    starts = np.concatenate(([positions[0]], positions[breaks + 1]))
+    ends = np.concatenate((positions[breaks], [positions[-1]]))
+    return [[int(start), int(end)] for start, end in zip(starts, ends)]
+
+
+def digest(hashes: np.ndarray) -> str:
+    """Order-sensitive digest of a sequence of row hashes."""
+    return hashlib.blake2b(np.ascontiguousarray(hashes, dtype=np.uint64).tobytes(), digest_size=16).hexdigest()
+
+
+class ImportJournal:
+    """
+    Checkpoint journal for one (input file, table) import.
+
+    Args:
+        path: Journal file
+        hashes: row_hashes() of the full input, in input order
+        resume: Keep and verify existing entries (otherwise start a new journal)
+    """
+
+    def __init__(self, path: str, hashes: np.ndarray, resume: bool = False):
+        self.path = path
+        self.hashes = hashes
+        self.committed = np.zeros(len(hashes), dtype=bool)
+        self.verified_batches = 0
+        self.stale_batches = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        if resume and os.path.exists(path):
+            self._load()
+            self._file = open(path, 'a')
+        else:
+            self._file = open(path, 'w')
+            self._write({'journal': 'start', 'rows': len(hashes),
+                         'created': datetime.now().isoformat(timespec='seconds')})
+
+    def _load(self):
+        """Mark rows of journaled batches whose content still matches."""
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash mid-write
+                if 'ranges' not in entry:
+                    continue
+
+                positions = np.concatenate(
+                    [np.arange(first, last + 1) for first, last in entry['ranges']]
+                ) if entry['ranges'] else np.empty(0, dtype=np.int64)
+                if len(positions) and positions[-1] < len(self.hashes) and digest(self.hashes[positions]) == entry['hash']:
+                    self.committed[positions] = True
+                    self.verified_batches += 1
+                else:
+                    self.stale_batches += 1
+
+    def _write(self, entry: dict):
+        self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def pending(self) -> np.ndarray:
+        """Row positions not yet committed."""
+        return np.flatnonzero(~self.committed)
+
+    def committed_rows(self) -> int:
+        return int(self.committed.sum())
+
+    def record(self, positions):
+        """Journal a committed batch of rows (positions in the full input)."""
+        positions = np.sort(np.asarray(positions, dtype=np.int64))
+        self._write({'ranges': position_runs(positions), 'rows': len(positions),
+                     'hash': digest(self.hashes[positions])})
+        self.committed[positions] = True
+
+    def close(self):
+        self._file.close()
+
+    def discard(self):
+        """Close and delete the journal (its rows were published elsewhere)."""
+        self.close()
+        os.remove(self.path)
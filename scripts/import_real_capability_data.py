@@ -5,124 +5,217 @@ Import Real Capability Data to Supabase
 Updates existing respondents with capability construct scores.
 For respondents that don't exist, creates new records with company assignment.
 
-Requires environment variables:
+Existing respondents are diffed against the database first: current scores
+are fetched in pages, changed cells are found vectorized, and only rows
+with changes are written, as batched upserts of every column that changed
+in any row. Re-importing an unchanged file sends no writes at all.
+
+Which respondents exist is decided from a keyset-paginated scan of all
+respondent IDs held as a sorted hash array (respondent_index.py), so the
+split stays correct past PostgREST's max-rows limit.
+
+Requires environment variables (or .env.local):
   NEXT_PUBLIC_SUPABASE_URL
   NEXT_PUBLIC_SUPABASE_ANON_KEY
+
+Usage:
+  python3 scripts/import_real_capability_data.py
+  python3 scripts/import_real_capability_data.py --input data-foundation/capability_real_wide.parquet
 """
 
+import argparse
 import os
 import sys
+import numpy as np
 import pandas as pd
-from supabase import create_client, Client
+from supabase import Client
 from datetime import datetime
-import hashlib
+
+from company_assignment import assign_companies
+from importer_core import fetch_company_map, get_client, head_count, print_header, print_step, write_records
+from respondent_index import scan_respondent_ids
+from score_reshape import CONSTRUCTS
+from supabase_uploader import committed_mask, round_decimal
+from wide_format_io import read_wide
 
 # Configuration
 INPUT_FILE = "data-foundation/capability_real_wide.csv"
 BATCH_SIZE = 50
+UPSERT_BATCH_SIZE = 500  # Changed rows per upsert request
+FETCH_PAGE_SIZE = 300  # respondent_ids per in.() filter (URL length; rows stay under PostgREST's max-rows)
 LOG_DIR = "logs"
 
-# Demo companies for new respondents
-DEMO_COMPANIES = ["acme-corp", "tech-innovations", "global-solutions"]
-
-def print_header(text: str):
-    """Print formatted header"""
-    print("=" * 80)
-    print(text)
-    print("=" * 80)
-
-def print_step(text: str):
-    """Print formatted step"""
-    print(f"\n{text}")
-
-def hash_respondent_to_company(respondent_id: str) -> str:
-    """Deterministically assign respondent to company using hash"""
-    hash_value = int(hashlib.md5(respondent_id.encode()).hexdigest(), 16)
-    company_index = hash_value % 3
-    return DEMO_COMPANIES[company_index]
+CONSTRUCT_COLUMNS = CONSTRUCTS.columns
+SCORE_DECIMALS = 2  # respondents.construct_N are DECIMAL(5,2) (migration 003)
+
+def fetch_current_scores(supabase: Client, respondent_ids) -> pd.DataFrame:
+    """
+    Current construct values for the given respondents, fetched in pages.
+
+    Returns:
+        DataFrame: id, company_id, respondent_id and the construct columns
+                   (one row per database row; missing scores are NaN)
+    """
+    columns = ['id', 'company_id', 'respondent_id'] + CONSTRUCT_COLUMNS
+    ids = list(respondent_ids)
+    rows = []
+    for start in range(0, len(ids), FETCH_PAGE_SIZE):
+        response = supabase.table('respondents')\
+            .select(','.join(columns))\
+            .in_('respondent_id', ids[start:start + FETCH_PAGE_SIZE])\
+            .execute()
+        rows.extend(response.data)
+
+    current = pd.DataFrame(rows, columns=columns)
+    current[CONSTRUCT_COLUMNS] = current[CONSTRUCT_COLUMNS].astype(np.float64)
+    return current
+
+def diff_scores(df_existing: pd.DataFrame, current: pd.DataFrame) -> tuple:
+    """
+    Compare file scores with the database, cell by cell.
+
+    A cell is unchanged when the file value, rounded to the column's scale,
+    equals the stored value, or both are missing. (Floating-point edge cases
+    can only flag an unchanged cell as changed, which just rewrites it.)
+
+    Returns:
+        tuple: (file scores aligned to current's rows, changed-cell boolean matrix)
+    """
+    # Last occurrence wins, like the per-row updates this replaces
+    file_scores = df_existing.drop_duplicates('respondent_id', keep='last').set_index('respondent_id')
+    file_scores = file_scores.reindex(columns=CONSTRUCT_COLUMNS)
+    new = file_scores.reindex(current['respondent_id']).to_numpy(dtype=np.float64)
+    old = current[CONSTRUCT_COLUMNS].to_numpy(dtype=np.float64)
+
+    rounded = round_decimal(new, SCORE_DECIMALS)
+    unchanged = (rounded == old) | (np.isnan(new) & np.isnan(old))
+    return new, ~unchanged
+
+def apply_score_changes(supabase: Client, current: pd.DataFrame, new: np.ndarray, changed: np.ndarray) -> dict:
+    """
+    Write only the changed rows, as upserts on the primary key.
+
+    PostgREST bulk upserts need the same keys in every object, so every
+    changed row is sent with the union of the columns that changed in any
+    row (plus id and the NOT NULL keys), in batches of UPSERT_BATCH_SIZE.
+    Cells that did not change in a row are resent with the value they
+    already hold.
+
+    Returns:
+        dict: {'updated', 'errors', 'cells', 'requests'}
+    """
+    stats = {'updated': 0, 'errors': 0, 'cells': int(changed.sum()), 'requests': 0}
+    rows = np.flatnonzero(changed.any(axis=1))
+    if len(rows) == 0:
+        return stats
+
+    cols = np.flatnonzero(changed[rows].any(axis=0))
+    scores = new[np.ix_(rows, cols)]
+    values = scores.astype(object)
+    values[np.isnan(scores)] = None
+    keys = current[['id', 'company_id', 'respondent_id']].to_numpy(dtype=object)
+
+    names = ['id', 'company_id', 'respondent_id'] + [CONSTRUCT_COLUMNS[c] for c in cols]
+    records = [dict(zip(names, list(key) + vals))
+               for key, vals in zip(keys[rows].tolist(), values.tolist())]
+
+    print(f"  Changed columns {', '.join(names[3:])}: {len(records)} rows")
+    write_stats = write_records(supabase, 'respondents', records, UPSERT_BATCH_SIZE, on_conflict='id')
+    stats['updated'] = write_stats['inserted']
+    stats['errors'] = write_stats['errors']
+    stats['requests'] = write_stats['batches']
+
+    return stats
 
 def main():
+    parser = argparse.ArgumentParser(description="Import real capability data into Supabase.")
+    parser.add_argument('--input', default=INPUT_FILE,
+                        help=f"Wide-format .csv, .parquet or .arrow (default: {INPUT_FILE})")
+    args = parser.parse_args()
+    input_file = args.input
+
     print_header("REAL CAPABILITY DATA IMPORT PIPELINE")
-    print(f"Input: {INPUT_FILE}")
+    print(f"Input: {input_file}")
     print_header("")
 
-    # Check environment variables
+    # Initialize Supabase client
     print_step("🔐 Initializing Supabase connection...")
-    supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-    supabase_key = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
-
-    if not supabase_url or not supabase_key:
-        print("  ❌ Error: Missing Supabase credentials. Set NEXT_PUBLIC_SUPABASE_URL and NEXT_PUBLIC_SUPABASE_ANON_KEY environment variables.")
+    try:
+        supabase: Client = get_client()
+    except ValueError as e:
+        print(f"  ❌ Error: {e}")
         sys.exit(1)
-
-    # Initialize Supabase client
-    supabase: Client = create_client(supabase_url, supabase_key)
     print("  ✅ Connected to Supabase")
 
     # Fetch company IDs
     print_step("🏢 Fetching company IDs from database...")
-    companies_response = supabase.table('companies').select('id,name').execute()
-    companies = {c['name']: c['id'] for c in companies_response.data}
+    companies = fetch_company_map(supabase)
     print(f"  ✅ Found {len(companies)} companies:")
     for name, uuid in companies.items():
         print(f"    {name}: {uuid}")
 
     # Load transformed data
-    print_step(f"📂 Loading transformed data from {INPUT_FILE}...")
+    print_step(f"📂 Loading transformed data from {input_file}...")
     try:
-        df = pd.read_csv(INPUT_FILE)
+        df = read_wide(input_file)
         print(f"  ✅ Loaded {len(df)} rows")
     except FileNotFoundError:
-        print(f"  ❌ Error: File not found: {INPUT_FILE}")
+        print(f"  ❌ Error: File not found: {input_file}")
         sys.exit(1)
 
     # Check which respondents already exist
     print_step("🔍 Checking existing respondents...")
-    existing_response = supabase.table('respondents').select('respondent_id').execute()
-    existing_ids = {r['respondent_id'] for r in existing_response.data}
-    print(f"  ✅ Found {len(existing_ids)} existing respondents in database")
+    existing_ids = scan_respondent_ids(supabase)
+    print(f"  ✅ Found {len(existing_ids)} existing respondents in database "
+          f"({existing_ids.rows_scanned} rows in {existing_ids.requests} keyset pages, "
+          f"{existing_ids.nbytes / 2**20:.1f} MiB index)")
 
     # Separate into updates vs inserts
-    df_existing = df[df['respondent_id'].isin(existing_ids)]
-    df_new = df[~df['respondent_id'].isin(existing_ids)]
+    exists = existing_ids.contains(df['respondent_id'])
+    df_existing = df[exists]
+    df_new = df[~exists]
+
+    # Current scores of the (probably) existing respondents; the exact
+    # in.() fetch also weeds out any hash-collision false positives
+    current = None
+    if len(df_existing) > 0:
+        current = fetch_current_scores(supabase, df_existing['respondent_id'].unique())
+        confirmed = df_existing['respondent_id'].isin(current['respondent_id']).to_numpy()
+        if not confirmed.all():
+            df_new = pd.concat([df_new, df_existing[~confirmed]])
+            df_existing = df_existing[confirmed]
 
     print(f"\n  Respondents to UPDATE: {len(df_existing)}")
     print(f"  Respondents to INSERT: {len(df_new)}")
 
-    # Prepare update records
+    # Diff existing respondents against the database; write only changes
     update_count = 0
+    unchanged_count = 0
     if len(df_existing) > 0:
-        print_step(f"🔄 Updating {len(df_existing)} existing respondents...")
-
-        for idx, row in df_existing.iterrows():
-            update_data = {}
+        print_step(f"🔄 Diffing {len(df_existing)} existing respondents against the database...")
 
-            # Add all construct scores
-            for i in range(1, 33):
-                col_name = f'construct_{i}'
-                value = row.get(col_name)
-                update_data[col_name] = None if pd.isna(value) else float(value)
+        new_scores, changed = diff_scores(df_existing, current)
+        unchanged_count = int((~changed.any(axis=1)).sum())
+        print(f"  Fetched {len(current)} rows: {len(current) - unchanged_count} changed "
+              f"({int(changed.sum())} cells), {unchanged_count} unchanged")
 
-            # Update via respondent_id
-            try:
-                supabase.table('respondents').update(update_data).eq('respondent_id', row['respondent_id']).execute()
-                update_count += 1
-                if (update_count) % 10 == 0:
-                    print(f"  Updated {update_count}/{len(df_existing)}...")
-            except Exception as e:
-                print(f"  ❌ Error updating {row['respondent_id']}: {e}")
+        update_stats = apply_score_changes(supabase, current, new_scores, changed)
+        update_count = update_stats['updated']
 
-        print(f"  ✅ Updated {update_count} respondents")
+        print(f"  ✅ Updated {update_count} respondents in {update_stats['requests']} requests "
+              f"({unchanged_count} unchanged, skipped)")
 
     # Prepare insert records
     insert_count = 0
     if len(df_new) > 0:
         print_step(f"📤 Inserting {len(df_new)} new respondents...")
 
+        # Assign companies via hash (each unique respondent hashed once)
+        company_names = assign_companies(df_new['respondent_id'])
+
         insert_records = []
         for idx, row in df_new.iterrows():
-            # Assign company via hash
-            company_name = hash_respondent_to_company(row['respondent_id'])
+            company_name = company_names[idx]
             company_id = companies.get(company_name)
 
             if not company_id:
@@ -147,35 +240,28 @@ def main():
 
             insert_records.append(insert_data)
 
-        # Insert in batches
-        total_batches = (len(insert_records) + BATCH_SIZE - 1) // BATCH_SIZE
-        for batch_num in range(total_batches):
-            start_idx = batch_num * BATCH_SIZE
-            end_idx = min(start_idx + BATCH_SIZE, len(insert_records))
-            batch = insert_records[start_idx:end_idx]
+        # Insert in batches, remembering which records landed
+        inserted_positions = []
 
-            print(f"  Batch {batch_num + 1}/{total_batches}: rows {start_idx + 1}-{end_idx}...", end=" ")
+        def on_result(result):
+            if result['committed']:
+                inserted_positions.extend(result['batch']['index'][committed_mask(result)])
 
-            try:
-                response = supabase.table('respondents').insert(batch).execute()
-                inserted = len(response.data)
-                insert_count += inserted
-                print(f"✅ {inserted} rows")
-            except Exception as e:
-                print(f"❌ Error: {e}")
+        insert_stats = write_records(supabase, 'respondents', insert_records, BATCH_SIZE, on_result=on_result)
+        insert_count = insert_stats['inserted']
 
         print(f"  ✅ Inserted {insert_count} new respondents")
 
     # Verify import
     print_step("🔍 Verifying import...")
-    all_respondents_after = supabase.table('respondents').select('respondent_id,construct_1').execute()
-    respondents_with_capability = [r for r in all_respondents_after.data if r.get('construct_1') is not None]
+    total_respondents = head_count(supabase, 'respondents')
+    capability_count = head_count(supabase, 'respondents', {'construct_1': 'not.is.null'})
 
-    print(f"  Total respondents in database: {len(all_respondents_after.data)}")
-    print(f"  Respondents with capability data: {len(respondents_with_capability)}")
+    print(f"  Total respondents in database: {total_respondents}")
+    print(f"  Respondents with capability data: {capability_count}")
     print(f"  Expected: {len(existing_ids) + insert_count}")
 
-    if len(respondents_with_capability) >= (len(existing_ids) + insert_count):
+    if capability_count >= (len(existing_ids) + insert_count):
         print(f"  Match: ✅")
     else:
         print(f"  Mismatch: ⚠️")
@@ -183,14 +269,12 @@ def main():
     # Company distribution for new inserts
     if insert_count > 0:
         print_step("\n  Company distribution (new inserts):")
-        company_counts = {}
-        for record in insert_records[:insert_count]:
-            company_id = record['company_id']
-            company_name = [name for name, uuid in companies.items() if uuid == company_id][0]
-            company_counts[company_name] = company_counts.get(company_name, 0) + 1
+        company_counts = companies.names(
+            [insert_records[position]['company_id'] for position in sorted(inserted_positions)]
+        ).value_counts()
 
         for company_name, count in company_counts.items():
-            print(f"    {companies[company_name]}: {count}")
+            print(f"    {company_name}: {count}")
 
     # Create import log
     print_step(f"📄 Import log saved to: {LOG_DIR}/import_log.txt")
@@ -198,17 +282,18 @@ def main():
     with open(f"{LOG_DIR}/import_log.txt", 'w') as f:
         f.write(f"Real Capability Data Import - {datetime.now()}\n")
         f.write(f"=" * 80 + "\n\n")
-        f.write(f"Input file: {INPUT_FILE}\n")
+        f.write(f"Input file: {input_file}\n")
         f.write(f"Respondents updated: {update_count}\n")
+        f.write(f"Respondents unchanged: {unchanged_count}\n")
         f.write(f"Respondents inserted: {insert_count}\n")
-        f.write(f"Total capability respondents: {len(respondents_with_capability)}\n")
-        f.write(f"\nStatus: {'SUCCESS' if insert_count + update_count == len(df) else 'PARTIAL'}\n")
+        f.write(f"Total capability respondents: {capability_count}\n")
+        f.write(f"\nStatus: {'SUCCESS' if insert_count + update_count + unchanged_count == len(df) else 'PARTIAL'}\n")
 
     print_header("✅ IMPORT SUCCESSFUL!")
-    print(f"Updated: {update_count} / {len(df_existing)}")
+    print(f"Updated: {update_count} / {len(df_existing)} ({unchanged_count} unchanged)")
     print(f"Inserted: {insert_count} / {len(df_new)}")
-    print(f"Total: {update_count + insert_count} / {len(df)}")
-    print(f"\nDatabase now has {len(respondents_with_capability)} respondents with capability data")
+    print(f"Total: {update_count + unchanged_count + insert_count} / {len(df)}")
+    print(f"\nDatabase now has {capability_count} respondents with capability data")
     print(f"Log file: {LOG_DIR}/import_log.txt")
     print(f"\nNext steps:")
     print(f"1. Review import log for any errors")
@@ -6,26 +6,14 @@ Implements AINAV-30: Taboos within the Sentiment areas
 This script:
 1. Reads taboos_extracted.json (100 taboos)
 2. Maps root causes to category IDs (1-5)
-3. Imports all taboos to the 'taboos' table in Supabase
+3. Replaces the 'taboos' table in Supabase atomically (loaded into
+   taboos_staging, then published; migration 010_staged_reload.sql)
 4. Each of the 25 sentiment cells gets exactly 4 taboos
 """
 
 import json
-import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv('.env.local')
-
-# Initialize Supabase client
-SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-
-if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
-    raise Exception('Missing Supabase credentials in .env.local')
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+from importer_core import SERVICE_KEY_ENV, get_client, head_count, reload_records
 
 # Root cause to category_id mapping
 ROOT_CAUSE_TO_CATEGORY = {
@@ -39,6 +27,8 @@ ROOT_CAUSE_TO_CATEGORY = {
 def import_taboos():
     """Import all taboos from JSON to Supabase"""
 
+    supabase = get_client(SERVICE_KEY_ENV)
+
     print("🔍 Loading taboos from JSON...")
 
     # Load the extracted taboos
@@ -104,45 +94,17 @@ def import_taboos():
         status = "✅" if count == 4 else "⚠️"
         print(f"   {status} {cell_key}: {count} taboos")
 
-    # Clear existing data
-    print("\n🗑️  Clearing existing taboos...")
-    try:
-        supabase.table('taboos').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
-        print("✅ Existing taboos cleared")
-    except Exception as e:
-        print(f"ℹ️  No existing taboos to clear (table might be empty): {e}")
-
-    # Insert taboos
+    # Replace taboos: load taboos_staging in batches of 20 (a rejected batch is
+    # bisected down to its bad taboos), then publish it in one transaction
     print("\n📥 Importing taboos to Supabase...")
-
-    # Insert in batches of 20
-    batch_size = 20
-    total_inserted = 0
-
-    for i in range(0, len(taboos_for_db), batch_size):
-        batch = taboos_for_db[i:i + batch_size]
-
-        try:
-            result = supabase.table('taboos').insert(batch).execute()
-            total_inserted += len(batch)
-            print(f"   ✅ Inserted batch {i//batch_size + 1} ({len(batch)} taboos)")
-        except Exception as e:
-            print(f"   ❌ Error inserting batch {i//batch_size + 1}: {e}")
-            # Try inserting one by one for this batch
-            for taboo in batch:
-                try:
-                    supabase.table('taboos').insert(taboo).execute()
-                    total_inserted += 1
-                    print(f"      ✅ Inserted '{taboo['name']}'")
-                except Exception as e2:
-                    print(f"      ❌ Failed to insert '{taboo['name']}': {e2}")
+    stats = reload_records(supabase, 'taboos', taboos_for_db, batch_size=20)
+    total_inserted = stats['published']
 
     print(f"\n✅ Import complete! Total taboos inserted: {total_inserted}")
 
     # Verify the import
     print("\n🔍 Verifying import...")
-    result = supabase.table('taboos').select('count', count='exact').execute()
-    db_count = result.count if hasattr(result, 'count') else 0
+    db_count = head_count(supabase, 'taboos')
     print(f"✅ Taboos in database: {db_count}")
 
     if db_count == len(taboos_for_db):
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Multi-Tenant Import
+===================
+
+Loads a wide-format respondents file that spans many companies, one
+partition per company.
+
+- The input is split by company_name in one pass. Each company's rows
+  become a tenant job with its own adaptive batch size, its own checkpoint
+  journal (logs/<input>.respondents.<company>.journal.jsonl), its own
+  dead-letter file for rejected rows (...<company>.rejected.jsonl) and its
+  own statistics.
+- Tenant jobs run on a pool of --workers threads, largest first: a large
+  tenant occupies one worker while the smaller ones flow through the
+  others, and a failing tenant does not stop the rest.
+- Each job sends at least --requests-per-tenant batches at once through
+  the shared keep-alive pool. A tenant holding a large share of the rows
+  gets that share of the whole request budget (workers x requests), so one
+  dominant tenant does not cap the total load time.
+- Rows are upserted on (company_id, respondent_id), built exactly as
+  import_capability_wide.py builds them, so --resume (per tenant) and
+  reruns are safe.
+- Rows, time and rows/s per company are printed and written to
+  logs/tenant_import_log.txt.
+
+Companies must exist in the companies table; --create-companies adds the
+missing ones (display_name = name) before loading.
+
+Usage:
+    python scripts/import_tenants.py
+    python scripts/import_tenants.py --input data-foundation/capability_demo_wide.parquet --workers 8
+    python scripts/import_tenants.py --resume
+    python scripts/import_tenants.py --create-companies
+"""
+
+import argparse
+import math
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from dead_letter import DeadLetterFile, dead_letter_path
+from import_capability_wide import UPSERT_KEY, import_in_batches
+from import_journal import ImportJournal, journal_path_for, row_hashes
+from importer_core import (
+    CompanyMap, fetch_company_map, get_client, print_header, print_step, rest_transport, write_records,
+)
+from wide_format_io import read_wide
+
+# Configuration
+INPUT_FILE = "data-foundation/capability_demo_wide.csv"
+TENANT_WORKERS = 4  # Tenants loaded at once
+REQUESTS_PER_TENANT = 2  # Concurrent batch requests within one tenant
+BATCH_SIZE = 500  # Initial batch size per tenant; adapted to payload size and latency
+LOG_FILE = "logs/tenant_import_log.txt"
+COMPANY_COLUMN = 'company_name'
+
+
+def partition_by_company(df: pd.DataFrame) -> dict:
+    """
+    Row positions of each company, largest company first.
+
+    Rows without a company_name are left out.
+
+    Returns:
+        dict: {company_name: row positions ndarray}
+    """
+    groups = df.groupby(COMPANY_COLUMN, sort=False).indices
+    return dict(sorted(groups.items(), key=lambda item: len(item[1]), reverse=True))
+
+
+def tenant_requests(rows: int, total_rows: int, workers: int, requests: int) -> int:
+    """
+    Concurrent requests for a tenant: at least `requests`, or the tenant's
+    share of the total budget (workers x requests) if that is more.
+    """
+    budget = workers * requests
+    share = math.ceil(budget * rows / total_rows) if total_rows else 0
+    return max(requests, min(budget, share))
+
+
+def tenant_name(company: str) -> str:
+    """Company name made safe for journal and dead-letter file names."""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', company)
+
+
+def tenant_journal_path(input_file: str, company: str) -> str:
+    """Checkpoint journal for one company's partition of input_file."""
+    return journal_path_for(input_file, f"respondents.{tenant_name(company)}")
+
+
+def create_missing_companies(supabase, companies: dict, names) -> dict:
+    """
+    Add companies that are not in the database yet.
+
+    Returns:
+        dict: Refreshed company mapping
+    """
+    missing = sorted(set(names) - set(companies))
+    if not missing:
+        return companies
+    print(f"  ➕ Creating {len(missing):,} companies")
+    write_records(supabase, 'companies', [{'name': name, 'display_name': name} for name in missing],
+                  on_conflict='name')
+    fetch_company_map.cache_clear()
+    return fetch_company_map(supabase)
+
+
+def load_tenant(supabase, company: str, df: pd.DataFrame, company_mapping: dict, input_file: str,
+                resume: bool = False, batch_size: int = BATCH_SIZE,
+                requests: int = REQUESTS_PER_TENANT) -> dict:
+    """
+    Upsert one company's rows, with its own batching, checkpoint journal
+    and dead-letter file.
+
+    Args:
+        supabase: Shared Supabase client
+        company: Company name
+        df: The company's rows (RangeIndex; journal positions refer to it)
+        company_mapping: {company_name: company_uuid}
+        input_file: Input the rows came from (names the journal)
+        resume: Skip rows the company's journal holds as committed
+        batch_size: Initial rows per batch
+        requests: Concurrent batch requests for this company
+
+    Returns:
+        dict: import_in_batches() statistics plus 'company' and 'seconds'
+    """
+    started = time.perf_counter()
+    journal = ImportJournal(tenant_journal_path(input_file, company), row_hashes(df), resume=resume)
+    transport = rest_transport(supabase, 'respondents', on_conflict=UPSERT_KEY)
+    dead_letter = DeadLetterFile(dead_letter_path(f"respondents.{tenant_name(company)}", input_file),
+                                 'respondents', UPSERT_KEY)
+    try:
+        stats = import_in_batches(transport, df, company_mapping, requests, batch_size, journal, name=company,
+                                  dead_letter=dead_letter)
+    finally:
+        transport.close()
+        journal.close()
+    stats['company'] = company
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def load_tenants(supabase, df: pd.DataFrame, company_mapping: dict, input_file: str,
+                 workers: int = TENANT_WORKERS, **tenant_options) -> list:
+    """
+    Load every company's partition of df on a pool of workers, largest first.
+
+    Returns:
+        list: load_tenant() statistics per company, in completion order
+    """
+    partitions = partition_by_company(df)
+    total_rows = sum(len(positions) for positions in partitions.values())
+    requests = tenant_options.pop('requests', REQUESTS_PER_TENANT)
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(load_tenant, supabase, company, df.iloc[positions].reset_index(drop=True),
+                        company_mapping, input_file,
+                        requests=tenant_requests(len(positions), total_rows, workers, requests),
+                        **tenant_options): company
+            for company, positions in partitions.items()
+        }
+        for future in as_completed(futures):
+            company = futures[future]
+            try:
+                stats = future.result()
+            except Exception as e:
+                stats = {'company': company, 'total_rows': len(partitions[company]), 'inserted': 0,
+                         'errors': len(partitions[company]), 'resumed_rows': 0, 'seconds': 0.0,
+                         'error_details': [{'error': f"{type(e).__name__}: {e}"}]}
+            errors = f", {stats['errors']:,} errors" if stats['errors'] else ""
+            print(f"  🏁 [{company}] {stats['inserted']:,} rows in {stats['seconds']:.1f}s{errors}")
+            results.append(stats)
+    return results
+
+
+def throughput_table(results: list) -> list:
+    """Per-company report lines, largest company first."""
+    lines = [f"  {'Company':<32} {'Rows':>10} {'Resumed':>9} {'Errors':>8} {'Seconds':>9} {'Rows/s':>10}"]
+    for stats in sorted(results, key=lambda s: s['total_rows'], reverse=True):
+        rate = stats['inserted'] / stats['seconds'] if stats['seconds'] else 0.0
+        lines.append(f"  {stats['company']:<32} {stats['total_rows']:>10,} {stats['resumed_rows']:>9,} "
+                     f"{stats['errors']:>8,} {stats['seconds']:>9.1f} {rate:>10,.0f}")
+    return lines
+
+
+def generate_log(results: list, elapsed: float, log_path: str, input_file: str, workers: int):
+    """Write the per-company throughput report."""
+    inserted = sum(stats['inserted'] for stats in results)
+    errors = sum(stats['errors'] for stats in results)
+    lines = [
+        "=" * 80,
+        "MULTI-TENANT IMPORT LOG",
+        "=" * 80,
+        f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"Input file: {input_file}",
+        f"Tenants: {len(results):,} ({workers} workers)",
+        f"Rows inserted: {inserted:,}",
+        f"Errors: {errors:,}",
+        f"Elapsed: {elapsed:.1f}s ({inserted / elapsed if elapsed else 0.0:,.0f} rows/s)",
+        "",
+        "PER-COMPANY THROUGHPUT",
+        "-" * 80,
+        *throughput_table(results),
+    ]
+    failed = [stats for stats in results if stats['errors']]
+    if failed:
+        lines += ["", "ERRORS (first per company)", "-" * 80]
+        for stats in failed:
+            detail = stats['error_details'][0] if stats['error_details'] else {}
+            lines.append(f"  {stats['company']}: {detail.get('error', 'unknown error')}")
+
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    with open(log_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a multi-company wide-format file, one partition per company.")
+    parser.add_argument('--input', default=INPUT_FILE,
+                        help=f"Wide-format .csv, .parquet or .arrow (default: {INPUT_FILE})")
+    parser.add_argument('--workers', type=int, default=TENANT_WORKERS,
+                        help=f"Companies loaded at once (default: {TENANT_WORKERS})")
+    parser.add_argument('--requests-per-tenant', type=int, default=REQUESTS_PER_TENANT,
+                        help=f"Concurrent batch requests within one company (default: {REQUESTS_PER_TENANT})")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"Initial rows per batch (default: {BATCH_SIZE})")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip rows each company's checkpoint journal records as committed")
+    parser.add_argument('--create-companies', action='store_true',
+                        help="Add companies missing from the companies table before loading")
+    args = parser.parse_args()
+
+    print_header("MULTI-TENANT IMPORT")
+    print(f"Input: {args.input}")
+    print(f"Workers: {args.workers} companies x {args.requests_per_tenant} requests")
+    print_header("")
+
+    print_step("🔐 Initializing Supabase connection...")
+    try:
+        supabase = get_client()
+    except ValueError as e:
+        print(f"  ❌ Error: {e}")
+        return
+    print("  ✅ Connected to Supabase")
+
+    print_step(f"📂 Loading {args.input}...")
+    try:
+        df = read_wide(args.input)
+    except FileNotFoundError:
+        print(f"  ❌ Error: File not found: {args.input}")
+        return
+    names = df[COMPANY_COLUMN].dropna().unique()
+    print(f"  ✅ Loaded {len(df):,} rows for {len(names):,} companies")
+    unassigned = int(df[COMPANY_COLUMN].isna().sum())
+    if unassigned:
+        print(f"  ⚠️  {unassigned:,} rows have no company_name and are skipped")
+
+    print_step("🏢 Fetching company IDs...")
+    try:
+        company_mapping = fetch_company_map(supabase)
+    except ValueError as e:
+        # An empty companies table is fine when they are about to be created
+        if not args.create_companies:
+            print(f"  ❌ Error: {e}")
+            return
+        company_mapping = CompanyMap()
+    if args.create_companies:
+        company_mapping = create_missing_companies(supabase, company_mapping, names)
+    unknown = [name for name in names if name not in company_mapping]
+    print(f"  ✅ {len(names) - len(unknown):,} of {len(names):,} companies found")
+    if unknown:
+        print(f"  ⚠️  Unknown companies (rows rejected; see --create-companies): "
+              f"{', '.join(map(str, unknown[:10]))}{', ...' if len(unknown) > 10 else ''}")
+
+    print_step(f"📤 Loading {len(names):,} tenants, largest first...")
+    started = time.perf_counter()
+    results = load_tenants(supabase, df, company_mapping, args.input, args.workers, resume=args.resume,
+                           batch_size=args.batch_size, requests=args.requests_per_tenant)
+    elapsed = time.perf_counter() - started
+
+    inserted = sum(stats['inserted'] for stats in results)
+    errors = sum(stats['errors'] for stats in results)
+    print_step("📊 Per-company throughput:")
+    print('\n'.join(throughput_table(results)))
+
+    generate_log(results, elapsed, LOG_FILE, args.input, args.workers)
+    print_step(f"📄 Import log saved to: {LOG_FILE}")
+
+    print_header("✅ IMPORT COMPLETE!" if not errors else "⚠️  IMPORT FINISHED WITH ERRORS")
+    print(f"Loaded: {inserted:,} rows for {len(results):,} companies in {elapsed:.1f}s "
+          f"({inserted / elapsed if elapsed else 0.0:,.0f} rows/s)")
+    if errors:
+        print(f"Errors: {errors:,} (rerun with --resume to retry only the missing rows)")
+    print_header("")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,169 +1,193 @@
 #!/usr/bin/env python3
 """
 Import CSV data directly to Supabase using the API
+
+Usage:
+    python scripts/import_to_supabase.py
+    python scripts/import_to_supabase.py --backend copy [--copy-format csv] [--dsn postgresql://...]
+
+--backend copy writes over a direct Postgres connection ($SUPABASE_DB_URL or
+--dsn) instead of the API: companies and users are upserted with SQL and the
+respondents are streamed through one COPY (see postgres_copy.py).
 """
+import argparse
 import csv
-import os
-from pathlib import Path
-from supabase import create_client, Client
-
-# Load environment variables from .env.local
-def load_env():
-    env_file = Path('.env.local')
-    if env_file.exists():
-        with open(env_file) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key] = value
-    
-load_env()
-
-# Get Supabase credentials from environment
-SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_KEY = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("ERROR: Missing Supabase credentials!")
-    print("Please ensure .env.local contains:")
-    print("  NEXT_PUBLIC_SUPABASE_URL=your-url")
-    print("  NEXT_PUBLIC_SUPABASE_ANON_KEY=your-key")
-    exit(1)
+import time
+
+from importer_core import get_client, write_records
+from postgres_copy import COPY_FORMATS, connect, copy_rows
 
 # Company ID for Acme Corp
 COMPANY_ID = '550e8400-e29b-41d4-a716-446655440001'
 
-def setup_supabase() -> Client:
+SENTIMENT_CSV = 'data-foundation/sentiment_demo.csv'
+
+DEMO_COMPANIES = [
+    {
+        'id': '550e8400-e29b-41d4-a716-446655440001',
+        'name': 'acme-corp',
+        'display_name': 'Acme Corporation'
+    },
+    {
+        'id': '550e8400-e29b-41d4-a716-446655440002',
+        'name': 'tech-innovations',
+        'display_name': 'Tech Innovations'
+    },
+    {
+        'id': '550e8400-e29b-41d4-a716-446655440003',
+        'name': 'global-solutions',
+        'display_name': 'Global Solutions'
+    }
+]
+
+DEMO_USERS = [
+    {
+        'email': 'demo@acme-corp.com',
+        'password_hash': 'demo123',
+        'company_id': '550e8400-e29b-41d4-a716-446655440001',
+        'full_name': 'Sarah Johnson',
+        'role': 'Chief AI Officer'
+    },
+    {
+        'email': 'demo@tech-innovations.com',
+        'password_hash': 'demo123',
+        'company_id': '550e8400-e29b-41d4-a716-446655440002',
+        'full_name': 'Michael Chen',
+        'role': 'VP of Digital Transformation'
+    },
+    {
+        'email': 'demo@global-solutions.com',
+        'password_hash': 'demo123',
+        'company_id': '550e8400-e29b-41d4-a716-446655440003',
+        'full_name': 'Emma Rodriguez',
+        'role': 'Director of AI Strategy'
+    }
+]
+
+RESPONDENT_COLUMNS = [
+    'company_id', 'respondent_id', 'region', 'department', 'employment_type', 'age', 'user_language',
+] + [f'sentiment_{i}' for i in range(1, 26)]
+
+def setup_supabase():
     """Initialize Supabase client"""
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    try:
+        return get_client()
+    except ValueError:
+        print("ERROR: Missing Supabase credentials!")
+        print("Please ensure .env.local contains:")
+        print("  NEXT_PUBLIC_SUPABASE_URL=your-url")
+        print("  NEXT_PUBLIC_SUPABASE_ANON_KEY=your-key")
+        exit(1)
 
-def insert_companies(supabase: Client):
+def insert_companies(supabase):
     """Insert demo companies"""
     print("Inserting companies...")
-    companies = [
-        {
-            'id': '550e8400-e29b-41d4-a716-446655440001',
-            'name': 'acme-corp',
-            'display_name': 'Acme Corporation'
-        },
-        {
-            'id': '550e8400-e29b-41d4-a716-446655440002',
-            'name': 'tech-innovations',
-            'display_name': 'Tech Innovations'
-        },
-        {
-            'id': '550e8400-e29b-41d4-a716-446655440003',
-            'name': 'global-solutions',
-            'display_name': 'Global Solutions'
-        }
-    ]
-    
-    for company in companies:
-        try:
-            supabase.table('companies').upsert(company, on_conflict='name').execute()
-            print(f"  [OK] {company['display_name']}")
-        except Exception as e:
-            print(f"  [ERROR] {company['display_name']}: {str(e)}")
-
-def insert_users(supabase: Client):
+    stats = write_records(supabase, 'companies', DEMO_COMPANIES, on_conflict='name')
+    print(f"  [OK] {stats['inserted']} of {len(DEMO_COMPANIES)} companies")
+
+def insert_users(supabase):
     """Insert demo users"""
     print("\nInserting demo users...")
-    users = [
-        {
-            'email': 'demo@acme-corp.com',
-            'password_hash': 'demo123',
-            'company_id': '550e8400-e29b-41d4-a716-446655440001',
-            'full_name': 'Sarah Johnson',
-            'role': 'Chief AI Officer'
-        },
-        {
-            'email': 'demo@tech-innovations.com',
-            'password_hash': 'demo123',
-            'company_id': '550e8400-e29b-41d4-a716-446655440002',
-            'full_name': 'Michael Chen',
-            'role': 'VP of Digital Transformation'
-        },
-        {
-            'email': 'demo@global-solutions.com',
-            'password_hash': 'demo123',
-            'company_id': '550e8400-e29b-41d4-a716-446655440003',
-            'full_name': 'Emma Rodriguez',
-            'role': 'Director of AI Strategy'
-        }
-    ]
-    
-    for user in users:
-        try:
-            supabase.table('demo_users').upsert(user, on_conflict='email').execute()
-            print(f"  [OK] {user['email']}")
-        except Exception as e:
-            print(f"  [ERROR] {user['email']}: {str(e)}")
-
-def insert_respondents_batch(supabase: Client, csv_path: str, batch_size: int = 100):
+    stats = write_records(supabase, 'demo_users', DEMO_USERS, on_conflict='email')
+    print(f"  [OK] {stats['inserted']} of {len(DEMO_USERS)} users")
+
+def respondent_record(row: dict) -> dict:
+    """respondents row for one sentiment CSV row"""
+    respondent = {
+        'company_id': COMPANY_ID,
+        'respondent_id': row['RespondentID'],
+        'region': row['Region'],
+        'department': row['Department'],
+        'employment_type': row['Employment_type'],
+        'age': row['Age'],
+        'user_language': row['UserLanguage']
+    }
+
+    # Add sentiment scores
+    for i in range(1, 26):
+        sentiment_key = f'Sentiment_{i}'
+        value = row[sentiment_key]
+        respondent[f'sentiment_{i}'] = float(value) if value and value.strip() else None
+
+    return respondent
+
+def insert_respondents_batch(supabase, csv_path: str, batch_size: int = 100, workers: int = 4):
     """Insert respondents in batches"""
     print(f"\nImporting respondents from CSV (batch size: {batch_size})...")
-    
+    started = time.perf_counter()
+
+    with open(csv_path, 'r', encoding='utf-8') as csvfile:
+        records = [respondent_record(row) for row in csv.DictReader(csvfile)]
+
+    stats = write_records(supabase, 'respondents', records, batch_size, workers=workers)
+    total = stats['inserted']
+
+    elapsed = time.perf_counter() - started
+    print(f"\n[SUCCESS] Total respondents imported: {total} ({total / elapsed:,.0f} rows/s)")
+    if stats['errors']:
+        print(f"[ERROR] {stats['errors']} respondents failed")
+
+def upsert_demo_rows_sql(conn):
+    """Insert demo companies and users over a direct Postgres connection"""
+    print("Inserting companies and demo users...")
+    with conn.transaction(), conn.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO companies (id, name, display_name) VALUES (%(id)s, %(name)s, %(display_name)s) "
+            "ON CONFLICT (name) DO UPDATE SET display_name = EXCLUDED.display_name",
+            DEMO_COMPANIES,
+        )
+        cur.executemany(
+            "INSERT INTO demo_users (email, password_hash, company_id, full_name, role) "
+            "VALUES (%(email)s, %(password_hash)s, %(company_id)s, %(full_name)s, %(role)s) "
+            "ON CONFLICT (email) DO UPDATE SET password_hash = EXCLUDED.password_hash, "
+            "company_id = EXCLUDED.company_id, full_name = EXCLUDED.full_name, role = EXCLUDED.role",
+            DEMO_USERS,
+        )
+    print(f"  [OK] {len(DEMO_COMPANIES)} companies, {len(DEMO_USERS)} users")
+
+def copy_respondents(conn, csv_path: str, fmt: str = 'binary') -> dict:
+    """Stream respondents from the CSV into one COPY (rows are never all in memory)"""
+    print(f"\nImporting respondents from CSV with COPY ({fmt})...")
+
     with open(csv_path, 'r', encoding='utf-8') as csvfile:
         reader = csv.DictReader(csvfile)
-        
-        batch = []
-        total = 0
-        
-        for row in reader:
-            respondent = {
-                'company_id': COMPANY_ID,
-                'respondent_id': row['RespondentID'],
-                'region': row['Region'],
-                'department': row['Department'],
-                'employment_type': row['Employment_type'],
-                'age': row['Age'],
-                'user_language': row['UserLanguage']
-            }
-            
-            # Add sentiment scores
-            for i in range(1, 26):
-                sentiment_key = f'Sentiment_{i}'
-                value = row[sentiment_key]
-                respondent[f'sentiment_{i}'] = float(value) if value and value.strip() else None
-            
-            batch.append(respondent)
-            
-            # Insert batch when it reaches batch_size
-            if len(batch) >= batch_size:
-                try:
-                    supabase.table('respondents').insert(batch).execute()
-                    total += len(batch)
-                    print(f"  [OK] Imported {total} respondents...")
-                    batch = []
-                except Exception as e:
-                    print(f"  [ERROR] Error inserting batch: {str(e)}")
-                    batch = []
-        
-        # Insert remaining batch
-        if batch:
-            try:
-                supabase.table('respondents').insert(batch).execute()
-                total += len(batch)
-                print(f"  [OK] Imported {total} respondents...")
-            except Exception as e:
-                print(f"  [ERROR] Error inserting final batch: {str(e)}")
-        
-        print(f"\n[SUCCESS] Total respondents imported: {total}")
+        rows = (tuple(respondent_record(row).values()) for row in reader)
+        stats = copy_rows(conn, 'respondents', RESPONDENT_COLUMNS, rows, fmt=fmt)
+
+    if stats['errors'] == 0:
+        print(f"\n[SUCCESS] Total respondents imported: {stats['inserted']} "
+              f"({stats['rows_per_second']:,.0f} rows/s)")
+    else:
+        print(f"\n[ERROR] No respondents imported: {stats['error_details'][0]['error']}")
+    return stats
 
 def main():
+    parser = argparse.ArgumentParser(description="Import the sentiment demo data.")
+    parser.add_argument('--csv', default=SENTIMENT_CSV, help=f"Sentiment CSV (default: {SENTIMENT_CSV})")
+    parser.add_argument('--backend', choices=['postgrest', 'copy'], default='postgrest',
+                        help="Load through the Supabase API or a direct Postgres COPY (default: postgrest)")
+    parser.add_argument('--copy-format', choices=COPY_FORMATS, default='binary',
+                        help="COPY wire format for --backend copy (default: binary)")
+    parser.add_argument('--dsn', help="Postgres connection string for --backend copy (default: $SUPABASE_DB_URL)")
+    args = parser.parse_args()
+
     print("=" * 50)
     print("AI Navigator - Supabase Data Import")
     print("=" * 50)
-    
-    # Initialize Supabase
-    supabase = setup_supabase()
-    
-    # Insert data
-    insert_companies(supabase)
-    insert_users(supabase)
-    insert_respondents_batch(supabase, 'data-foundation/sentiment_demo.csv', batch_size=100)
-    
+
+    if args.backend == 'copy':
+        with connect(args.dsn) as conn:
+            upsert_demo_rows_sql(conn)
+            copy_respondents(conn, args.csv, args.copy_format)
+    else:
+        # Initialize Supabase
+        supabase = setup_supabase()
+
+        # Insert data
+        insert_companies(supabase)
+        insert_users(supabase)
+        insert_respondents_batch(supabase, args.csv, batch_size=100)
+
     print("\n" + "=" * 50)
     print("[SUCCESS] Import complete!")
     print("=" * 50)
@@ -178,4 +202,3 @@ if __name__ == '__main__':
         print("\n\nImport cancelled by user.")
     except Exception as e:
         print(f"\n[ERROR] {str(e)}")
-
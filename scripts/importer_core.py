@@ -0,0 +1,375 @@
+"""
+Importer Core
+=============
+
+Shared plumbing for the Supabase import scripts: environment loading, one
+pooled client per key, a cached two-way company lookup, HEAD-request row
+counts, and a batch writer for plain record lists.
+
+- Environment: .env.local, then .env, are read once. Variables that are
+  already set win, as with python-dotenv.
+- Client: supabase-py's PostgREST session is replaced by an httpx client
+  with an explicit keep-alive pool sized for the uploader's worker threads.
+  Every table(), rpc() and head_count() call goes through that pool, and so
+  does PostgrestTransport when it is handed the session.
+- Companies: fetched once per client as a CompanyMap. That is a plain
+  {name: uuid} dict (every existing call site keeps working) with the
+  reverse {uuid: name} lookup built once alongside it.
+- Batches: write_records() runs a list of records through
+  supabase_uploader.upload_dataframe(). Small loaders (taboos,
+  interventions, demo data) get the same retry, concurrency and stats as
+  the capability importers. rest_transport() posts the uploader's encoded
+  JSON over the pooled session, gzipped when the server accepts it. A
+  rejected batch is bisected so its good records are still written, and
+  the records that fail alone go to logs/<table>.rejected.jsonl
+  (dead_letter.py replays them).
+- Staged reloads: begin_staged_load() / publish_staged_load() (and
+  publish_staged_loads() for tables published together) wrap the
+  migration 010 RPCs, and reload_records() combines them with
+  write_records(). A full reload is written to <table>_staging and then
+  swapped into the live table in one transaction.
+
+Usage:
+    from importer_core import fetch_company_map, get_client, write_records
+
+    supabase = get_client()                      # or get_client(SERVICE_KEY_ENV)
+    companies = fetch_company_map(supabase)
+    companies.name_of(company_id)
+    stats = write_records(supabase, 'taboos', records, batch_size=20)
+"""
+
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+from dead_letter import DeadLetterFile, dead_letter_path
+from supabase_uploader import BatchSizer, PostgrestTransport, upload_dataframe
+
+ENV_FILES = ('.env.local', '.env')
+URL_ENV = 'NEXT_PUBLIC_SUPABASE_URL'
+ANON_KEY_ENV = 'NEXT_PUBLIC_SUPABASE_ANON_KEY'
+SERVICE_KEY_ENV = 'SUPABASE_SERVICE_ROLE_KEY'
+
+POOL_CONNECTIONS = 16  # Keep-alive connections per client (≥ uploader workers + scan threads)
+KEEPALIVE_EXPIRY = 60.0  # Seconds an idle connection is kept open
+REQUEST_TIMEOUT = 120.0
+COMPRESS_REQUESTS = True  # gzip batch bodies (falls back to plain JSON if the server refuses)
+STAGING_SUFFIX = '_staging'  # Staging tables from supabase/migrations/010_staged_reload.sql
+MISSING_FUNCTION_CODES = {'PGRST202', '42883'}  # RPC not in PostgREST's schema cache / undefined function
+
+_clients = {}
+_clients_lock = threading.Lock()
+_env_loaded = False
+
+
+def print_header(text: str):
+    """Print formatted header"""
+    print("=" * 80)
+    print(text)
+    print("=" * 80)
+
+
+def print_step(text: str):
+    """Print formatted step"""
+    print(f"\n{text}")
+
+
+def load_env(paths=ENV_FILES):
+    """Read KEY=value lines from the env files into os.environ (existing variables win)."""
+    global _env_loaded
+    for path in paths:
+        env_file = Path(path)
+        if not env_file.exists():
+            continue
+        with open(env_file) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, value = line.split('=', 1)
+                    key = key.strip().removeprefix('export ').strip()
+                    os.environ.setdefault(key, value.strip().strip('"\''))
+    _env_loaded = True
+
+
+def credentials(key_env: str = ANON_KEY_ENV) -> tuple:
+    """
+    Supabase URL and API key from the environment (env files are loaded first).
+
+    Args:
+        key_env: Variable holding the key (ANON_KEY_ENV or SERVICE_KEY_ENV)
+
+    Returns:
+        tuple: (url, key)
+    """
+    if not _env_loaded:
+        load_env()
+
+    url = os.environ.get(URL_ENV)
+    key = os.environ.get(key_env)
+    if not url or not key:
+        raise ValueError(
+            f"Missing Supabase credentials. Set {URL_ENV} and {key_env} "
+            f"(environment or .env.local)."
+        )
+    return url, key
+
+
+def get_client(key_env: str = ANON_KEY_ENV):
+    """
+    Shared supabase-py client for key_env, created on first use.
+
+    Its PostgREST requests go through a keep-alive pool of POOL_CONNECTIONS
+    connections, so concurrent batches reuse open TLS connections instead
+    of opening new ones.
+    """
+    url, key = credentials(key_env)
+    with _clients_lock:
+        client = _clients.get((url, key))
+        if client is None:
+            import httpx
+            from supabase import create_client
+
+            client = create_client(url, key)
+            rest = client.postgrest
+            session = rest.session
+            rest.session = httpx.Client(
+                base_url=session.base_url,
+                headers=session.headers,
+                timeout=REQUEST_TIMEOUT,
+                limits=httpx.Limits(max_connections=POOL_CONNECTIONS,
+                                    max_keepalive_connections=POOL_CONNECTIONS,
+                                    keepalive_expiry=KEEPALIVE_EXPIRY),
+            )
+            session.close()
+            _clients[(url, key)] = client
+    return client
+
+
+def http_session(client):
+    """The client's pooled httpx session (base URL is the REST endpoint)."""
+    return client.postgrest.session
+
+
+class CompanyMap(dict):
+    """
+    Company name → UUID mapping with the UUID → name lookup kept alongside.
+
+    A dict subclass, so it can be passed wherever a {name: uuid} mapping is
+    expected (e.g. Series.map).
+    """
+
+    def __init__(self, rows=()):
+        super().__init__(rows)
+        self.by_id = {company_id: name for name, company_id in self.items()}
+
+    def name_of(self, company_id: str) -> str:
+        """Company name for a UUID (None if unknown)."""
+        return self.by_id.get(company_id)
+
+    def names(self, company_ids) -> pd.Series:
+        """Company names for a sequence of UUIDs, vectorized."""
+        return pd.Series(company_ids, dtype=object).map(self.by_id)
+
+
+@lru_cache(maxsize=None)
+def fetch_company_map(client) -> CompanyMap:
+    """
+    Company mapping from the companies table, fetched once per client.
+
+    Returns:
+        CompanyMap: {company_name: company_uuid}
+    """
+    response = client.table('companies').select('id,name').execute()
+    if not response.data:
+        raise ValueError("No companies found in database. Run demo schema migration first.")
+    return CompanyMap((company['name'], company['id']) for company in response.data)
+
+
+def head_count(client, table: str, filters: dict = None) -> int:
+    """
+    Exact row count from a PostgREST HEAD request (no rows are transferred).
+
+    Args:
+        client: Supabase client (its pooled session is used)
+        table: Table to count
+        filters: PostgREST query filters, e.g. {'construct_1': 'not.is.null'}
+
+    Returns:
+        int: Rows matching the filters
+    """
+    response = http_session(client).head(
+        table,
+        params={'select': '*', **(filters or {})},
+        headers={'Prefer': 'count=exact'},
+    )
+    response.raise_for_status()
+    # Content-Range: "<first>-<last>/<total>" or "*/<total>"
+    return int(response.headers['Content-Range'].rsplit('/', 1)[1])
+
+
+def rest_transport(client, table: str, on_conflict: str = None, compress: bool = COMPRESS_REQUESTS):
+    """
+    PostgrestTransport for table over the client's pooled session.
+
+    The session's default headers carry the API key, so none is passed.
+    """
+    session = http_session(client)
+    return PostgrestTransport(str(session.base_url), None, table, timeout=REQUEST_TIMEOUT, rest_path='',
+                              on_conflict=on_conflict, client=session, compress=compress)
+
+
+def batched(rows, size: int):
+    """Yield lists of up to size rows from any row iterable."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_records(client, table: str, records: list, batch_size: int = 500, on_conflict: str = None,
+                  workers: int = 1, on_result=None, dead_letter: DeadLetterFile = None) -> dict:
+    """
+    Insert (or, given on_conflict, upsert) a list of records in fixed-size batches.
+
+    Batches go through supabase_uploader.upload_dataframe() and
+    rest_transport(), so they are encoded once, retried on transient errors
+    and up to `workers` run concurrently. A rejected batch is bisected, so
+    one bad record costs a few requests rather than its whole batch.
+
+    Args:
+        client: Supabase client
+        table: Target table
+        records: Row dicts
+        batch_size: Records per request
+        on_conflict: Comma-separated unique-constraint columns to upsert on
+        workers: Concurrent requests
+        on_result: Optional callback(result dict) after each batch;
+                   result['batch']['index'] holds the batch's record positions
+                   and supabase_uploader.committed_mask(result) which were written
+        dead_letter: Where rejected records go (default:
+                     logs/<table>.rejected.jsonl)
+
+    Returns:
+        dict: Import statistics with the keys of upload_dataframe()
+    """
+    transport = rest_transport(client, table, on_conflict=on_conflict)
+    positions = pd.DataFrame(index=pd.RangeIndex(len(records)))
+    if dead_letter is None:
+        dead_letter = DeadLetterFile(dead_letter_path(table), table, on_conflict)
+
+    return upload_dataframe(
+        positions,
+        lambda batch_df: ([records[i] for i in batch_df.index], []),
+        transport,
+        workers=workers,
+        sizer=BatchSizer(initial_rows=batch_size, min_rows=batch_size, max_rows=batch_size),
+        on_result=on_result,
+        dead_letter=dead_letter,
+    )
+
+
+def staging_table(table: str) -> str:
+    """Name of table's staging table."""
+    return f"{table}{STAGING_SUFFIX}"
+
+
+def staged_load_missing(error: Exception) -> bool:
+    """True if error says the migration 010 functions do not exist."""
+    return str(getattr(error, 'code', '') or '') in MISSING_FUNCTION_CODES
+
+
+def begin_staged_load(client, table: str) -> str:
+    """
+    Empty table's staging table for a new staged reload.
+
+    Raises if migration 010_staged_reload.sql is not applied (callers may
+    fall back to clearing the live table when staged_load_missing() says
+    so) or the call fails for any other reason.
+
+    Returns:
+        str: Staging table to write the new rows to
+    """
+    client.rpc('staged_load_begin', {'target': table}).execute()
+    return staging_table(table)
+
+
+def publish_staged_load(client, table: str, expected_rows: int) -> int:
+    """
+    Replace table's rows with its staging table's, in one transaction.
+
+    The database refuses (and the live table keeps its rows) unless staging
+    holds exactly expected_rows rows.
+
+    Returns:
+        int: Rows published
+    """
+    response = client.rpc('staged_load_publish', {'target': table, 'expected_rows': expected_rows}).execute()
+    return response.data
+
+
+def publish_staged_loads(client, expected_rows: dict) -> dict:
+    """
+    Publish several staged tables in one transaction (staged_load_publish_all).
+
+    Tables are published in the order given, so list referenced tables
+    before the tables that reference them. Nothing is published unless
+    every staging table holds exactly its expected row count.
+
+    Args:
+        expected_rows: {table: expected rows}
+
+    Returns:
+        dict: {table: rows published}
+    """
+    targets = list(expected_rows)
+    response = client.rpc('staged_load_publish_all', {
+        'targets': targets,
+        'expected_rows': [expected_rows[table] for table in targets],
+    }).execute()
+    return dict(zip(targets, response.data))
+
+
+def reload_records(client, table: str, records: list, batch_size: int = 500) -> dict:
+    """
+    Replace every row of table with records, through its staging table.
+
+    The records are written to <table>_staging and published in one
+    transaction, so readers see the old rows until the new ones are all in.
+    If any record is rejected, nothing is published: the live table keeps
+    its rows and the rejects go to the staging table's dead-letter file
+    (which dead_letter.py refuses to replay; rerun the reload). If
+    migration 010 is not applied, the live table is cleared and reloaded
+    directly instead (table must have a uuid id column).
+
+    Returns:
+        dict: write_records() statistics plus 'published' (rows now live;
+              0 when the staged rows were not published)
+    """
+    try:
+        target = begin_staged_load(client, table)
+    except Exception as e:
+        if not staged_load_missing(e):
+            raise
+        print(f"  ⚠️  Staged reload unavailable ({e}); apply migration 010_staged_reload.sql. "
+              f"Clearing {table} first instead.")
+        client.table(table).delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
+        stats = write_records(client, table, records, batch_size)
+        stats['published'] = stats['inserted']
+        return stats
+
+    dead_letter = DeadLetterFile(dead_letter_path(target), target)
+    stats = write_records(client, target, records, batch_size, dead_letter=dead_letter)
+    if stats['errors']:
+        stats['published'] = 0
+        print(f"  ⚠️  {stats['errors']} records failed; {table} left unchanged (not published)")
+        return stats
+    stats['published'] = publish_staged_load(client, table, len(records))
+    print(f"  🔁 Published {stats['published']} rows from {target} to {table}")
+    return stats
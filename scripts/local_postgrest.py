@@ -0,0 +1,802 @@
+#!/usr/bin/env python3
+"""
+Local PostgREST Stand-in
+========================
+
+An in-memory server that speaks the part of the PostgREST API the import
+scripts use, so they can be run and measured without a Supabase project.
+Standard library only.
+
+- Tables: select (columns, order, limit/offset, max rows), insert, upsert
+  (on_conflict with merge-duplicates or ignore-duplicates), update
+  (PATCH) and delete. Filters eq, neq, gt, gte, lt, lte, in, is and like,
+  any of them negated with not. Prefer: count=exact and return=minimal or
+  return=representation, and gzip request bodies.
+- Tables are schemaless. Each row is the JSON object that was written,
+  plus a generated uuid id. The primary and unique keys below are taken
+  from supabase/migrations and enforced (23505). A request is applied
+  completely or not at all.
+- RPCs: staged_load_begin, staged_load_publish, staged_load_publish_all
+  (migration 010) and
+  capability_construct_stats (migration 009).
+- Latency (--latency, --jitter), transient errors (--error-rate → 503) and
+  rejected rows (--fail-value → 400 check violation for any batch holding
+  that value) can be injected.
+- Request, byte and row counters are served at GET /_standin/stats.
+  POST /_standin/reset clears them (and the tables with {"data": true}),
+  and POST /_standin/config changes the injection settings while running.
+
+Column types, defaults other than id, foreign keys and RLS are not
+modelled: the stand-in measures the importers' client side, not Postgres.
+
+Usage:
+    python scripts/local_postgrest.py --port 54321 --latency 0.02
+    export NEXT_PUBLIC_SUPABASE_URL=http://127.0.0.1:54321
+    export NEXT_PUBLIC_SUPABASE_ANON_KEY=<key printed at startup>
+    python scripts/import_capability_wide.py
+
+    from local_postgrest import start_server
+    server, url = start_server(latency=0.01)
+"""
+
+import argparse
+import base64
+import csv
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+REST_PREFIX = '/rest/v1/'
+CONTROL_PREFIX = '/_standin/'
+DEFAULT_PORT = 54321
+MAX_ROWS = 1000  # Supabase's default max-rows for a GET
+
+
+def _jwt_segment(payload: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+# JWT-shaped (unsigned) key: supabase-py refuses keys that do not look like one
+STANDIN_KEY = '.'.join([
+    _jwt_segment({'alg': 'HS256', 'typ': 'JWT'}),
+    _jwt_segment({'iss': 'local-postgrest', 'role': 'service_role'}),
+    'local-standin',
+])
+
+# Primary key and unique constraints per table (supabase/migrations)
+TABLE_KEYS = {
+    'companies': (('id',), [('name',)]),
+    'demo_users': (('id',), [('email',)]),
+    'respondents': (('id',), [('company_id', 'respondent_id')]),
+    'capability_scores': (('id',), [('company_id', 'respondent_id', 'construct_id')]),
+    'capability_scores_staging': (('id',), [('company_id', 'respondent_id', 'construct_id')]),
+    'taboos': (('id',), [('name',)]),
+    'taboos_staging': (('id',), [('name',)]),
+    'interventions': (('id',), [('code',)]),
+    'intervention_sentiment_mappings': (('id',), [('level_id', 'category_id')]),
+    'intervention_capability_mappings': (('id',), [('dimension_id',)]),
+    'intervention_next_steps': (('id',), [('intervention_code',)]),
+    'capability_dimensions': (('dimension_id',), []),
+    'capability_constructs': (('construct_id',), []),
+    'capability_respondent_profiles': (('respondent_id',), []),
+    'capability_score_values': (('respondent_id', 'construct_id'), []),
+    'capability_score_values_staging': (('respondent_id', 'construct_id'), []),
+    'capability_respondent_profiles_staging': (('respondent_id',), []),
+}
+
+STAGING_SUFFIX = '_staging'
+CONSTRUCT_COLUMN = re.compile(r'^construct_(\d+)$')
+
+
+class StandinError(Exception):
+    """A PostgREST-style error response."""
+
+    def __init__(self, status: int, code: str, message: str, details: str = None):
+        super().__init__(message)
+        self.status = status
+        self.body = {'code': code, 'message': message, 'details': details, 'hint': None}
+
+
+class Table:
+    """Rows of one table in insertion order, with an index per key."""
+
+    def __init__(self, name: str, primary_key: tuple, unique=()):
+        self.name = name
+        self.primary_key = primary_key
+        self.keys = [primary_key] + list(unique)
+        self.rows = {}  # row number → row
+        self.indexes = {key: {} for key in self.keys}
+        self._next = 0
+
+    @staticmethod
+    def key_of(row: dict, key: tuple):
+        """The row's values for key, or None if any is NULL (NULLs never conflict)."""
+        values = tuple(row.get(col) for col in key)
+        return None if any(value is None for value in values) else values
+
+    def find(self, key: tuple, row: dict):
+        values = self.key_of(row, key)
+        return None if values is None else self.indexes[key].get(values)
+
+    def conflicts(self, row: dict, number=None):
+        """First key on which row collides with a row other than number."""
+        for key in self.keys:
+            found = self.find(key, row)
+            if found is not None and found != number:
+                return key
+        return None
+
+    def _index(self, number: int, row: dict):
+        for key in self.keys:
+            values = self.key_of(row, key)
+            if values is not None:
+                self.indexes[key][values] = number
+
+    def _unindex(self, number: int, row: dict):
+        for key in self.keys:
+            values = self.key_of(row, key)
+            if values is not None and self.indexes[key].get(values) == number:
+                del self.indexes[key][values]
+
+    def insert(self, row: dict) -> int:
+        number = self._next
+        self._next += 1
+        self.rows[number] = row
+        self._index(number, row)
+        return number
+
+    def replace(self, number: int, row: dict):
+        self._unindex(number, self.rows[number])
+        self.rows[number] = row
+        self._index(number, row)
+
+    def delete(self, number: int):
+        self._unindex(number, self.rows.pop(number))
+
+    def clear(self):
+        self.rows.clear()
+        for index in self.indexes.values():
+            index.clear()
+
+
+def missing_key_defaults(table: Table, row: dict) -> dict:
+    """Generate a uuid id, as uuid_generate_v4()/gen_random_uuid() defaults do."""
+    if table.primary_key == ('id',) and row.get('id') is None:
+        row['id'] = str(uuid.uuid4())
+    return row
+
+
+# ----------------------------------------------------------------------------
+# Filters
+# ----------------------------------------------------------------------------
+
+def split_list(text: str) -> list:
+    """Values of an in.(...) filter (double-quoted values may hold commas)."""
+    return next(csv.reader([text], skipinitialspace=True)) if text else []
+
+
+def coerce(arg: str, value):
+    """A filter argument in the type of the row value it is compared with."""
+    if isinstance(value, bool):
+        return arg.lower() == 'true'
+    if isinstance(value, (int, float)):
+        try:
+            return float(arg)
+        except ValueError:
+            return arg
+    return arg
+
+
+def like_pattern(pattern: str, ignore_case: bool) -> re.Pattern:
+    """SQL LIKE pattern (* is accepted for %, as in PostgREST URLs)."""
+    expression = ''.join('.*' if ch in '%*' else '.' if ch == '_' else re.escape(ch) for ch in pattern)
+    return re.compile(f'^{expression}$', re.S | (re.I if ignore_case else 0))
+
+
+def parse_filter(column: str, expression: str):
+    """column=[not.]op.arg → a predicate on rows."""
+    negate = expression.startswith('not.')
+    if negate:
+        expression = expression[4:]
+    op, _, arg = expression.partition('.')
+
+    if op == 'is':
+        target = {'null': None, 'true': True, 'false': False}.get(arg.lower(), 'unknown')
+        test = lambda value: value is target if target is not None else value is None
+    elif op == 'in':
+        options = split_list(arg.strip('()'))
+        by_type = {}  # row value type → options coerced to it, as a set
+
+        def test(value):
+            if value is None:
+                return False
+            kind = type(value)
+            if kind not in by_type:
+                by_type[kind] = {coerce(option, value) for option in options}
+            return value in by_type[kind]
+    elif op in ('like', 'ilike'):
+        pattern = like_pattern(arg, op == 'ilike')
+        test = lambda value: value is not None and bool(pattern.match(str(value)))
+    elif op in ('eq', 'neq', 'gt', 'gte', 'lt', 'lte'):
+        compare = {
+            'eq': lambda a, b: a == b, 'neq': lambda a, b: a != b,
+            'gt': lambda a, b: a > b, 'gte': lambda a, b: a >= b,
+            'lt': lambda a, b: a < b, 'lte': lambda a, b: a <= b,
+        }[op]
+
+        def test(value):
+            if value is None:
+                return False  # SQL: comparisons with NULL are not true
+            try:
+                return compare(value, coerce(arg, value))
+            except TypeError:
+                return False
+    else:
+        raise StandinError(400, 'PGRST100', f'"failed to parse filter ({op}.{arg})"')
+
+    if negate:
+        return lambda row: not test(row.get(column))
+    return lambda row: test(row.get(column))
+
+
+def parse_order(text: str) -> list:
+    """order=col[.asc|.desc][.nullsfirst|.nullslast],... → [(column, descending, nulls_first)]"""
+    terms = []
+    for term in text.split(','):
+        parts = term.strip().split('.')
+        descending = 'desc' in parts[1:]
+        nulls_first = 'nullsfirst' in parts[1:] or (descending and 'nullslast' not in parts[1:])
+        terms.append((parts[0], descending, nulls_first))
+    return terms
+
+
+def sort_rows(rows: list, order: list) -> list:
+    for column, descending, nulls_first in reversed(order):
+        present = [row for row in rows if row.get(column) is not None]
+        nulls = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: row[column], reverse=descending)
+        rows = nulls + present if nulls_first else present + nulls
+    return rows
+
+
+def project(rows: list, select: str) -> list:
+    """Apply select=col1,col2 (or *) to rows."""
+    if not select or select.strip() == '*':
+        return [dict(row) for row in rows]
+    columns = [col.strip() for col in select.split(',') if col.strip()]
+    return [{col: row.get(col) for col in columns} for row in rows]
+
+
+class Query:
+    """The parsed query string of a table request."""
+
+    RESERVED = {'select', 'order', 'limit', 'offset', 'on_conflict', 'columns'}
+
+    def __init__(self, pairs: list):
+        self.params = {}
+        self.filters = []
+        for name, value in pairs:
+            if name in self.RESERVED:
+                self.params[name] = value
+            else:
+                self.filters.append(parse_filter(name, value))
+
+    def matches(self, row: dict) -> bool:
+        return all(test(row) for test in self.filters)
+
+
+# ----------------------------------------------------------------------------
+# Store
+# ----------------------------------------------------------------------------
+
+class Store:
+    """All tables, behind one lock (each request is one transaction)."""
+
+    def __init__(self, table_keys: dict = None):
+        self.lock = threading.Lock()
+        self.tables = {
+            name: Table(name, primary_key, unique)
+            for name, (primary_key, unique) in (table_keys or TABLE_KEYS).items()
+        }
+
+    def table(self, name: str) -> Table:
+        try:
+            return self.tables[name]
+        except KeyError:
+            raise StandinError(404, '42P01', f'relation "public.{name}" does not exist')
+
+    def select(self, name: str, query: Query, max_rows: int) -> tuple:
+        """(rows for the response, total matching rows)"""
+        table = self.table(name)
+        rows = [row for row in table.rows.values() if query.matches(row)]
+        total = len(rows)
+        if 'order' in query.params:
+            rows = sort_rows(rows, parse_order(query.params['order']))
+        offset = int(query.params.get('offset', 0))
+        limit = int(query.params['limit']) if 'limit' in query.params else None
+        if max_rows:
+            limit = max_rows if limit is None else min(limit, max_rows)
+        rows = rows[offset:offset + limit if limit is not None else None]
+        return project(rows, query.params.get('select')), total
+
+    def count(self, name: str, query: Query, max_rows: int) -> tuple:
+        """(rows a select would return, total matching rows), without building them (HEAD)"""
+        table = self.table(name)
+        total = sum(1 for row in table.rows.values() if query.matches(row))
+        offset = int(query.params.get('offset', 0))
+        limit = int(query.params['limit']) if 'limit' in query.params else None
+        if max_rows:
+            limit = max_rows if limit is None else min(limit, max_rows)
+        returned = max(0, total - offset)
+        return (returned if limit is None else min(returned, limit)), total
+
+    def write(self, name: str, records: list, on_conflict: str = None, resolution: str = None,
+              columns: list = None) -> list:
+        """
+        Insert or upsert records; all of them or none.
+
+        Like json_populate_recordset, every record gets the columns of the
+        first one (or ?columns=), missing values becoming NULL.
+        """
+        table = self.table(name)
+        if not records:
+            return []
+        columns = columns or list(records[0])
+        target = tuple(col.strip() for col in on_conflict.split(',')) if on_conflict else table.primary_key
+        if resolution and target not in table.keys:
+            raise StandinError(400, '42P10', "there is no unique or exclusion constraint matching "
+                                             "the ON CONFLICT specification")
+
+        undo = []
+        touched = set()
+        written = []
+        try:
+            for record in records:
+                row = {col: record.get(col) for col in columns}
+                existing = table.find(target, row) if resolution else None
+                if existing is not None:
+                    if resolution == 'ignore-duplicates':
+                        continue
+                    if existing in touched:
+                        raise StandinError(400, '21000', "ON CONFLICT DO UPDATE command cannot affect "
+                                                         "row a second time")
+                    old = table.rows[existing]
+                    new = {**old, **row}
+                    clash = table.conflicts(new, existing)
+                    if clash:
+                        raise self._duplicate(name, clash, new)
+                    table.replace(existing, new)
+                    undo.append(('replace', existing, old))
+                    touched.add(existing)
+                    written.append(new)
+                else:
+                    row = missing_key_defaults(table, row)
+                    clash = table.conflicts(row)
+                    if clash:
+                        raise self._duplicate(name, clash, row)
+                    number = table.insert(row)
+                    undo.append(('insert', number, None))
+                    touched.add(number)
+                    written.append(row)
+        except StandinError:
+            self._rollback(table, undo)
+            raise
+        return written
+
+    def update(self, name: str, query: Query, changes: dict) -> list:
+        table = self.table(name)
+        undo = []
+        updated = []
+        try:
+            for number, row in list(table.rows.items()):
+                if query.matches(row):
+                    new = {**row, **changes}
+                    clash = table.conflicts(new, number)
+                    if clash:
+                        raise self._duplicate(name, clash, new)
+                    table.replace(number, new)
+                    undo.append(('replace', number, row))
+                    updated.append(new)
+        except StandinError:
+            self._rollback(table, undo)
+            raise
+        return updated
+
+    def delete(self, name: str, query: Query) -> list:
+        table = self.table(name)
+        deleted = []
+        for number, row in list(table.rows.items()):
+            if query.matches(row):
+                table.delete(number)
+                deleted.append(row)
+        return deleted
+
+    @staticmethod
+    def _duplicate(name: str, key: tuple, row: dict) -> StandinError:
+        values = ', '.join(str(row.get(col)) for col in key)
+        return StandinError(409, '23505', f'duplicate key value violates unique constraint "{name}_key"',
+                            f"Key ({', '.join(key)})=({values}) already exists.")
+
+    @staticmethod
+    def _rollback(table: Table, undo: list):
+        for action, number, old in reversed(undo):
+            if action == 'insert':
+                table.delete(number)
+            else:
+                table.replace(number, old)
+
+    # RPCs ---------------------------------------------------------------
+
+    def staged_load_begin(self, target: str):
+        self._staging(target).clear()
+        return None
+
+    def staged_load_publish(self, target: str, expected_rows: int) -> int:
+        staging = self._staging(target)
+        if len(staging.rows) != int(expected_rows):
+            raise StandinError(400, 'P0001', f"Staging table {staging.name} holds {len(staging.rows)} rows, "
+                                             f"expected {expected_rows}; nothing published")
+        live = self.table(target)
+        live.clear()
+        for row in staging.rows.values():
+            live.insert(dict(row))
+        staging.clear()
+        return len(live.rows)
+
+    def staged_load_publish_all(self, targets: list, expected_rows: list) -> list:
+        if len(targets) != len(expected_rows):
+            raise StandinError(400, 'P0001', "targets and expected_rows must have the same length")
+        for target, expected in zip(targets, expected_rows):
+            staging = self._staging(target)
+            if len(staging.rows) != int(expected):
+                raise StandinError(400, 'P0001', f"Staging table {staging.name} holds {len(staging.rows)} rows, "
+                                                 f"expected {expected}; nothing published")
+        return [self.staged_load_publish(target, expected) for target, expected in zip(targets, expected_rows)]
+
+    def capability_construct_stats(self) -> list:
+        respondents = [row for row in self.table('respondents').rows.values()
+                       if row.get('construct_1') is not None]
+        constructs = sorted({col for row in respondents for col in row if CONSTRUCT_COLUMN.match(col)},
+                            key=lambda col: int(CONSTRUCT_COLUMN.match(col).group(1)))
+        stats = []
+        for col in constructs:
+            scores = [row[col] for row in respondents if row.get(col) is not None]
+            stats.append({
+                'construct': col,
+                'respondents': len(respondents),
+                'null_count': len(respondents) - len(scores),
+                'min_score': min(scores) if scores else None,
+                'max_score': max(scores) if scores else None,
+                'mean_score': sum(scores) / len(scores) if scores else None,
+            })
+        return stats
+
+    def _staging(self, target: str) -> Table:
+        if target + STAGING_SUFFIX not in self.tables:
+            raise StandinError(400, 'P0001', f"No staging table for {target}")
+        return self.tables[target + STAGING_SUFFIX]
+
+    def rpc(self, function: str, args: dict):
+        if function == 'staged_load_begin':
+            return self.staged_load_begin(args['target'])
+        if function == 'staged_load_publish':
+            return self.staged_load_publish(args['target'], args['expected_rows'])
+        if function == 'staged_load_publish_all':
+            return self.staged_load_publish_all(args['targets'], args['expected_rows'])
+        if function == 'capability_construct_stats':
+            return self.capability_construct_stats()
+        raise StandinError(404, 'PGRST202', f"Could not find the function public.{function} in the schema cache")
+
+
+# ----------------------------------------------------------------------------
+# Server
+# ----------------------------------------------------------------------------
+
+def new_stats() -> dict:
+    return {
+        'requests': 0,
+        'requests_by_method': {},
+        'bytes_received': 0,  # Request bodies as sent (gzipped or not)
+        'bytes_decoded': 0,  # Request bodies after decompression
+        'bytes_sent': 0,  # Response bodies
+        'gzip_requests': 0,
+        'rows_written': 0,  # Inserted, upserted or updated
+        'rows_deleted': 0,
+        'rows_read': 0,
+        'errors': 0,
+        'injected_errors': 0,
+        'rows_by_table': {},
+    }
+
+
+class StandinServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer holding the store, the injection settings and the counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 fail_value: str = None, max_rows: int = MAX_ROWS, accept_gzip: bool = True, seed: int = None):
+        super().__init__(address, StandinHandler)
+        self.store = Store()
+        self.config = {
+            'latency': latency,
+            'jitter': jitter,
+            'error_rate': error_rate,
+            'fail_value': fail_value,
+            'max_rows': max_rows,
+            'accept_gzip': accept_gzip,
+        }
+        self.random = random.Random(seed)
+        self.stats = new_stats()
+        self.stats_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, **changes):
+        with self.stats_lock:
+            for name, value in changes.items():
+                self.stats[name] += value
+
+    def snapshot(self) -> dict:
+        """Copy of the counters, with the current row count of every non-empty table."""
+        with self.stats_lock:
+            stats = json.loads(json.dumps(self.stats))
+        with self.store.lock:
+            stats['table_rows'] = {name: len(table.rows) for name, table in self.store.tables.items() if table.rows}
+        return stats
+
+    def reset(self, data: bool = False):
+        """Zero the counters (and empty every table if data)."""
+        with self.stats_lock:
+            self.stats = new_stats()
+        if data:
+            with self.store.lock:
+                for table in self.store.tables.values():
+                    table.clear()
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, as the importers' pooled clients expect
+    server_version = 'local-postgrest'
+
+    def log_message(self, format, *args):
+        pass
+
+    # Plumbing -------------------------------------------------------------
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        self.server.count(bytes_received=len(raw))
+        if raw and self.headers.get('Content-Encoding') == 'gzip':
+            self.server.count(gzip_requests=1)
+            if not self.server.config['accept_gzip']:
+                raise StandinError(415, 'PGRST102', 'Content-Encoding gzip is not supported')
+            raw = gzip.decompress(raw)
+        self.server.count(bytes_decoded=len(raw))
+        return raw
+
+    def json_body(self):
+        raw = self.read_body()
+        if not raw:
+            return {}
+        try:
+            return json.loads(raw)
+        except ValueError:
+            raise StandinError(400, 'PGRST102', 'Empty or invalid json')
+
+    def prefer(self) -> dict:
+        tokens = [token.strip() for token in self.headers.get('Prefer', '').split(',') if token.strip()]
+        return dict(token.partition('=')[::2] for token in tokens)
+
+    def reply(self, status: int, payload=None, headers=None):
+        if self.command == 'HEAD' or (payload is None and status == 204):
+            body = b''
+        else:
+            body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count(bytes_sent=len(body))
+
+    def route(self):
+        parts = urlsplit(self.path)
+        return parts.path, parse_qsl(parts.query, keep_blank_values=True)
+
+    def handle_request(self, method: str):
+        path, pairs = self.route()
+        if path.startswith(CONTROL_PREFIX):
+            return self.control(path[len(CONTROL_PREFIX):])
+
+        with self.server.stats_lock:
+            self.server.stats['requests'] += 1
+            by_method = self.server.stats['requests_by_method']
+            by_method[method] = by_method.get(method, 0) + 1
+
+        try:
+            body = self.json_body() if method in ('POST', 'PATCH') else self.read_body()
+            self.inject(body)
+            if not path.startswith(REST_PREFIX):
+                raise StandinError(404, 'PGRST000', f"Not found: {path}")
+            resource = path[len(REST_PREFIX):].strip('/')
+            if resource.startswith('rpc/'):
+                return self.rpc(resource[4:], body)
+            self.table_request(method, resource, Query(pairs), body)
+        except StandinError as e:
+            self.server.count(errors=1)
+            self.reply(e.status, e.body)
+
+    def inject(self, body):
+        """Latency, random transient errors and rows rejected for a value."""
+        config = self.server.config
+        if config['latency'] or config['jitter']:
+            time.sleep(config['latency'] + self.server.random.uniform(0, config['jitter']))
+        if config['error_rate'] and self.server.random.random() < config['error_rate']:
+            self.server.count(injected_errors=1)
+            raise StandinError(503, 'PGRST000', 'Injected transient failure')
+        fail_value = config['fail_value']
+        if fail_value is not None and isinstance(body, (list, dict)):
+            records = body if isinstance(body, list) else [body]
+            if any(fail_value in map(str, record.values()) for record in records if isinstance(record, dict)):
+                self.server.count(injected_errors=1)
+                raise StandinError(400, '23514', 'new row violates check constraint (injected)',
+                                   f"A value equals {fail_value}")
+
+    # PostgREST ------------------------------------------------------------
+
+    def table_request(self, method: str, name: str, query: Query, body):
+        store = self.server.store
+        prefer = self.prefer()
+        representation = prefer.get('return') == 'representation'
+
+        if method in ('GET', 'HEAD'):
+            # HEAD only needs the counts for Content-Range: no rows are built, read or sent
+            with store.lock:
+                if method == 'HEAD':
+                    rows = None
+                    returned, total = store.count(name, query, self.server.config['max_rows'])
+                else:
+                    rows, total = store.select(name, query, self.server.config['max_rows'])
+                    returned = len(rows)
+            self.server.count(rows_read=returned if rows is not None else 0)
+            offset = int(query.params.get('offset', 0))
+            shown = f"{offset}-{offset + returned - 1}" if returned else '*'
+            count = str(total) if prefer.get('count') == 'exact' else '*'
+            return self.reply(200, rows, {'Content-Range': f"{shown}/{count}"})
+
+        if method == 'POST':
+            records = body if isinstance(body, list) else [body]
+            columns = query.params.get('columns')
+            with store.lock:
+                written = store.write(name, records, query.params.get('on_conflict'), prefer.get('resolution'),
+                                      columns.split(',') if columns else None)
+            self.count_rows(name, rows_written=len(written))
+            return self.reply(201, project(written, query.params.get('select'))) if representation \
+                else self.empty(201)
+
+        if method == 'PATCH':
+            with store.lock:
+                updated = store.update(name, query, body)
+            self.count_rows(name, rows_written=len(updated))
+            return self.reply(200, project(updated, query.params.get('select'))) if representation \
+                else self.empty(204)
+
+        if method == 'DELETE':
+            with store.lock:
+                deleted = store.delete(name, query)
+            self.count_rows(name, rows_deleted=len(deleted))
+            return self.reply(200, project(deleted, query.params.get('select'))) if representation \
+                else self.empty(204)
+
+        raise StandinError(405, 'PGRST117', f"Unsupported HTTP method: {method}")
+
+    def rpc(self, function: str, args):
+        store = self.server.store
+        with store.lock:
+            result = store.rpc(function, args if isinstance(args, dict) else {})
+        self.reply(200, result)
+
+    def empty(self, status: int):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def count_rows(self, table: str, **changes):
+        with self.server.stats_lock:
+            for name, value in changes.items():
+                self.server.stats[name] += value
+            by_table = self.server.stats['rows_by_table']
+            by_table[table] = by_table.get(table, 0) + changes.get('rows_written', 0)
+
+    # Control --------------------------------------------------------------
+
+    def control(self, action: str):
+        body = self.read_body()
+        options = json.loads(body) if body else {}
+        if action == 'stats':
+            return self.reply(200, self.server.snapshot())
+        if action == 'reset':
+            self.server.reset(bool(options.get('data')))
+            return self.reply(200, {'reset': True})
+        if action == 'config':
+            unknown = set(options) - set(self.server.config)
+            if unknown:
+                return self.reply(400, {'message': f"Unknown settings: {', '.join(sorted(unknown))}"})
+            self.server.config.update(options)
+            return self.reply(200, self.server.config)
+        self.reply(404, {'message': f"Unknown control action: {action}"})
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_HEAD(self):
+        self.handle_request('HEAD')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_PATCH(self):
+        self.handle_request('PATCH')
+
+    def do_DELETE(self):
+        self.handle_request('DELETE')
+
+
+def start_server(host: str = '127.0.0.1', port: int = 0, **config) -> tuple:
+    """
+    Serve on a background thread.
+
+    Returns:
+        tuple: (StandinServer, base URL); server.shutdown() stops it
+    """
+    server = StandinServer((host, port), **config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an in-memory PostgREST stand-in for the import scripts.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port, 0 for any (default: {DEFAULT_PORT})")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every request (default: 0)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Up to this many more seconds, at random")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Share of requests failing with a transient 503 (default: 0)")
+    parser.add_argument('--fail-value', help="Reject (400, check violation) any write holding this value")
+    parser.add_argument('--max-rows', type=int, default=MAX_ROWS, help=f"Rows per GET at most (default: {MAX_ROWS})")
+    parser.add_argument('--reject-gzip', action='store_true', help="Answer gzip request bodies with 415")
+    parser.add_argument('--seed', type=int, help="Seed for jitter and error injection")
+    args = parser.parse_args()
+
+    server = StandinServer((args.host, args.port), latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, fail_value=args.fail_value, max_rows=args.max_rows,
+                           accept_gzip=not args.reject_gzip, seed=args.seed)
+    print(f"Listening on {server.url}", flush=True)
+    print(f"  NEXT_PUBLIC_SUPABASE_URL={server.url}")
+    print(f"  NEXT_PUBLIC_SUPABASE_ANON_KEY={STANDIN_KEY}")
+    print(f"  SUPABASE_SERVICE_ROLE_KEY={STANDIN_KEY}", flush=True)
+    print(f"Started {datetime.now(timezone.utc).isoformat(timespec='seconds')}; Ctrl+C stops", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
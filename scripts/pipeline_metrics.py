@@ -0,0 +1,109 @@
+"""
+Pipeline Step Metrics
+=====================
+
+Per-step instrumentation for the data pipeline scripts: wall time, CPU
+time, tracemalloc current/peak memory, and rows in/out.
+
+Usage:
+    from pipeline_metrics import PipelineMetrics
+
+    metrics = PipelineMetrics()
+    with metrics.step('load') as step:
+        df = pd.read_csv(path)
+        step['rows_out'] = len(df)
+    ...
+    report_lines.extend(metrics.report_lines())
+    json.dump({'steps': metrics.steps}, f)
+"""
+
+import contextlib
+import time
+import tracemalloc
+
+
+class PipelineMetrics:
+    """
+    Records one metrics dict per pipeline step.
+
+    tracemalloc is started on the first step (unless already tracing) and
+    its peak is reset at the start of every step, so memory_peak_bytes is
+    the step's own high-water mark. memory_current_bytes is what is still
+    allocated when the step ends. Only allocations made while tracing are
+    counted, so the first step's current value includes nothing from
+    before the metrics object was used.
+    """
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.steps = []
+        self._owns_tracing = False
+
+    @contextlib.contextmanager
+    def step(self, name: str, rows_in: int = None):
+        """
+        Measure one step. Yields the step's record; set record['rows_out'].
+
+        The record is stored even if the step raises, so a failed run still
+        shows where time was spent.
+        """
+        record = {'step': name, 'rows_in': rows_in, 'rows_out': None}
+
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracing = True
+            tracemalloc.reset_peak()
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = round(time.perf_counter() - wall_start, 6)
+            record['cpu_seconds'] = round(time.process_time() - cpu_start, 6)
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record['memory_current_bytes'] = current
+                record['memory_peak_bytes'] = peak
+            self.steps.append(record)
+
+    def close(self):
+        """Stop tracemalloc if this object started it."""
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+    def totals(self) -> dict:
+        """Total wall/CPU time and the highest step peak."""
+        return {
+            'wall_seconds': round(sum(s['wall_seconds'] for s in self.steps), 6),
+            'cpu_seconds': round(sum(s['cpu_seconds'] for s in self.steps), 6),
+            'memory_peak_bytes': max((s.get('memory_peak_bytes', 0) for s in self.steps), default=0),
+        }
+
+    def report_lines(self) -> list:
+        """Fixed-width table of the recorded steps for text reports."""
+        lines = [
+            f"{'Step':<26}{'Wall (s)':>10}{'CPU (s)':>10}{'Peak MiB':>11}{'Held MiB':>11}"
+            f"{'Rows in':>13}{'Rows out':>13}",
+        ]
+
+        def mib(value):
+            return f"{value / 2**20:.1f}" if value is not None else "-"
+
+        def rows(value):
+            return f"{value:,}" if value is not None else "-"
+
+        for s in self.steps:
+            lines.append(
+                f"{s['step']:<26}{s['wall_seconds']:>10.3f}{s['cpu_seconds']:>10.3f}"
+                f"{mib(s.get('memory_peak_bytes')):>11}{mib(s.get('memory_current_bytes')):>11}"
+                f"{rows(s['rows_in']):>13}{rows(s['rows_out']):>13}"
+            )
+
+        totals = self.totals()
+        lines.append(
+            f"{'Total':<26}{totals['wall_seconds']:>10.3f}{totals['cpu_seconds']:>10.3f}"
+            f"{mib(totals['memory_peak_bytes'] if self.trace_memory else None):>11}"
+        )
+        return lines
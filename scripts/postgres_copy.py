@@ -0,0 +1,203 @@
+"""
+Postgres COPY Loader
+====================
+
+Direct-to-Postgres bulk loading for the import scripts, as an alternative to
+PostgREST inserts. Rows are streamed through one `COPY ... FROM STDIN` per
+load, in binary or CSV form, inside a single transaction: either every row
+lands or none do.
+
+Binary COPY needs values in the column's wire type, so numeric and uuid
+values are converted (once per distinct value) using the column types read
+from the table. CSV COPY writes NULL as an unquoted \\N.
+
+Requires psycopg 3 (pip install "psycopg[binary]") and a connection string
+in $SUPABASE_DB_URL (Supabase: Project Settings → Database → Connection
+string) or passed explicitly. Any Postgres works, e.g. a local instance
+with the supabase/migrations applied.
+
+Usage:
+    from postgres_copy import connect, copy_rows
+
+    conn = connect()
+    stats = copy_rows(conn, 'respondents', columns, rows, fmt='binary')
+"""
+
+import csv
+import io
+import os
+import time
+import uuid
+from decimal import Decimal
+
+from importer_core import CompanyMap, batched, load_env
+
+COPY_FORMATS = ('binary', 'csv')
+CHUNK_ROWS = 50_000  # Rows per write/progress line (the COPY itself is one statement)
+CSV_NULL = '\\N'
+DSN_ENV = "SUPABASE_DB_URL"
+
+
+def connect(dsn: str = None):
+    """
+    Open an autocommit psycopg connection (transactions are explicit).
+
+    Args:
+        dsn: Connection string (default: $SUPABASE_DB_URL, also read from .env.local)
+    """
+    try:
+        import psycopg
+    except ImportError:
+        raise ImportError('The copy backend requires psycopg 3: pip install "psycopg[binary]"')
+
+    if not dsn:
+        load_env()
+        dsn = os.environ.get(DSN_ENV)
+    if not dsn:
+        raise ValueError(f"Missing Postgres connection string. Set {DSN_ENV} or pass --dsn.")
+
+    return psycopg.connect(dsn, autocommit=True)
+
+
+def query_company_mapping(conn) -> CompanyMap:
+    """
+    Company name to UUID mapping, read over the direct connection.
+
+    Returns:
+        CompanyMap: {company_name: company_uuid}
+    """
+    rows = conn.execute("SELECT name, id::text FROM companies").fetchall()
+    if not rows:
+        raise ValueError("No companies found in database. Run demo schema migration first.")
+    return CompanyMap(rows)
+
+
+def column_types(conn, table: str, columns: list) -> list:
+    """Postgres type names of table's columns, in the given order."""
+    rows = conn.execute(
+        "SELECT attname, atttypid::regtype::text FROM pg_attribute "
+        "WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped",
+        (table,),
+    ).fetchall()
+    types = dict(rows)
+    missing = [col for col in columns if col not in types]
+    if missing:
+        raise ValueError(f"Columns not in {table}: {', '.join(missing)}")
+    return [types[col] for col in columns]
+
+
+class _Converted(dict):
+    """Memoized value conversion: each distinct value is converted once."""
+
+    def __init__(self, convert):
+        super().__init__()
+        self.convert = convert
+
+    def __missing__(self, value):
+        converted = self[value] = self.convert(value)
+        return converted
+
+
+def _binary_converter(pg_type: str):
+    """Python value → binary-dumpable value for pg_type, or None if as-is."""
+    if pg_type == 'numeric':
+        # repr() keeps the shortest round-trip digits, like the JSON payloads
+        return _Converted(lambda v: Decimal(repr(v)) if isinstance(v, float) else Decimal(v))
+    if pg_type == 'uuid':
+        return _Converted(lambda v: v if isinstance(v, uuid.UUID) else uuid.UUID(str(v)))
+    if pg_type in ('integer', 'bigint', 'smallint'):
+        return _Converted(int)
+    return None
+
+
+def copy_rows(conn, table: str, columns: list, rows, fmt: str = 'binary',
+              chunk_rows: int = CHUNK_ROWS, before: str = None, total_rows: int = None) -> dict:
+    """
+    Load rows into table with a single COPY FROM STDIN.
+
+    Args:
+        conn: Connection from connect()
+        table: Target table
+        columns: Column names, in row order
+        rows: Iterable of row tuples (None for NULL); consumed lazily
+        fmt: 'binary' or 'csv'
+        chunk_rows: Rows per write and progress line
+        before: Optional SQL run first in the same transaction
+                (e.g. a DELETE, making the load a replacement)
+        total_rows: Row count for progress output, if known
+
+    Returns:
+        dict: Import statistics with the same keys as
+              supabase_uploader.upload_dataframe()
+    """
+    import psycopg
+    from psycopg import sql
+
+    if fmt not in COPY_FORMATS:
+        raise ValueError(f"Unknown COPY format: {fmt}")
+
+    statement = sql.SQL("COPY {} ({}) FROM STDIN (FORMAT {})").format(
+        sql.Identifier(table),
+        sql.SQL(', ').join(sql.Identifier(col) for col in columns),
+        sql.SQL('BINARY' if fmt == 'binary' else f"CSV, NULL '{CSV_NULL}'"),
+    )
+
+    stats = {
+        'total_rows': total_rows or 0,
+        'inserted': 0,
+        'errors': 0,
+        'error_details': [],
+        'batches': 0,
+        'retries': 0,
+        'bytes_sent': 0 if fmt == 'csv' else None,
+    }
+
+    started = time.perf_counter()
+    copied = 0
+    try:
+        with conn.transaction(), conn.cursor() as cur:
+            if before:
+                cur.execute(before)
+
+            types = column_types(conn, table, columns)
+            converters = [_binary_converter(pg_type) for pg_type in types]
+
+            with cur.copy(statement) as copy:
+                if fmt == 'binary':
+                    copy.set_types(types)
+
+                for chunk in batched(rows, chunk_rows):
+                    if fmt == 'binary':
+                        for row in chunk:
+                            copy.write_row([
+                                value if value is None or convert is None else convert[value]
+                                for value, convert in zip(row, converters)
+                            ])
+                    else:
+                        buffer = io.StringIO()
+                        writer = csv.writer(buffer, lineterminator='\n')
+                        writer.writerows(
+                            [CSV_NULL if value is None else value for value in row] for row in chunk
+                        )
+                        payload = buffer.getvalue().encode()
+                        copy.write(payload)
+                        stats['bytes_sent'] += len(payload)
+
+                    stats['batches'] += 1
+                    first = copied + 1
+                    copied += len(chunk)
+                    elapsed = time.perf_counter() - started
+                    of_total = f"/{total_rows:,}" if total_rows else ""
+                    print(f"  Chunk {stats['batches']}: rows {first:,}-{copied:,}{of_total} "
+                          f"streamed ({copied / elapsed:,.0f} rows/s)")
+
+        stats['inserted'] = copied
+    except psycopg.Error as e:
+        stats['errors'] += max(copied, total_rows or 0)
+        stats['error_details'].append({'table': table, 'error': f"{type(e).__name__}: {e}"})
+        print(f"  ❌ COPY failed, transaction rolled back: {e}")
+
+    stats['total_rows'] = total_rows or copied
+    stats['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    stats['rows_per_second'] = round(stats['inserted'] / stats['elapsed_seconds'], 1) if stats['elapsed_seconds'] else 0.0
+    return stats
@@ -0,0 +1,130 @@
+"""
+Existing Respondent Index
+=========================
+
+Scans respondents.respondent_id from Supabase without PostgREST's row cap
+and keeps the result as a compact membership structure.
+
+The scan is keyset-paginated on the primary key (id > last seen id, ordered
+by id), so no page is skipped or repeated however large the table is and
+whatever max-rows the server enforces. The uuid keyspace is split into
+equal ranges that are scanned concurrently, which works because v4 uuids
+are uniformly distributed and Postgres orders uuids like their hex strings.
+
+IDs are kept as a sorted NumPy array of 64-bit hashes (8 bytes per
+respondent instead of a Python string in a set). Membership tests are
+vectorized binary searches. A hash collision can only turn a new
+respondent into a false "exists", never the reverse. Callers that must be
+exact confirm positives against the database (import_real_capability_data.py
+does this when fetching current scores).
+
+Usage:
+    from respondent_index import scan_respondent_ids
+
+    existing = scan_respondent_ids(supabase)
+    mask = existing.contains(df['respondent_id'])
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZE = 1000  # Rows per keyset page (Supabase's default max-rows)
+SCAN_PARTITIONS = 8  # Concurrent uuid ranges
+
+
+def hash_ids(ids) -> np.ndarray:
+    """64-bit hashes of respondent IDs (stable across runs and processes)."""
+    return pd.util.hash_array(pd.Series(ids, dtype=object).astype(str).to_numpy(dtype=object))
+
+
+class RespondentIdSet:
+    """
+    Sorted array of respondent ID hashes with vectorized membership tests.
+
+    rows_scanned and requests describe the scan that built it.
+    """
+
+    def __init__(self, hashes: np.ndarray, rows_scanned: int = 0, requests: int = 0):
+        self.hashes = np.unique(hashes)
+        self.rows_scanned = rows_scanned
+        self.requests = requests
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def contains(self, ids) -> np.ndarray:
+        """Boolean mask: which ids are (probably, see module docstring) present."""
+        probe = hash_ids(ids)
+        if len(self.hashes) == 0:
+            return np.zeros(len(probe), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.hashes, probe), len(self.hashes) - 1)
+        return self.hashes[positions] == probe
+
+    @property
+    def nbytes(self) -> int:
+        return self.hashes.nbytes
+
+
+def uuid_ranges(partitions: int) -> list:
+    """Split the uuid keyspace into [low, high) string bounds (None = open)."""
+    bounds = [None] + [
+        f"{(i << 128) // partitions:032x}" for i in range(1, partitions)
+    ] + [None]
+    as_uuid = lambda h: h and f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+    return [(as_uuid(low), as_uuid(high)) for low, high in zip(bounds[:-1], bounds[1:])]
+
+
+def scan_range(supabase, low: str, high: str, page_size: int = PAGE_SIZE, table: str = 'respondents') -> tuple:
+    """
+    Keyset-scan one uuid range.
+
+    Pages continue until one comes back empty, so a server max-rows below
+    page_size only costs extra requests, never missed rows.
+
+    Returns:
+        tuple: (hashes of the range's respondent IDs, rows scanned, requests)
+    """
+    pages = []
+    rows = requests = 0
+    last = None
+    while True:
+        query = supabase.table(table).select('id,respondent_id').order('id').limit(page_size)
+        if low:
+            query = query.gte('id', low)
+        if high:
+            query = query.lt('id', high)
+        if last:
+            query = query.gt('id', last)
+
+        data = query.execute().data
+        requests += 1
+        if not data:
+            break
+        pages.append(hash_ids([row['respondent_id'] for row in data]))
+        rows += len(data)
+        last = data[-1]['id']
+
+    hashes = np.concatenate(pages) if pages else np.empty(0, dtype=np.uint64)
+    return hashes, rows, requests
+
+
+def scan_respondent_ids(supabase, partitions: int = SCAN_PARTITIONS, page_size: int = PAGE_SIZE,
+                        table: str = 'respondents') -> RespondentIdSet:
+    """
+    All respondent IDs in table, as a RespondentIdSet.
+
+    Each uuid range is scanned by its own worker.
+    """
+    with ThreadPoolExecutor(max_workers=partitions) as pool:
+        results = list(pool.map(
+            lambda bounds: scan_range(supabase, bounds[0], bounds[1], page_size, table),
+            uuid_ranges(partitions),
+        ))
+
+    return RespondentIdSet(
+        np.concatenate([result[0] for result in results]),
+        rows_scanned=sum(result[1] for result in results),
+        requests=sum(result[2] for result in results),
+    )
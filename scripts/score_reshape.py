@@ -0,0 +1,209 @@
+"""
+Score Reshaping
+===============
+
+Wide ↔ long conversion for the fixed-arity score families:
+construct_1..construct_32 (respondents, the capability wide files) against
+capability_scores-style (respondent, construct_id, score) rows, and
+sentiment_1..sentiment_25.
+
+- wide → long: the score columns are copied once into a preallocated
+  arity × rows buffer, viewed as a rows × arity matrix, and flattened row by
+  row in one copy. The score column, the np.tile()d score ids and the key
+  columns (gathered with one take() each) are built without a per-row loop.
+- long → wide: capability_pivot's scatter engine (one factorize, sum/count
+  accumulators, duplicate cells averaged exactly like a pandas mean), for any
+  family rather than only the 32 constructs.
+- Chunks: wide rows are independent, so iter_wide_to_long() reshapes each
+  chunk on its own. long_to_wide_chunks() folds long chunks into a
+  ScoreAccumulator and yields the wide result in blocks; folding the chunks
+  of a table gives the same frame as long_to_wide() on the whole table.
+
+Usage:
+    from score_reshape import CONSTRUCTS, long_to_wide, wide_to_long
+
+    long_df = wide_to_long(wide_df, CONSTRUCTS, key_columns=['respondent_id'])
+    wide_df = long_to_wide(long_df, CONSTRUCTS, 'respondent_id')
+"""
+
+import numpy as np
+import pandas as pd
+
+from capability_pivot import (
+    ScoreAccumulator, factorize_respondents, finalize_means, first_seen_metadata, scatter_scores,
+)
+
+SCORE_COLUMN = 'score'
+
+
+class ScoreFamily:
+    """A fixed-arity family of numbered score columns, <prefix>_1 .. <prefix>_<arity>."""
+
+    def __init__(self, prefix: str, arity: int, id_column: str):
+        self.prefix = prefix
+        self.arity = arity
+        self.id_column = id_column  # Long-format column holding the 1-based score number
+        self.columns = [f'{prefix}_{i}' for i in range(1, arity + 1)]
+
+    def __repr__(self):
+        return f"ScoreFamily({self.prefix!r}, {self.arity}, {self.id_column!r})"
+
+
+CONSTRUCTS = ScoreFamily('construct', 32, 'construct_id')
+SENTIMENTS = ScoreFamily('sentiment', 25, 'sentiment_id')
+
+
+def score_matrix(df: pd.DataFrame, family: ScoreFamily, dtype=np.float64) -> np.ndarray:
+    """
+    The family's score columns as a rows × arity matrix.
+
+    Each column is copied once, contiguously, into a preallocated
+    arity × rows buffer; the matrix returned is its transposed view.
+    Columns missing from df, and values that are not numeric, are NaN.
+    """
+    buffer = np.full((family.arity, len(df)), np.nan, dtype=dtype)
+    for j, col in enumerate(family.columns):
+        if col not in df.columns:
+            continue
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors='coerce')
+        buffer[j] = values.to_numpy(dtype=dtype, na_value=np.nan)
+    return buffer.T
+
+
+def wide_to_long(df: pd.DataFrame,
+                 family: ScoreFamily,
+                 key_columns=(),
+                 score_column: str = SCORE_COLUMN,
+                 dropna: bool = True,
+                 score_dtype=np.float64) -> pd.DataFrame:
+    """
+    Melt a family's score columns into one row per (input row, score).
+
+    Output rows are grouped by input row, in input order, with score ids
+    ascending within each row (the order capability_demo.csv-style files
+    and pivot_long_to_wide() expect).
+
+    Args:
+        df: Wide dataframe
+        family: Score family to melt (CONSTRUCTS, SENTIMENTS, ...)
+        key_columns: Columns repeated onto every long row (e.g. respondent_id)
+        score_column: Name of the long score column
+        dropna: Drop cells without a score
+        score_dtype: dtype of the long score column
+
+    Returns:
+        DataFrame: key_columns, family.id_column, score_column
+    """
+    matrix = score_matrix(df, family, score_dtype)
+    n_rows, arity = matrix.shape
+
+    scores = matrix.ravel()  # Row by row, score ids ascending (one transposing copy)
+    score_ids = np.tile(np.arange(1, arity + 1, dtype=np.int16), n_rows)
+    per_row = arity
+    if dropna:
+        present = ~np.isnan(scores)
+        per_row = present.reshape(n_rows, arity).sum(axis=1)
+        scores = scores[present]
+        score_ids = score_ids[present]
+
+    # Keys are gathered with take() so they keep their dtype (no object round trip)
+    source_rows = np.repeat(np.arange(n_rows), per_row)
+    long = {col: df[col].take(source_rows).reset_index(drop=True) for col in key_columns}
+    long[family.id_column] = score_ids
+    long[score_column] = scores
+    return pd.DataFrame(long, copy=False)
+
+
+def iter_wide_to_long(chunks, family: ScoreFamily, key_columns=(), score_column: str = SCORE_COLUMN,
+                      dropna: bool = True, score_dtype=np.float64):
+    """Yield wide_to_long() of every chunk in an iterable of wide dataframes."""
+    for chunk in chunks:
+        yield wide_to_long(chunk, family, key_columns, score_column, dropna, score_dtype)
+
+
+def long_to_wide(df: pd.DataFrame,
+                 family: ScoreFamily,
+                 respondent_column: str,
+                 score_column: str = SCORE_COLUMN,
+                 metadata_columns=(),
+                 metadata: pd.DataFrame = None,
+                 drop_empty: bool = False,
+                 score_dtype=np.float64) -> pd.DataFrame:
+    """
+    Pivot long score rows to one row per respondent.
+
+    Duplicate (respondent, score id) rows are averaged, and null scores and
+    out-of-range ids are ignored, as in pivot_long_to_wide(). Rows come out
+    sorted by respondent.
+
+    Args:
+        df: Long dataframe (respondent_column, family.id_column, score_column)
+        family: Score family to pivot into
+        respondent_column: Column identifying the output row
+        score_column: Long score column
+        metadata_columns: Per-respondent columns to carry over (first non-null
+                          value wins, like groupby().first())
+        metadata: Frame to take metadata_columns from instead of df (with a
+                  respondent_column), so they need not be repeated on every
+                  long row
+        drop_empty: Drop respondents and score columns without any score
+                    (pivot_table's behaviour) instead of keeping all
+                    family.arity columns
+        score_dtype: dtype of the output score columns
+
+    Returns:
+        DataFrame: respondent_column, family.columns, metadata_columns
+    """
+    codes, uniques = factorize_respondents(df[respondent_column])
+    n_respondents = len(uniques)
+
+    score_ids = pd.to_numeric(df[family.id_column], errors='coerce').to_numpy(dtype=np.float64)
+    scores = pd.to_numeric(df[score_column], errors='coerce').to_numpy(dtype=np.float64)
+    accumulators = scatter_scores(codes, score_ids, scores, n_respondents, family.arity)
+    means, counts = finalize_means(accumulators, family.arity, score_dtype)
+
+    if metadata is None:
+        carried = first_seen_metadata(df, codes, n_respondents, list(metadata_columns))
+    else:
+        meta_codes = pd.Categorical(metadata[respondent_column], categories=uniques).codes
+        carried = first_seen_metadata(metadata, meta_codes, n_respondents, list(metadata_columns))
+
+    rows = counts.any(axis=1) if drop_empty else np.ones(n_respondents, dtype=bool)
+    cols = np.flatnonzero(counts.any(axis=0)) if drop_empty else range(family.arity)
+
+    wide = {respondent_column: uniques[rows]}
+    for j in cols:
+        wide[family.columns[j]] = means[rows, j]
+    for col, values in carried.items():
+        wide[col] = values[rows]
+    return pd.DataFrame(wide)
+
+
+def long_to_wide_chunks(chunks,
+                        family: ScoreFamily,
+                        respondent_column: str,
+                        score_column: str = SCORE_COLUMN,
+                        metadata_columns=(),
+                        drop_empty: bool = False,
+                        score_dtype=np.float64,
+                        rows_per_frame: int = 100_000):
+    """
+    Fold long chunks (e.g. pd.read_csv(..., chunksize=...)) and yield the
+    long_to_wide() result in blocks of rows_per_frame respondents.
+
+    Only the accumulators and one code per respondent are held, so memory
+    grows with the number of respondents rather than long rows.
+    """
+    accumulator = ScoreAccumulator(family.arity, metadata_columns, respondent_column=respondent_column,
+                                   construct_column=family.id_column, score_column=score_column,
+                                   column_prefix=family.prefix)
+    for chunk in chunks:
+        accumulator.add_chunk(chunk)
+
+    frozen = accumulator.finalize(score_dtype)
+    if not drop_empty:
+        frozen['keep_cols'] = np.arange(family.arity)
+        frozen['order'] = np.argsort(frozen['respondent_ids'], kind='stable')
+    yield from accumulator.iter_frames(frozen, rows_per_frame)
@@ -7,25 +7,13 @@ This script:
 1. Creates the taboos table in Supabase (if not exists)
 2. Reads taboos_extracted.json (100 taboos)
 3. Maps root causes to category IDs (1-5)
-4. Imports all taboos to the 'taboos' table
+4. Replaces the 'taboos' table atomically (loaded into taboos_staging,
+   then published; migration 010_staged_reload.sql)
 """
 
 import json
-import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv('.env.local')
-
-# Initialize Supabase client
-SUPABASE_URL = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-
-if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
-    raise Exception('Missing Supabase credentials in .env.local')
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+from importer_core import SERVICE_KEY_ENV, get_client, head_count, reload_records
 
 # Root cause to category_id mapping
 ROOT_CAUSE_TO_CATEGORY = {
@@ -39,6 +27,8 @@ ROOT_CAUSE_TO_CATEGORY = {
 def create_taboos_table():
     """Create the taboos table if it doesn't exist"""
 
+    supabase = get_client(SERVICE_KEY_ENV)
+
     print("\n🔧 Creating taboos table...")
 
     # Read the migration SQL
@@ -59,6 +49,8 @@ def create_taboos_table():
 def import_taboos():
     """Import all taboos from JSON to Supabase"""
 
+    supabase = get_client(SERVICE_KEY_ENV)
+
     print("\n🔍 Loading taboos from JSON...")
 
     # Load the extracted taboos
@@ -130,46 +122,19 @@ def import_taboos():
     if all_cells_correct:
         print("\n✅ Perfect distribution: All 25 cells have exactly 4 taboos!")
 
-    # Clear existing data
-    print("\n🗑️  Clearing existing taboos...")
-    try:
-        supabase.table('taboos').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
-        print("✅ Existing taboos cleared")
-    except Exception as e:
-        print(f"ℹ️  No existing taboos to clear (table might be empty): {e}")
-
-    # Insert taboos
+    # Replace taboos: load taboos_staging in batches of 20 (a rejected batch is
+    # bisected down to its bad taboos), then publish it in one transaction
     print("\n📥 Importing taboos to Supabase...")
-
-    # Insert in batches of 20
-    batch_size = 20
-    total_inserted = 0
-
-    for i in range(0, len(taboos_for_db), batch_size):
-        batch = taboos_for_db[i:i + batch_size]
-
-        try:
-            result = supabase.table('taboos').insert(batch).execute()
-            total_inserted += len(batch)
-            print(f"   ✅ Inserted batch {i//batch_size + 1} ({len(batch)} taboos)")
-        except Exception as e:
-            print(f"   ❌ Error inserting batch {i//batch_size + 1}: {e}")
-            # Try inserting one by one for this batch
-            for taboo in batch:
-                try:
-                    supabase.table('taboos').insert(taboo).execute()
-                    total_inserted += 1
-                    print(f"      ✅ Inserted '{taboo['name']}'")
-                except Exception as e2:
-                    print(f"      ❌ Failed to insert '{taboo['name']}': {e2}")
+    stats = reload_records(supabase, 'taboos', taboos_for_db, batch_size=20)
+    total_inserted = stats['published']
 
     print(f"\n✅ Import complete! Total taboos inserted: {total_inserted}")
 
     # Verify the import
     print("\n🔍 Verifying import...")
     try:
-        result = supabase.table('taboos').select('*', count='exact').execute()
-        db_count = len(result.data) if result.data else 0
+        db_count = head_count(supabase, 'taboos')
+        result = supabase.table('taboos').select('name,level_id,category_id').limit(3).execute()
         print(f"✅ Taboos in database: {db_count}")
 
         if db_count == len(taboos_for_db):
@@ -180,7 +145,7 @@ def import_taboos():
         # Show some samples
         if result.data and len(result.data) > 0:
             print("\n📝 Sample taboos:")
-            for i, taboo in enumerate(result.data[:3]):
+            for i, taboo in enumerate(result.data):
                 print(f"   {i+1}. {taboo['name']} (L{taboo['level_id']}_C{taboo['category_id']})")
     except Exception as e:
         print(f"⚠️  Error verifying: {e}")
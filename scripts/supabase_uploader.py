@@ -0,0 +1,597 @@
+"""
+Supabase Batch Uploader
+=======================
+
+Concurrent, adaptive-batch uploader for the import scripts.
+
+Batches are prepared on the calling thread while earlier batches are in
+flight on a bounded worker pool. Transient failures (timeouts, connection
+errors, 408/425/429/5xx, Postgres timeout/serialization/deadlock codes) are
+retried with full-jitter exponential backoff, honouring Retry-After when
+the server sends one. Batch sizes adapt to the encoded payload size and the
+observed request latency.
+
+Given on_conflict (the columns of a unique constraint), both transports
+upsert instead of insert, so resending a batch is harmless.
+
+Batches are JSON-encoded once, with orjson when it is installed (several
+times faster than the standard library encoder). PostgrestTransport sends
+those bytes as they are and can gzip them (compress=True). If the server
+rejects a compressed body, it goes back to plain JSON for the rest of the
+run: the REST endpoint is remembered, and later transports for it start
+uncompressed. Encode time, JSON bytes and bytes on the wire are part of the stats.
+round_decimal() rounds float columns to the precision of a DECIMAL column
+before they are encoded.
+
+A batch rejected for a row-level reason (SQLSTATE class 22 data exception
+or 23 integrity constraint violation) is bisected: each half is resent on
+its own, and failing halves are split again until the records that fail
+alone are found. Every other record is committed, at the cost of about
+2·log2(n) extra requests per bad record. Errors that no single row causes
+(a duplicate key within one upsert, RLS, an unknown column, a bad key)
+reject the whole batch without resending anything. The rejected records,
+and the records of batches that still fail after their retries, go to an
+optional dead-letter file (dead_letter.py) with their errors, for fixing
+and replay.
+
+Two transports are available:
+    http      POST straight to PostgREST (<url>/rest/v1/<table>) with httpx.
+              Sees HTTP status codes and Retry-After, and works against any
+              PostgREST-compatible server (e.g. a local stand-in).
+    supabase  supabase-py's table().insert(); status codes and Retry-After
+              are not exposed, so only error codes are classified.
+
+Usage:
+    from supabase_uploader import PostgrestTransport, upload_dataframe
+
+    transport = PostgrestTransport(url, key, 'respondents', compress=True)
+    stats = upload_dataframe(df, build_records, transport, workers=4)
+"""
+
+import gzip
+import json
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from decimal import ROUND_HALF_UP, Decimal
+from email.utils import parsedate_to_datetime
+
+import numpy as np
+
+try:
+    import orjson  # Optional: pip install orjson
+except ImportError:
+    orjson = None
+
+# HTTP statuses worth retrying
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# PostgREST/Postgres error codes worth retrying (connection, timeout, contention)
+TRANSIENT_CODES = {
+    'PGRST000', 'PGRST001', 'PGRST002', 'PGRST003',
+    '57014',  # statement timeout / query canceled
+    '40001',  # serialization failure
+    '40P01',  # deadlock detected
+    '53300',  # too many connections
+    '08006', '08003', '08001',  # connection failures
+}
+
+# SQLSTATE classes caused by individual rows (data exception, integrity
+# constraint violation); only these are worth bisecting a batch for
+ROW_LEVEL_CLASSES = ('22', '23')
+
+COMPRESS_MIN_BYTES = 1024  # Smaller bodies are sent uncompressed
+
+# REST endpoints that rejected a gzip body this run (no transport retries gzip there)
+_gzip_rejected = set()
+
+
+class UploadError(Exception):
+    """A failed batch request, classified for the retry policy."""
+
+    def __init__(self, message: str, status: int = None, transient: bool = False, retry_after: float = None,
+                 code: str = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.transient = transient
+        self.retry_after = retry_after
+
+
+def row_level_error(code: str) -> bool:
+    """True for SQLSTATE codes that single rows cause (classes 22 and 23)."""
+    return bool(code) and len(code) == 5 and code.startswith(ROW_LEVEL_CLASSES)
+
+
+def error_code(response) -> str:
+    """PostgREST's error code from a response body, or the HTTP status."""
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    if isinstance(body, dict) and body.get('code'):
+        return str(body['code'])
+    return str(response.status_code)
+
+
+def parse_retry_after(value: str):
+    """Retry-After header (delta-seconds or HTTP-date) → seconds, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def encode_json(value) -> bytes:
+    """
+    Compact JSON for any value made of records.
+
+    Uses orjson when available (NaN/inf become null there; the standard
+    encoder refuses them), otherwise the standard library encoder.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, allow_nan=False, separators=(',', ':')).encode()
+
+
+def encode_records(records: list) -> bytes:
+    """JSON request body for a batch of insert records."""
+    return encode_json(records)
+
+
+def round_decimal(values: np.ndarray, decimals: int) -> np.ndarray:
+    """
+    Round floats exactly as a DECIMAL(p, decimals) column stores them.
+
+    Values travel as their shortest repr and Postgres rounds that decimal
+    half away from zero. Vectorized float rounding agrees except near ties
+    (e.g. 4.335 is 4.33499... in binary), so those few cells are redone
+    with Decimal. NaN stays NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** decimals
+    scaled = np.abs(values) * scale
+    rounded = np.sign(values) * np.floor(scaled + 0.5) / scale
+
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        quantum = Decimal(1).scaleb(-decimals)
+        rounded[near_tie] = [float(Decimal(repr(value)).quantize(quantum, rounding=ROUND_HALF_UP))
+                             for value in values[near_tie].tolist()]
+    return rounded
+
+
+class PostgrestTransport:
+    """
+    Insert batches with plain HTTP POSTs to PostgREST.
+
+    Args:
+        base_url: Supabase project URL (or any PostgREST-compatible server)
+        api_key: Key sent as apikey and bearer token (None: the shared
+                 client's default headers already carry it)
+        table: Target table
+        timeout: Per-request timeout in seconds
+        rest_path: Path prefix of the REST API ('/rest/v1' on Supabase)
+        on_conflict: Comma-separated unique-constraint columns; upsert on them
+        client: Shared httpx.Client to send through (e.g. the pooled session
+                from importer_core.http_session); left open by close()
+        compress: gzip request bodies of COMPRESS_MIN_BYTES or more; turned
+                  off for good, for every transport to the same REST
+                  endpoint, if the server rejects a compressed body
+    """
+
+    def __init__(self, base_url: str, api_key: str, table: str, timeout: float = 60.0,
+                 rest_path: str = '/rest/v1', on_conflict: str = None, client=None,
+                 compress: bool = False):
+        import httpx
+
+        self.rest_url = f"{base_url.rstrip('/')}{rest_path}"
+        self.url = f"{self.rest_url}/{table}"
+        self.headers = {
+            'Content-Type': 'application/json',
+            'Prefer': 'return=minimal',
+        }
+        if api_key is not None:
+            self.headers['apikey'] = api_key
+            self.headers['Authorization'] = f'Bearer {api_key}'
+        self.params = {}
+        if on_conflict:
+            self.params['on_conflict'] = on_conflict
+            self.headers['Prefer'] = 'return=minimal,resolution=merge-duplicates'
+        self._httpx = httpx
+        self._owns_client = client is None
+        self._client = client or httpx.Client(timeout=timeout)
+        self.timeout = timeout
+        self.compress = compress and self.rest_url not in _gzip_rejected
+
+    def _post(self, batch: dict, compressed: bool):
+        headers = self.headers
+        content = batch['payload']
+        if compressed:
+            if 'gzip' not in batch:
+                batch['gzip'] = gzip.compress(content, compresslevel=6)
+            headers = {**headers, 'Content-Encoding': 'gzip'}
+            content = batch['gzip']
+        batch['wire_bytes'] = len(content)
+        return self._client.post(self.url, content=content, headers=headers,
+                                 params=self.params, timeout=self.timeout)
+
+    def send(self, batch: dict):
+        """POST one encoded batch (gzipped if enabled); raises UploadError on failure."""
+        httpx = self._httpx
+        compressed = self.compress and len(batch['payload']) >= COMPRESS_MIN_BYTES
+        try:
+            response = self._post(batch, compressed)
+            # 415, or PostgREST's "invalid JSON" (PGRST102): the body was not decompressed
+            if compressed and (response.status_code == 415
+                               or (response.status_code == 400 and 'PGRST102' in response.text)):
+                print(f"  ℹ️  Server does not accept gzip request bodies; sending plain JSON")
+                self.compress = False
+                _gzip_rejected.add(self.rest_url)
+                rejected_bytes = batch['wire_bytes']
+                response = self._post(batch, False)
+                batch['wire_bytes'] += rejected_bytes
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            raise UploadError(f"{type(e).__name__}: {e}", transient=True)
+
+        if response.status_code >= 400:
+            raise UploadError(
+                f"HTTP {response.status_code}: {response.text[:500]}",
+                status=response.status_code,
+                transient=response.status_code in TRANSIENT_STATUS,
+                retry_after=parse_retry_after(response.headers.get('Retry-After')),
+                code=error_code(response),
+            )
+
+    def close(self):
+        if self._owns_client:
+            self._client.close()
+
+
+class SupabaseTransport:
+    """Insert (or, given on_conflict, upsert) batches through an existing supabase-py client."""
+
+    def __init__(self, client, table: str, on_conflict: str = None):
+        from postgrest.exceptions import APIError
+
+        self.client = client
+        self.table = table
+        self.on_conflict = on_conflict
+        self._api_error = APIError
+
+    def send(self, batch: dict):
+        """Insert one batch; raises UploadError on failure."""
+        batch['wire_bytes'] = len(batch['payload'])  # postgrest-py re-encodes the records (same size)
+        try:
+            query = self.client.table(self.table)
+            if self.on_conflict:
+                query = query.upsert(batch['records'], on_conflict=self.on_conflict, returning='minimal')
+            else:
+                query = query.insert(batch['records'], returning='minimal')
+            query.execute()
+        except self._api_error as e:
+            # Without a JSON error body postgrest-py reports the HTTP status as the code
+            code = str(e.code or '')
+            transient = code in TRANSIENT_CODES or (code.isdigit() and int(code) in TRANSIENT_STATUS)
+            raise UploadError(str(e), transient=transient, code=code)
+        except Exception as e:
+            # Network-level failure (httpx timeout, connection reset, ...)
+            raise UploadError(f"{type(e).__name__}: {e}", transient=True)
+
+    def close(self):
+        pass
+
+
+class RetryPolicy:
+    """Full-jitter exponential backoff; Retry-After takes precedence."""
+
+    def __init__(self, max_retries: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        """Seconds to wait before retry number attempt + 1."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class BatchSizer:
+    """
+    Adaptive batch size (rows), driven by payload bytes and latency.
+
+    Grows by 25% while requests finish well under target_latency, halves
+    when they are slower than it or fail, and never exceeds the row count
+    that fits in target_bytes at the observed bytes per row.
+    """
+
+    def __init__(self, initial_rows: int = 500, min_rows: int = 50, max_rows: int = 5000,
+                 target_bytes: int = 2 * 2**20, target_latency: float = 2.0):
+        self.rows = initial_rows
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.target_bytes = target_bytes
+        self.target_latency = target_latency
+        self.bytes_per_row = None
+
+    def next_rows(self) -> int:
+        """Rows to put in the next batch."""
+        return self.rows
+
+    def observe(self, rows: int, payload_bytes: int, latency: float, ok: bool):
+        """Feed back the outcome of one batch."""
+        if rows:
+            sample = payload_bytes / rows
+            self.bytes_per_row = sample if self.bytes_per_row is None else 0.8 * self.bytes_per_row + 0.2 * sample
+
+        rows_next = self.rows
+        if not ok or latency > self.target_latency:
+            rows_next = self.rows // 2
+        elif latency < self.target_latency / 2:
+            rows_next = int(self.rows * 1.25) + 1
+
+        if self.bytes_per_row:
+            rows_next = min(rows_next, int(self.target_bytes / self.bytes_per_row))
+
+        self.rows = max(self.min_rows, min(self.max_rows, rows_next))
+
+
+def send_with_retry(transport, batch: dict, retry: RetryPolicy) -> dict:
+    """
+    Send one batch, retrying transient failures.
+
+    Returns:
+        dict: {'batch', 'ok', 'attempts', 'latency', 'error', 'transient',
+               'code', 'wire_bytes'}; wire_bytes counts every attempt
+    """
+    attempt = 0
+    wire_bytes = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            transport.send(batch)
+            wire_bytes += batch.get('wire_bytes', len(batch['payload']))
+            return {'batch': batch, 'ok': True, 'attempts': attempt + 1,
+                    'latency': time.perf_counter() - start, 'error': None, 'transient': False,
+                    'code': None, 'wire_bytes': wire_bytes}
+        except Exception as e:
+            latency = time.perf_counter() - start
+            wire_bytes += batch.get('wire_bytes', 0)
+            error = e if isinstance(e, UploadError) else UploadError(f"{type(e).__name__}: {e}")
+            if not error.transient or attempt >= retry.max_retries:
+                return {'batch': batch, 'ok': False, 'attempts': attempt + 1,
+                        'latency': latency, 'error': str(error), 'transient': error.transient,
+                        'code': error.code, 'wire_bytes': wire_bytes}
+            time.sleep(retry.delay(attempt, error.retry_after))
+            attempt += 1
+
+
+def isolate_failures(transport, records: list, error: str, retry: RetryPolicy) -> tuple:
+    """
+    Bisect a failed batch down to the records that fail on their own.
+
+    Both halves of a failing range are resent; halves that go through are
+    committed and failing ones are split again. A half that still fails
+    after its transient retries, or fails with an error that is not
+    row-level (row_level_error()), is rejected whole without splitting.
+
+    Args:
+        transport: Transport the batch failed on
+        records: The batch's records
+        error: Error of the whole batch
+        retry: Retry policy for the resent halves
+
+    Returns:
+        tuple: ([(record position, error), ...] sorted by position, requests sent,
+                bytes sent)
+    """
+    rejected = []
+    requests = 0
+    wire_bytes = 0
+    ranges = [(0, len(records), error)]
+    while ranges:
+        start, end, error = ranges.pop()
+        if end - start == 1:
+            rejected.append((start, error))
+            continue
+        middle = (start + end) // 2
+        for first, last in ((start, middle), (middle, end)):
+            part = records[first:last]
+            result = send_with_retry(transport, {'records': part, 'payload': encode_records(part)}, retry)
+            requests += result['attempts']
+            wire_bytes += result['wire_bytes']
+            if result['ok']:
+                continue
+            if result['transient'] or not row_level_error(result['code']):
+                rejected.extend((position, result['error']) for position in range(first, last))
+            else:
+                ranges.append((first, last, result['error']))
+    return sorted(rejected), requests, wire_bytes
+
+
+def send_batch(transport, batch: dict, retry: RetryPolicy, isolate: bool = True) -> dict:
+    """
+    send_with_retry(), then isolate_failures() if a row-level error rejected the batch.
+
+    Returns:
+        dict: send_with_retry()'s result plus 'committed' (records written),
+              'rejected' ([(record position, error), ...]; empty when the
+              batch went through or failed transiently), 'isolation_requests'
+              and 'isolation_bytes'
+    """
+    result = send_with_retry(transport, batch, retry)
+    result['committed'] = len(batch['records']) if result['ok'] else 0
+    result['rejected'] = []
+    result['isolation_requests'] = 0
+    result['isolation_bytes'] = 0
+    if not result['ok'] and not result['transient']:
+        if isolate and len(batch['records']) > 1 and row_level_error(result['code']):
+            result['rejected'], result['isolation_requests'], result['isolation_bytes'] = isolate_failures(
+                transport, batch['records'], result['error'], retry)
+            result['committed'] = len(batch['records']) - len(result['rejected'])
+        else:
+            result['rejected'] = [(position, result['error']) for position in range(len(batch['records']))]
+    return result
+
+
+def committed_mask(result: dict) -> np.ndarray:
+    """Which of a finished batch's records were written (bool per record)."""
+    mask = np.full(len(result['batch']['records']), result['committed'] > 0, dtype=bool)
+    for position, _ in result['rejected']:
+        mask[position] = False
+    return mask
+
+
+def upload_dataframe(df, build_records, transport, workers: int = 4, sizer: BatchSizer = None,
+                     retry: RetryPolicy = None, on_result=None, name: str = None,
+                     isolate: bool = True, dead_letter=None) -> dict:
+    """
+    Upload a dataframe in adaptive batches on a bounded worker pool.
+
+    The next batch is sliced, converted by build_records and JSON-encoded
+    on this thread while up to `workers` earlier batches are in flight.
+
+    Args:
+        df: Rows to upload
+        build_records: batch_df → (insert records, error details for rejected rows)
+        transport: PostgrestTransport or SupabaseTransport
+        workers: Concurrent requests
+        sizer: Batch sizing policy (default BatchSizer())
+        retry: Retry policy (default RetryPolicy())
+        on_result: Optional callback(result dict) after each finished batch;
+                   result['batch']['index'] holds the batch's df index labels
+                   and committed_mask(result) which of its records were written
+        name: Optional label for the progress lines (e.g. the tenant when
+              several uploads run at once)
+        isolate: Bisect rejected batches so their good records are still
+                 written (see isolate_failures())
+        dead_letter: Optional DeadLetterFile for the rejected records and
+                     those of batches that failed after all retries
+
+    Returns:
+        dict: Import statistics ('total_rows', 'inserted', 'errors',
+              'error_details', 'batches', 'retries', 'rejected_records',
+              'isolation_requests',
+              'payload_bytes' (JSON of committed batches), 'bytes_sent' (on
+              the wire after compression, every attempt and isolation
+              resend included), 'encode_seconds', 'elapsed_seconds',
+              'rows_per_second')
+    """
+    sizer = sizer or BatchSizer()
+    retry = retry or RetryPolicy()
+
+    stats = {
+        'total_rows': len(df),
+        'inserted': 0,
+        'errors': 0,
+        'error_details': [],
+        'batches': 0,
+        'retries': 0,
+        'rejected_records': 0,
+        'isolation_requests': 0,
+        'payload_bytes': 0,
+        'bytes_sent': 0,
+        'encode_seconds': 0.0,
+    }
+
+    prefix = f"  [{name}]" if name else " "
+    started = time.perf_counter()
+    position = 0
+    batch_number = 0
+    pending = set()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while position < len(df) or pending:
+            # Keep every worker busy plus one prepared batch queued
+            while position < len(df) and len(pending) <= workers:
+                batch_df = df.iloc[position:position + sizer.next_rows()]
+                records, rejected = build_records(batch_df)
+                stats['errors'] += len(rejected)
+                stats['error_details'].extend(rejected)
+
+                batch_number += 1
+                encode_started = time.perf_counter()
+                payload = encode_records(records)
+                stats['encode_seconds'] += time.perf_counter() - encode_started
+                batch = {
+                    'number': batch_number,
+                    'first_row': position + 1,
+                    'last_row': position + len(batch_df),
+                    'index': batch_df.index.to_numpy(),
+                    'records': records,
+                    'payload': payload,
+                }
+                position += len(batch_df)
+                if records:
+                    pending.add(pool.submit(send_batch, transport, batch, retry, isolate))
+
+            if not pending:
+                continue
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: f.result()['batch']['number']):
+                result = future.result()
+                batch = result['batch']
+                rows = len(batch['records'])
+                sizer.observe(rows, len(batch['payload']), result['latency'], result['ok'])
+
+                stats['batches'] += 1
+                stats['retries'] += result['attempts'] - 1
+                stats['isolation_requests'] += result['isolation_requests']
+                # Every attempt of the batch and its isolation resends, committed or not
+                stats['bytes_sent'] += result['wire_bytes'] + result['isolation_bytes']
+                label = f"{prefix} Batch {batch['number']}: rows {batch['first_row']}-{batch['last_row']}"
+                retried = f", {result['attempts']} attempts" if result['attempts'] > 1 else ""
+
+                stats['inserted'] += result['committed']
+                stats['errors'] += rows - result['committed']
+                if result['committed']:
+                    stats['payload_bytes'] += len(batch['payload'])
+
+                if result['ok']:
+                    print(f"{label} ✅ {rows} rows in {result['latency']:.2f}s{retried}")
+                elif result['rejected']:
+                    stats['rejected_records'] += len(result['rejected'])
+                    for record, error in result['rejected']:
+                        stats['error_details'].append({'batch': batch['number'], 'record': record, 'error': error})
+                        if dead_letter is not None:
+                            dead_letter.add(batch['records'][record], error, batch['number'])
+                    print(f"{label} ⚠️  {result['committed']} rows written, {len(result['rejected'])} rejected "
+                          f"(isolated in {result['isolation_requests']} requests): {result['rejected'][0][1]}")
+                else:
+                    stats['error_details'].append({
+                        'batch': batch['number'],
+                        'rows': f"{batch['first_row']}-{batch['last_row']}",
+                        'error': result['error'],
+                    })
+                    if dead_letter is not None:
+                        for record in batch['records']:
+                            dead_letter.add(record, result['error'], batch['number'])
+                    print(f"{label} ❌ Error: {result['error']}{retried}")
+
+                if on_result is not None:
+                    on_result(result)
+
+    if dead_letter is not None and dead_letter.count:
+        dead_letter.close()
+        print(f"{prefix} 🗃️  {dead_letter.count:,} rejected records written to {dead_letter.path}")
+
+    stats['encode_seconds'] = round(stats['encode_seconds'], 3)
+    if stats['bytes_sent']:
+        print(f"{prefix} 📦 Encoded in {stats['encode_seconds']:.2f}s ({'orjson' if orjson else 'json'}): "
+              f"{stats['payload_bytes'] / 2**20:.1f} MiB JSON, {stats['bytes_sent'] / 2**20:.1f} MiB sent")
+
+    stats['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    stats['rows_per_second'] = round(stats['inserted'] / stats['elapsed_seconds'], 1) if stats['elapsed_seconds'] else 0.0
+    return stats
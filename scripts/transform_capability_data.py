@@ -11,92 +11,146 @@ Version: 1.0 (Web Summit MVP)
 
 Usage:
     python scripts/transform_capability_data.py
+    python scripts/transform_capability_data.py --stream --chunksize 500000
+    python scripts/transform_capability_data.py --stream --partitions 16
+    python scripts/transform_capability_data.py --format parquet
+    python scripts/transform_capability_data.py --incremental
+
+    The input is read from data-foundation/capability_demo.csv, or straight
+    out of data-foundation/capability_demo.zip when the CSV is not unpacked.
+    --stream folds the input in chunks and writes the output incrementally;
+    --partitions additionally spills respondents into hash partitions so
+    memory is bounded by the largest partition (output is then ordered by
+    partition instead of globally by respondent_id).
+    --format parquet|arrow writes a columnar file (float32 scores,
+    dictionary-encoded metadata) next to the CSV, e.g.
+    data-foundation/capability_demo_wide.parquet.
+    --incremental keeps a per-respondent content-hash manifest next to the
+    output and only re-pivots respondents whose long-format rows are new or
+    changed, merging them into the existing wide output.
 
 Outputs:
     - data-foundation/capability_demo_wide.csv (transformed data)
-    - logs/transformation_report.txt (validation summary)
+    - logs/transformation_report.txt (validation summary and step metrics, one section per run)
+    - logs/transformation_report.jsonl (validation statistics and step metrics, one JSON line per run)
 """
 
+import argparse
+import json
 import pandas as pd
 import numpy as np
-import hashlib
 from pathlib import Path
 from datetime import datetime
 
+from company_assignment import assign_companies
+from wide_format_io import WideFormatWriter, detect_format, output_path_for_format, read_wide, write_wide
+from capability_manifest import (
+    diff_manifest,
+    load_manifest,
+    manifest_path_for,
+    output_respondents,
+    respondent_content_hashes,
+    save_manifest,
+)
+from pipeline_metrics import PipelineMetrics
+from capability_stats import (
+    finalize_input_stats,
+    finalize_output_stats,
+    input_partial,
+    input_statistics,
+    merge_input_partials,
+    merge_output_partials,
+    output_partial,
+    output_statistics,
+)
+from capability_pivot import (
+    NUM_CONSTRUCTS,
+    ScoreAccumulator,
+    iter_partitioned_accumulators,
+    open_long_format,
+    pivot_long_to_wide,
+    read_long_format_chunks,
+    scored_constructs,
+)
+
 # Configuration
 INPUT_FILE = "data-foundation/capability_demo.csv"
+INPUT_ARCHIVE = "data-foundation/capability_demo.zip"  # Shipped form of INPUT_FILE
 OUTPUT_FILE = "data-foundation/capability_demo_wide.csv"
+OUTPUT_DATASET = "capability_demo_wide"  # Recorded in Parquet/Arrow schema metadata
 REPORT_FILE = "logs/transformation_report.txt"
-
-# Company IDs for demo distribution
-DEMO_COMPANIES = {
-    0: "acme-corp",
-    1: "tech-innovations",
-    2: "global-solutions"
+REPORT_JSON_FILE = "logs/transformation_report.jsonl"  # Same statistics, machine-readable, one line per run
+
+# Capability synthetic fields → database schema fields
+FIELD_MAPPING = {
+    'ResponseId_id': 'respondent_id',
+    'industry_synthetic': 'industry',
+    'country_synthetic': 'region',
+    'continent_synthetic': 'continent',
+    'role_synthetic': 'employment_type'
 }
 
-def hash_respondent_to_company(respondent_id: str) -> str:
-    """
-    Deterministically assign respondent to a company using hash-based distribution.
+STREAM_CHUNKSIZE = 500_000  # Long-format rows per chunk in --stream mode
+STREAM_ROWS_PER_WRITE = 100_000  # Respondents per output block in --stream mode
 
-    Args:
-        respondent_id: Unique respondent identifier
+def resolve_input_file(path: str) -> str:
+    """
+    Return the input path, falling back to the shipped zip archive.
 
-    Returns:
-        company_name: One of 'acme-corp', 'tech-innovations', 'global-solutions'
+    The repository only ships capability_demo.zip; the CSV inside it is read
+    directly so it no longer has to be unzipped by hand.
     """
-    # Use MD5 hash for consistent distribution
-    hash_value = int(hashlib.md5(respondent_id.encode()).hexdigest(), 16)
-    company_index = hash_value % 3
-    return DEMO_COMPANIES[company_index]
+    if Path(path).exists():
+        return path
+    if path == INPUT_FILE and Path(INPUT_ARCHIVE).exists():
+        return INPUT_ARCHIVE
+    raise FileNotFoundError(f"Input file not found: {path}")
 
 
 def validate_input_data(df: pd.DataFrame) -> dict:
     """
     Validate input data structure and quality.
 
+    All counts, ranges and distributions come from one fused pass
+    (capability_stats.input_statistics).
+
     Returns:
-        dict: Validation results and statistics
+        dict: Validation results and statistics (JSON-serialisable)
     """
     print("🔍 Validating input data...")
 
-    validation = {
-        'total_rows': len(df),
-        'unique_respondents': df['ResponseId_id'].nunique(),
-        'unique_constructs': df['construct_id'].nunique(),
-        'score_range': (df['score'].min(), df['score'].max()),
-        'null_scores': df['score'].isnull().sum(),
-        'duplicate_entries': len(df) - len(df[['ResponseId_id', 'construct_id']].drop_duplicates()),
-        'expected_rows': df['ResponseId_id'].nunique() * 32,
-    }
-
-    # Check for construct_id range (should be 1-32)
-    construct_range = sorted(df['construct_id'].unique())
-    validation['construct_range'] = (min(construct_range), max(construct_range))
-    validation['missing_constructs'] = set(range(1, 33)) - set(construct_range)
-
-    # Industry/country/role distributions
-    validation['industries'] = df['industry_synthetic'].value_counts().to_dict()
-    validation['countries'] = df['country_synthetic'].value_counts().to_dict()
-    validation['roles'] = df['role_synthetic'].value_counts().to_dict()
+    validation = input_statistics(df)
+    print_input_validation(validation)
+
+    return validation
 
+
+def print_input_validation(validation: dict):
+    """Print the input validation summary."""
     print(f"  ✅ Total rows: {validation['total_rows']:,}")
     print(f"  ✅ Unique respondents: {validation['unique_respondents']:,}")
     print(f"  ✅ Unique constructs: {validation['unique_constructs']}")
-    print(f"  ✅ Score range: {validation['score_range'][0]:.2f} - {validation['score_range'][1]:.2f}")
+    print(f"  ✅ Score range: {format_score(validation['score_range'][0])} - "
+          f"{format_score(validation['score_range'][1])}")
     print(f"  ⚠️  Duplicate entries: {validation['duplicate_entries']:,}")
     print(f"  ⚠️  Null scores: {validation['null_scores']:,}")
 
     if validation['missing_constructs']:
         print(f"  ⚠️  Missing constructs: {validation['missing_constructs']}")
 
-    return validation
+
+def format_score(value) -> str:
+    """Format a score statistic for display ('n/a' when undefined)."""
+    return 'n/a' if value is None else f"{value:.2f}"
 
 
 def handle_duplicates(df: pd.DataFrame) -> pd.DataFrame:
     """
     Handle duplicate construct scores for same respondent by averaging.
 
+    Reference implementation, superseded in main() by pivot_single_pass().
+    Kept so scripts/bench_capability_pivot.py can compare both paths.
+
     Args:
         df: Input dataframe with potential duplicates
 
@@ -133,6 +187,8 @@ def pivot_to_wide_format(df: pd.DataFrame) -> pd.DataFrame:
     Transform from long format (one row per construct) to wide format
     (one row per respondent with construct_1...construct_32 columns).
 
+    Reference implementation, superseded in main() by pivot_single_pass().
+
     Args:
         df: Deduplicated long-format dataframe
 
@@ -168,6 +224,32 @@ def pivot_to_wide_format(df: pd.DataFrame) -> pd.DataFrame:
     return wide_df
 
 
+def pivot_single_pass(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Average duplicate scores and pivot to wide format in a single pass.
+
+    Uses the scatter-based engine in capability_pivot.py. Scores are
+    identical to handle_duplicates() followed by pivot_to_wide_format();
+    metadata comes from each respondent's first-seen row.
+
+    Args:
+        df: Long-format dataframe (may contain duplicates)
+
+    Returns:
+        pd.DataFrame: Wide-format dataframe with one row per respondent
+    """
+    print("\n🔄 Averaging duplicates and pivoting to wide format...")
+
+    wide_df, stats = pivot_long_to_wide(df)
+
+    print(f"  ✅ Rows in: {stats['rows_in']:,}")
+    print(f"  ✅ Duplicates averaged: {stats['duplicates_averaged']:,}")
+    print(f"  ✅ Respondents in wide format: {stats['respondents']:,}")
+    print(f"  ✅ Columns created: {stats['construct_columns']}")
+
+    return wide_df
+
+
 def add_company_assignments(df: pd.DataFrame) -> pd.DataFrame:
     """
     Assign each respondent to a demo company using hash-based distribution.
@@ -180,7 +262,7 @@ def add_company_assignments(df: pd.DataFrame) -> pd.DataFrame:
     """
     print("\n🏢 Assigning respondents to demo companies...")
 
-    df['company_name'] = df['ResponseId_id'].apply(hash_respondent_to_company)
+    df['company_name'] = assign_companies(df['ResponseId_id'])
 
     # Display distribution
     distribution = df['company_name'].value_counts()
@@ -213,13 +295,7 @@ def map_metadata_fields(df: pd.DataFrame) -> pd.DataFrame:
     df_mapped = df.copy()
 
     # Rename columns to match database schema
-    df_mapped = df_mapped.rename(columns={
-        'ResponseId_id': 'respondent_id',
-        'industry_synthetic': 'industry',
-        'country_synthetic': 'region',
-        'continent_synthetic': 'continent',
-        'role_synthetic': 'employment_type'
-    })
+    df_mapped = df_mapped.rename(columns=FIELD_MAPPING)
 
     print(f"  ✅ Mapped fields:")
     print(f"    industry_synthetic → industry")
@@ -234,65 +310,207 @@ def validate_output_data(df: pd.DataFrame) -> dict:
     """
     Validate transformed wide-format data.
 
+    Per-construct min/max/mean/null counts, the all-null check and the
+    company distribution come from one fused pass over the score matrix
+    (capability_stats.output_statistics).
+
     Returns:
-        dict: Validation results
+        dict: Validation results (JSON-serialisable)
     """
     print("\n✅ Validating output data...")
 
-    validation = {
-        'total_respondents': len(df),
-        'columns': len(df.columns),
-        'construct_columns': len([col for col in df.columns if col.startswith('construct_')]),
-        'null_counts': df.isnull().sum().to_dict(),
-        'score_ranges': {}
-    }
-
-    # Check score ranges for each construct
-    for i in range(1, 33):
-        col = f'construct_{i}'
-        if col in df.columns:
-            validation['score_ranges'][col] = {
-                'min': df[col].min(),
-                'max': df[col].max(),
-                'mean': df[col].mean(),
-                'null_count': df[col].isnull().sum()
-            }
-
-    # Company distribution
-    validation['company_distribution'] = df['company_name'].value_counts().to_dict()
+    validation = output_statistics(df)
+    print_output_validation(validation)
+
+    return validation
 
+
+def print_output_validation(validation: dict):
+    """Print the output validation summary."""
     print(f"  ✅ Total respondents: {validation['total_respondents']:,}")
     print(f"  ✅ Total columns: {validation['columns']}")
     print(f"  ✅ Construct columns: {validation['construct_columns']}")
 
-    # Check for any respondent with ALL null constructs
-    all_construct_cols = [col for col in df.columns if col.startswith('construct_')]
-    completely_null = df[all_construct_cols].isnull().all(axis=1).sum()
-
-    if completely_null > 0:
-        print(f"  ⚠️  Respondents with ALL null constructs: {completely_null}")
+    if validation['completely_null'] > 0:
+        print(f"  ⚠️  Respondents with ALL null constructs: {validation['completely_null']}")
     else:
         print(f"  ✅ No respondents with ALL null constructs")
 
-    return validation
+
+def build_wide_format(df: pd.DataFrame) -> pd.DataFrame:
+    """Steps 3-6: average duplicates and pivot, assign companies, map fields."""
+    df_wide = pivot_single_pass(df)
+    df_wide = add_company_assignments(df_wide)
+    return map_metadata_fields(df_wide)
 
 
-def generate_report(input_validation: dict, output_validation: dict, output_path: str):
+def load_existing_output(output_path: str) -> pd.DataFrame:
+    """Read a previous wide output so carried-over rows are written back unchanged."""
+    if detect_format(output_path) == 'csv':
+        return pd.read_csv(output_path, dtype={'respondent_id': str}, float_precision='round_trip')
+    return read_wide(output_path)
+
+
+def incremental_transform(df: pd.DataFrame, output_path: str) -> tuple:
+    """
+    Re-pivot only respondents whose long-format rows are new or changed.
+
+    Compares per-respondent content hashes against the manifest next to
+    output_path. Changed respondents are run through build_wide_format()
+    and merged into the existing output; removed respondents are dropped.
+    Without a usable manifest (first run, or output and manifest out of
+    sync) every respondent is rebuilt.
+
+    Args:
+        df: Full long-format dataframe
+        output_path: Existing wide-format output
+
+    Returns:
+        tuple: (wide dataframe sorted by respondent_id,
+                current manifest, delta dict or None after a full rebuild)
+    """
+    print("\n🧮 Hashing respondent content...")
+    current = respondent_content_hashes(df)
+    previous = load_manifest(manifest_path_for(output_path))
+
+    existing = None
+    if previous is not None and Path(output_path).exists():
+        existing = load_existing_output(output_path)
+        if set(existing['respondent_id']) != output_respondents(previous):
+            print("  ⚠️  Manifest does not match the existing output")
+            existing = None
+
+    if existing is None:
+        print("  ℹ️  No usable manifest, rebuilding every respondent")
+        return build_wide_format(df), current, None
+
+    delta = diff_manifest(current, previous)
+    print(f"  ✅ Changed or new respondents: {len(delta['changed']):,}")
+    print(f"  ✅ Removed respondents: {len(delta['removed']):,}")
+    print(f"  ✅ Unchanged respondents: {delta['unchanged']:,}")
+
+    stale = set(delta['changed']) | set(delta['removed'])
+    if not stale:
+        return existing, current, delta
+
+    kept = existing[~existing['respondent_id'].isin(stale)]
+    parts = [kept]
+    if len(delta['changed']):
+        changed_rows = df['ResponseId_id'].astype(str).isin(delta['changed'])
+        parts.append(build_wide_format(df[changed_rows]))
+
+    merged = pd.concat(parts, ignore_index=True)
+    merged = merged.sort_values('respondent_id', kind='stable').reset_index(drop=True)
+
+    return merged, current, delta
+
+
+def remove_stale_manifest(output_path: str):
+    """A full rewrite of output_path invalidates its incremental manifest."""
+    Path(manifest_path_for(output_path)).unlink(missing_ok=True)
+
+
+def stream_transform(input_path: str, output_path: str, chunksize: int, partitions: int = 1) -> tuple:
+    """
+    Bounded-memory transform: fold the input in chunks, write output in blocks.
+
+    The long-format table is never loaded as a whole. Each chunk is folded
+    into per-respondent/per-construct sum and count accumulators and the wide
+    output is written block by block. With partitions > 1 the input is first
+    spilled into respondent-hash partitions and each one is pivoted on its
+    own, so only a single partition's accumulators are in memory.
+
+    Args:
+        input_path: Long-format CSV, .zip or .gz
+        output_path: Wide-format output (.csv, .parquet or .arrow)
+        chunksize: Long-format rows read per chunk
+        partitions: Number of respondent-hash partitions (1 = none)
+
+    Returns:
+        tuple: (input_validation, output_validation)
+    """
+    partials = {'input': None, 'output': None}
+    unique_respondents = 0
+    duplicate_entries = 0
+    scored = np.zeros(NUM_CONSTRUCTS, dtype=bool)
+
+    def fold_input(chunk):
+        partials['input'] = merge_input_partials(partials['input'], input_partial(chunk))
+        scored[:] |= scored_constructs(chunk)
+
+    if partitions > 1:
+        print(f"\n🔄 Streaming {input_path} into {partitions} respondent partitions "
+              f"({chunksize:,} rows per chunk)...")
+        accumulators = iter_partitioned_accumulators(input_path, partitions, chunksize, on_chunk=fold_input)
+    else:
+        print(f"\n🔄 Streaming {input_path} ({chunksize:,} rows per chunk)...")
+
+        def single_accumulator():
+            accumulator = ScoreAccumulator()
+            for chunk in read_long_format_chunks(input_path, chunksize):
+                accumulator.add_chunk(chunk)
+                fold_input(chunk)
+            yield accumulator
+
+        accumulators = single_accumulator()
+
+    writer = WideFormatWriter(output_path, dataset=OUTPUT_DATASET)
+    remove_stale_manifest(output_path)
+
+    for accumulator in accumulators:
+        # The whole input has been folded by now: every partition writes the
+        # same construct columns, those with a score anywhere in the input
+        frozen = accumulator.finalize(keep_cols=np.flatnonzero(scored))
+        pivot_stats = accumulator.stats(frozen)
+        unique_respondents += accumulator.n_respondents
+        duplicate_entries += pivot_stats['duplicates_averaged']
+
+        for block in accumulator.iter_frames(frozen, STREAM_ROWS_PER_WRITE):
+            block['company_name'] = assign_companies(block['ResponseId_id'])
+            block = block.rename(columns=FIELD_MAPPING)
+            partials['output'] = merge_output_partials(partials['output'], output_partial(block))
+            writer.write(block)
+
+        print(f"  ✅ Folded {accumulator.rows_in:,} rows into {pivot_stats['respondents']:,} respondents")
+
+    writer.close()
+    input_validation = finalize_input_stats(partials['input'], unique_respondents, duplicate_entries)
+    output_validation = finalize_output_stats(partials['output'])
+
+    print(f"  ✅ Total rows: {input_validation['total_rows']:,}")
+    print(f"  ✅ Unique respondents: {input_validation['unique_respondents']:,}")
+    print(f"  ⚠️  Duplicate entries averaged: {input_validation['duplicate_entries']:,}")
+    print(f"  ⚠️  Null scores: {input_validation['null_scores']:,}")
+    print(f"  ✅ Saved {output_validation['total_respondents']:,} rows to {output_path}")
+
+    return input_validation, output_validation
+
+
+def generate_report(input_validation: dict, output_validation: dict, output_path: str,
+                    metrics: PipelineMetrics = None):
     """
     Generate a detailed transformation report.
+
+    The text report is rendered from the validation objects, which are also
+    written unchanged to REPORT_JSON_FILE for machine consumption. When
+    metrics are given, per-step timing/memory/row counts are added to both.
+    Both files keep the history of earlier runs: each run appends a
+    timestamped section to the text report and one JSON line to the history.
     """
+    generated = datetime.now()
     report_lines = [
         "=" * 80,
         "CAPABILITY DATA TRANSFORMATION REPORT",
         "=" * 80,
-        f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"Generated: {generated.strftime('%Y-%m-%d %H:%M:%S')}",
         "",
         "INPUT DATA SUMMARY",
         "-" * 80,
         f"Total rows: {input_validation['total_rows']:,}",
         f"Unique respondents: {input_validation['unique_respondents']:,}",
         f"Unique constructs: {input_validation['unique_constructs']}",
-        f"Score range: {input_validation['score_range'][0]:.2f} - {input_validation['score_range'][1]:.2f}",
+        f"Score range: {format_score(input_validation['score_range'][0])} - "
+        f"{format_score(input_validation['score_range'][1])}",
         f"Duplicate entries found: {input_validation['duplicate_entries']:,}",
         f"Null scores: {input_validation['null_scores']:,}",
         "",
@@ -319,10 +537,18 @@ def generate_report(input_validation: dict, output_validation: dict, output_path
         if construct_key in output_validation['score_ranges']:
             stats = output_validation['score_ranges'][construct_key]
             report_lines.append(
-                f"{construct_key}: min={stats['min']:.2f}, max={stats['max']:.2f}, "
-                f"mean={stats['mean']:.2f}, nulls={stats['null_count']}"
+                f"{construct_key}: min={format_score(stats['min'])}, max={format_score(stats['max'])}, "
+                f"mean={format_score(stats['mean'])}, nulls={stats['null_count']}"
             )
 
+    if metrics is not None and metrics.steps:
+        report_lines.extend([
+            "",
+            "STEP METRICS",
+            "-" * 80,
+        ])
+        report_lines.extend(metrics.report_lines())
+
     report_lines.extend([
         "",
         "NEXT STEPS",
@@ -335,63 +561,151 @@ def generate_report(input_validation: dict, output_validation: dict, output_path
         "=" * 80,
     ])
 
-    # Write report
+    # Append this run to the report history
     report_dir = Path(REPORT_FILE).parent
     report_dir.mkdir(exist_ok=True)
 
-    with open(REPORT_FILE, 'w') as f:
+    with open(REPORT_FILE, 'a') as f:
+        if f.tell():
+            f.write('\n\n')
         f.write('\n'.join(report_lines))
 
-    print(f"\n📄 Report saved to: {REPORT_FILE}")
+    with open(REPORT_JSON_FILE, 'a') as f:
+        f.write(json.dumps({
+            'generated': generated.isoformat(timespec='seconds'),
+            'input': input_validation,
+            'output': output_validation,
+            'steps': metrics.steps if metrics is not None else [],
+            'totals': metrics.totals() if metrics is not None else {},
+        }) + '\n')
+
+    print(f"\n📄 Report saved to: {REPORT_FILE} ({REPORT_JSON_FILE})")
+
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Transform capability data from long to wide format.")
+    parser.add_argument('--input', default=INPUT_FILE,
+                        help=f"Long-format CSV, .zip or .gz (default: {INPUT_FILE}, falling back to {INPUT_ARCHIVE})")
+    parser.add_argument('--output', help=f"Wide-format output (default: {OUTPUT_FILE} with the --format suffix)")
+    parser.add_argument('--format', choices=['csv', 'parquet', 'arrow'],
+                        help="Output format (default: inferred from --output, else csv)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Fold the input in chunks and write the output incrementally")
+    parser.add_argument('--chunksize', type=int, default=STREAM_CHUNKSIZE,
+                        help=f"Rows per chunk in --stream mode (default: {STREAM_CHUNKSIZE:,})")
+    parser.add_argument('--partitions', type=int, default=1,
+                        help="Respondent-hash partitions in --stream mode (default: 1)")
+    parser.add_argument('--no-trace-memory', action='store_true',
+                        help="Skip tracemalloc in the step metrics (timing and row counts only)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-pivot respondents whose rows changed since the last --incremental run")
+    args = parser.parse_args()
+    if args.incremental and args.stream:
+        parser.error("--incremental cannot be combined with --stream")
+    return args
 
 
 def main():
     """Main transformation pipeline."""
+    args = parse_args()
+    input_file = resolve_input_file(args.input)
+    output_format = args.format or detect_format(args.output or OUTPUT_FILE)
+    output_file = args.output or output_path_for_format(OUTPUT_FILE, output_format)
+
     print("=" * 80)
     print("CAPABILITY DATA TRANSFORMATION PIPELINE")
     print("=" * 80)
-    print(f"Input: {INPUT_FILE}")
-    print(f"Output: {OUTPUT_FILE}")
+    print(f"Input: {input_file}")
+    print(f"Output: {output_file}")
     print("=" * 80)
 
+    metrics = PipelineMetrics(trace_memory=not args.no_trace_memory)
+
+    if args.stream:
+        with metrics.step('stream_transform') as step:
+            input_validation, output_validation = stream_transform(
+                input_file, output_file, args.chunksize, args.partitions
+            )
+            step['rows_in'] = input_validation['total_rows']
+            step['rows_out'] = output_validation['total_respondents']
+        metrics.close()
+        generate_report(input_validation, output_validation, REPORT_FILE, metrics)
+        print_summary(output_file, metrics)
+        return
+
     # Step 1: Load data
     print("\n📂 Loading capability data...")
-    df = pd.read_csv(INPUT_FILE)
+    with metrics.step('load') as step:
+        with open_long_format(input_file) as handle:
+            df = pd.read_csv(handle)
+        step['rows_out'] = len(df)
     print(f"  ✅ Loaded {len(df):,} rows")
 
     # Step 2: Validate input
-    input_validation = validate_input_data(df)
-
-    # Step 3: Handle duplicates
-    df_deduped = handle_duplicates(df)
-
-    # Step 4: Pivot to wide format
-    df_wide = pivot_to_wide_format(df_deduped)
+    with metrics.step('validate_input', rows_in=len(df)):
+        input_validation = validate_input_data(df)
+
+    # Step 3-6: Average duplicates and pivot (single pass), assign companies, map fields
+    # (only for new or changed respondents with --incremental)
+    manifest = delta = None
+    if args.incremental:
+        with metrics.step('incremental_transform', rows_in=len(df)) as step:
+            df_final, manifest, delta = incremental_transform(df, output_file)
+            step['rows_out'] = len(df_final)
+    else:
+        with metrics.step('pivot', rows_in=len(df)) as step:
+            df_wide = pivot_single_pass(df)
+            step['rows_out'] = len(df_wide)
 
-    # Step 5: Add company assignments
-    df_wide = add_company_assignments(df_wide)
+        with metrics.step('assign_companies', rows_in=len(df_wide)) as step:
+            df_wide = add_company_assignments(df_wide)
+            step['rows_out'] = len(df_wide)
 
-    # Step 6: Map metadata fields
-    df_final = map_metadata_fields(df_wide)
+        with metrics.step('map_fields', rows_in=len(df_wide)) as step:
+            df_final = map_metadata_fields(df_wide)
+            step['rows_out'] = len(df_final)
 
     # Step 7: Validate output
-    output_validation = validate_output_data(df_final)
+    with metrics.step('validate_output', rows_in=len(df_final)):
+        output_validation = validate_output_data(df_final)
 
     # Step 8: Save transformed data
-    print(f"\n💾 Saving transformed data to {OUTPUT_FILE}...")
-    output_dir = Path(OUTPUT_FILE).parent
-    output_dir.mkdir(exist_ok=True)
-    df_final.to_csv(OUTPUT_FILE, index=False)
-    print(f"  ✅ Saved {len(df_final):,} rows")
+    print(f"\n💾 Saving transformed data to {output_file}...")
+    with metrics.step('save', rows_in=len(df_final)) as step:
+        if args.incremental and delta is not None and not len(delta['changed']) and not len(delta['removed']):
+            print("  ✅ No respondents changed, output left as is")
+            step['rows_out'] = 0
+        else:
+            write_wide(df_final, output_file, output_format, dataset=OUTPUT_DATASET)
+            step['rows_out'] = len(df_final)
+            print(f"  ✅ Saved {len(df_final):,} rows")
+
+        if manifest is not None:
+            save_manifest(manifest, manifest_path_for(output_file))
+            print(f"  ✅ Manifest saved to {manifest_path_for(output_file)}")
+        else:
+            remove_stale_manifest(output_file)
+
+    metrics.close()
 
     # Step 9: Generate report
-    generate_report(input_validation, output_validation, REPORT_FILE)
+    generate_report(input_validation, output_validation, REPORT_FILE, metrics)
+
+    print_summary(output_file, metrics)
+
 
+def print_summary(output_file: str, metrics: PipelineMetrics = None):
+    """Print the closing summary, step metrics and next steps."""
     print("\n" + "=" * 80)
     print("✅ TRANSFORMATION COMPLETE!")
     print("=" * 80)
-    print(f"Output file: {OUTPUT_FILE}")
+    print(f"Output file: {output_file}")
     print(f"Report file: {REPORT_FILE}")
+    if metrics is not None and metrics.steps:
+        print("\nStep metrics:")
+        for line in metrics.report_lines():
+            print(f"  {line}")
     print("\nNext steps:")
     print("1. Review the transformation report")
     print("2. Apply database migration (add industry/continent columns)")
@@ -7,11 +7,19 @@ Maps dimension_module columns (1_1_1, 1_2_1, etc.) to construct_1..construct_32.
 
 Input: ./data/Database info/AICapability_load_db/AI_CapScan_csv/AI_CapScan_3NF_fact_table.csv
 Output: data-foundation/capability_real_wide.csv
+
+Usage:
+    python3 scripts/transform_real_capability_data.py
+    python3 scripts/transform_real_capability_data.py --format parquet   # or arrow
 """
 
+import argparse
 import pandas as pd
 import sys
-from pathlib import Path
+
+from capability_stats import score_matrix_stats
+from score_reshape import CONSTRUCTS
+from wide_format_io import output_path_for_format, write_wide
 
 # File paths
 INPUT_FILE = "./data/Database info/AICapability_load_db/AI_CapScan_csv/AI_CapScan_3NF_fact_table.csv"
@@ -84,9 +92,15 @@ def print_step(text: str):
     print(f"\n{text}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Transform the AI_CapScan fact table to wide format.")
+    parser.add_argument('--format', choices=['csv', 'parquet', 'arrow'], default='csv',
+                        help="Output format (default: csv)")
+    args = parser.parse_args()
+    output_file = output_path_for_format(OUTPUT_FILE, args.format)
+
     print_header("REAL CAPABILITY DATA TRANSFORMATION")
     print(f"Input:  {INPUT_FILE}")
-    print(f"Output: {OUTPUT_FILE}")
+    print(f"Output: {output_file}")
     print_header("")
 
     # Load data
@@ -161,28 +175,21 @@ def main():
         'age': 'first',
         'is_synthetic': 'first'
     }
-
-    # Add all construct columns to aggregation
-    for i in range(1, 33):
-        col_name = f'construct_{i}'
-        agg_dict[col_name] = 'mean'
+    agg_dict.update({col_name: 'mean' for col_name in CONSTRUCTS.columns})
 
     transformed_agg = transformed.groupby('respondent_id').agg(agg_dict).reset_index()
 
     print(f"  ✅ Aggregated to {len(transformed_agg)} unique respondents")
 
     # Round construct scores to 2 decimal places
-    for i in range(1, 33):
-        col_name = f'construct_{i}'
-        transformed_agg[col_name] = transformed_agg[col_name].round(2)
+    transformed_agg[CONSTRUCTS.columns] = transformed_agg[CONSTRUCTS.columns].round(2)
 
     # Add company assignment (will be done during import based on existing respondent data)
     print_step("ℹ️  Note: Company assignment will be handled during import")
 
     # Save to CSV
-    print_step(f"💾 Saving to {OUTPUT_FILE}...")
-    Path(OUTPUT_FILE).parent.mkdir(parents=True, exist_ok=True)
-    transformed_agg.to_csv(OUTPUT_FILE, index=False)
+    print_step(f"💾 Saving to {output_file}...")
+    write_wide(transformed_agg, output_file, args.format, dataset="capability_real_wide")
     print(f"  ✅ Saved {len(transformed_agg)} rows")
 
     # Generate summary report
@@ -192,12 +199,16 @@ def main():
     print(f"  Sessions averaged: {total_sessions - len(transformed_agg):,}")
     print(f"  Constructs per respondent: 32")
 
-    # Score statistics
+    # Score statistics (one fused pass over the 32 construct columns)
     print_step("📊 Score Statistics (1-10 scale):")
-    for i in range(1, 33):
-        col_name = f'construct_{i}'
-        scores = transformed_agg[col_name]
-        print(f"  Construct {i:2d}: min={scores.min():.1f}, max={scores.max():.1f}, avg={scores.mean():.2f}")
+    score_cols = CONSTRUCTS.columns
+    score_stats = score_matrix_stats(transformed_agg[score_cols].to_numpy(dtype=float), score_cols)
+    for i, col_name in enumerate(score_cols, start=1):
+        stats = score_stats[col_name]
+        if stats['mean'] is None:
+            print(f"  Construct {i:2d}: no scores")
+            continue
+        print(f"  Construct {i:2d}: min={stats['min']:.1f}, max={stats['max']:.1f}, avg={stats['mean']:.2f}")
 
     # Synthetic vs real data
     synthetic_count = transformed_agg['is_synthetic'].sum()
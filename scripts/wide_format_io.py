@@ -0,0 +1,251 @@
+"""
+Wide-Format File I/O
+====================
+
+Reads and writes the wide capability files (capability_demo_wide,
+capability_real_wide) as CSV, Parquet or Arrow IPC.
+
+The columnar formats store construct_1..construct_32 as float32, the
+repeated string metadata (industry, region, continent, employment_type,
+company_name, ...) dictionary-encoded, and embed a JSON description of the
+dataset in the schema metadata. Importers read them memory-mapped instead of
+re-parsing CSV text.
+
+pyarrow is only needed for the columnar formats:
+    pip install pyarrow
+
+Usage:
+    from wide_format_io import read_wide, write_wide
+
+    write_wide(df, "data-foundation/capability_demo_wide.parquet", dataset="capability_demo_wide")
+    df = read_wide("data-foundation/capability_demo_wide.parquet")
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FORMAT_SUFFIXES = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+SCHEMA_METADATA_KEY = b'ainavigator.schema'
+SCHEMA_VERSION = 1
+
+# Columns stored as dictionary-encoded strings
+DICTIONARY_COLUMNS = [
+    'industry',
+    'region',
+    'continent',
+    'employment_type',
+    'company_name',
+    'department',
+    'age',
+    'user_language',
+]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "Parquet/Arrow output requires pyarrow. Install it with: pip install pyarrow"
+        )
+
+
+def detect_format(path: str) -> str:
+    """Infer 'csv', 'parquet' or 'arrow' from the file suffix."""
+    suffix = Path(path).suffix.lower()
+    if suffix in ('.parquet', '.pq'):
+        return 'parquet'
+    if suffix in ('.arrow', '.feather', '.ipc'):
+        return 'arrow'
+    return 'csv'
+
+
+def output_path_for_format(path: str, fmt: str) -> str:
+    """Swap the suffix of path to match fmt (e.g. .csv → .parquet)."""
+    return str(Path(path).with_suffix(FORMAT_SUFFIXES[fmt]))
+
+
+def construct_columns(columns) -> list:
+    """Return the construct_<n> columns in order."""
+    return [col for col in columns if str(col).startswith('construct_')]
+
+
+def schema_description(df: pd.DataFrame, dataset: str) -> dict:
+    """JSON-serialisable description embedded in the file's schema metadata."""
+    return {
+        'dataset': dataset,
+        'schema_version': SCHEMA_VERSION,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'respondent_column': 'respondent_id',
+        'construct_columns': construct_columns(df.columns),
+        'construct_dtype': 'float32',
+        'dictionary_columns': [col for col in DICTIONARY_COLUMNS if col in df.columns],
+    }
+
+
+class WideFormatWriter:
+    """
+    Incremental writer for wide-format blocks.
+
+    CSV blocks are appended as text. Parquet and Arrow blocks go through a
+    single pyarrow writer. Each dictionary column keeps one growing
+    vocabulary across blocks, so every block's dictionary extends the
+    previous one (required for Arrow IPC files).
+    """
+
+    def __init__(self, path: str, fmt: str = None, dataset: str = 'capability_wide'):
+        self.path = str(path)
+        self.fmt = fmt or detect_format(path)
+        self.dataset = dataset
+        self.rows_written = 0
+
+        self._writer = None
+        self._schema = None
+        self._vocabularies = {}
+
+        if self.fmt != 'csv':
+            _require_pyarrow()
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, df: pd.DataFrame):
+        """Append one block of wide-format rows."""
+        if self.fmt == 'csv':
+            df.to_csv(self.path, mode='a' if self.rows_written else 'w',
+                      header=not self.rows_written, index=False)
+        else:
+            table = self._to_arrow(df)
+            if self._writer is None:
+                self._open(table.schema)
+            self._writer.write_table(table)
+
+        self.rows_written += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _open(self, schema):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._schema = schema
+        if self.fmt == 'parquet':
+            self._writer = pq.ParquetWriter(self.path, schema, compression='zstd')
+        else:
+            options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self._writer = pa.ipc.new_file(self.path, schema, options=options)
+
+    def _encode_dictionary(self, col: str, values: pd.Series):
+        """Dictionary-encode values against the column's growing vocabulary."""
+        import pyarrow as pa
+
+        vocabulary = self._vocabularies.setdefault(col, {})
+        uniques = pd.unique(values.dropna())
+        for value in uniques:
+            if value not in vocabulary:
+                vocabulary[value] = len(vocabulary)
+
+        categories = list(vocabulary)
+        codes = pd.Categorical(values, categories=categories).codes.astype(np.int32)
+        indices = pa.array(codes, mask=codes < 0, type=pa.int32())
+        dictionary = pa.array([str(value) for value in categories], type=pa.string())
+        return pa.DictionaryArray.from_arrays(indices, dictionary)
+
+    def _to_arrow(self, df: pd.DataFrame):
+        import pyarrow as pa
+
+        scores = set(construct_columns(df.columns))
+        arrays = []
+        for col in df.columns:
+            if col in scores:
+                array = pa.array(df[col].to_numpy(dtype=np.float32), type=pa.float32(), from_pandas=True)
+            elif col in DICTIONARY_COLUMNS:
+                array = self._encode_dictionary(col, df[col])
+            elif self._schema is not None:
+                array = pa.array(df[col], type=self._schema.field(col).type, from_pandas=True)
+            else:
+                array = pa.array(df[col], from_pandas=True)
+            arrays.append(array)
+
+        if self._schema is not None:
+            return pa.Table.from_arrays(arrays, schema=self._schema)
+
+        description = json.dumps(schema_description(df, self.dataset)).encode()
+        fields = [pa.field(col, array.type) for col, array in zip(df.columns, arrays)]
+        schema = pa.schema(fields, metadata={SCHEMA_METADATA_KEY: description})
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_wide(df: pd.DataFrame, path: str, fmt: str = None, dataset: str = 'capability_wide'):
+    """
+    Write a complete wide-format dataframe as CSV, Parquet or Arrow IPC.
+
+    Args:
+        df: Wide-format dataframe
+        path: Output file
+        fmt: 'csv', 'parquet' or 'arrow' (inferred from path if None)
+        dataset: Name recorded in the schema metadata
+    """
+    with WideFormatWriter(path, fmt, dataset) as writer:
+        writer.write(df)
+
+
+def read_wide(path: str) -> pd.DataFrame:
+    """
+    Load a wide-format file written by write_wide (or any CSV).
+
+    Parquet and Arrow files are memory-mapped; dictionary columns come back
+    as pandas categoricals and construct columns as float32.
+    """
+    fmt = detect_format(path)
+    if fmt == 'csv':
+        return pd.read_csv(path)
+
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == 'parquet':
+        table = pq.read_table(path, memory_map=True)
+    else:
+        with pa.memory_map(str(path), 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+
+    return table.to_pandas()
+
+
+def read_schema_description(path: str) -> dict:
+    """Return the embedded JSON description of a Parquet/Arrow file ({} for CSV)."""
+    fmt = detect_format(path)
+    if fmt == 'csv':
+        return {}
+
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == 'parquet':
+        schema = pq.read_schema(path)
+    else:
+        with pa.memory_map(str(path), 'r') as source:
+            schema = pa.ipc.open_file(source).schema
+
+    metadata = schema.metadata or {}
+    return json.loads(metadata[SCHEMA_METADATA_KEY]) if SCHEMA_METADATA_KEY in metadata else {}
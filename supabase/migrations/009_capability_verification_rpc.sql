@@ -0,0 +1,58 @@
+-- Capability Import Verification
+-- Server-side aggregates for scripts/import_capability_wide.py (verify_import),
+-- so verification transfers one row per construct instead of respondent rows.
+--
+-- Usage (PostgREST): POST /rest/v1/rpc/capability_construct_stats
+
+-- ============================================================================
+-- PER-CONSTRUCT STATISTICS (respondents with capability data)
+-- ============================================================================
+-- The construct_N columns are looked up at call time: migration 003 adds them
+-- to respondents and 006 removes them again, so the function must work (and
+-- return no rows) either way.
+CREATE OR REPLACE FUNCTION capability_construct_stats()
+RETURNS TABLE (
+  construct TEXT,
+  respondents BIGINT,
+  null_count BIGINT,
+  min_score NUMERIC,
+  max_score NUMERIC,
+  mean_score NUMERIC
+)
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+  value_rows TEXT;
+BEGIN
+  SELECT string_agg(format('(%L, r.%I)', c.column_name, c.column_name), ', '
+                    ORDER BY substring(c.column_name FROM 11)::INT)
+    INTO value_rows
+    FROM information_schema.columns c
+   WHERE c.table_schema = 'public'
+     AND c.table_name = 'respondents'
+     AND c.column_name ~ '^construct_[0-9]+$';
+
+  IF value_rows IS NULL THEN
+    RETURN;
+  END IF;
+
+  -- One scan: unpivot each row's constructs and aggregate per construct
+  RETURN QUERY EXECUTE format(
+    'SELECT v.construct::TEXT,
+            COUNT(*),
+            COUNT(*) - COUNT(v.score),
+            MIN(v.score)::NUMERIC,
+            MAX(v.score)::NUMERIC,
+            AVG(v.score)::NUMERIC
+       FROM respondents r
+       CROSS JOIN LATERAL (VALUES %s) AS v(construct, score)
+      WHERE r.construct_1 IS NOT NULL
+      GROUP BY v.construct
+      ORDER BY substring(v.construct FROM 11)::INT',
+    value_rows
+  );
+END;
+$$;
+
+COMMENT ON FUNCTION capability_construct_stats() IS 'Per-construct respondents/null count/min/max/mean over respondents with capability data (construct_1 IS NOT NULL). Used by import verification.';
@@ -0,0 +1,162 @@
+-- Staged Reloads
+-- Full reloads of capability_scores and taboos (scripts/import_capability_long_format.py,
+-- scripts/import_taboos.py) load into a staging table first and then publish it
+-- in one transaction, so readers never see an empty or half-loaded table.
+--
+-- Flow (PostgREST, with the service role key):
+--   POST /rest/v1/rpc/staged_load_begin    {"target": "taboos"}          -- empty taboos_staging
+--   POST /rest/v1/taboos_staging           [...batches...]
+--   POST /rest/v1/rpc/staged_load_publish  {"target": "taboos", "expected_rows": 100}
+--
+-- Publishing copies instead of renaming the staging table into place: the
+-- taboos_by_cell view, RLS policies, grants and foreign keys are bound to the
+-- live table itself and would stay behind on the renamed-away copy.
+
+-- ============================================================================
+-- STAGING TABLES (same columns, defaults and checks; only the upsert key indexed)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS capability_scores_staging
+  (LIKE capability_scores INCLUDING DEFAULTS INCLUDING CONSTRAINTS);
+CREATE UNIQUE INDEX IF NOT EXISTS capability_scores_staging_key
+  ON capability_scores_staging(company_id, respondent_id, construct_id);
+
+CREATE TABLE IF NOT EXISTS taboos_staging
+  (LIKE taboos INCLUDING DEFAULTS INCLUDING CONSTRAINTS);
+CREATE UNIQUE INDEX IF NOT EXISTS taboos_staging_name ON taboos_staging(name);
+
+-- RLS on with no policies: only the service role (which bypasses RLS) can
+-- read or write staged rows; the anon and authenticated roles see nothing
+ALTER TABLE capability_scores_staging ENABLE ROW LEVEL SECURITY;
+ALTER TABLE taboos_staging ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON capability_scores_staging, taboos_staging FROM PUBLIC, anon, authenticated;
+
+COMMENT ON TABLE capability_scores_staging IS 'Load area for staged capability_scores reloads (see staged_load_publish). Not read by the app.';
+COMMENT ON TABLE taboos_staging IS 'Load area for staged taboos reloads (see staged_load_publish). Not read by the app.';
+
+-- ============================================================================
+-- BEGIN: empty the target's staging table
+-- ============================================================================
+CREATE OR REPLACE FUNCTION staged_load_begin(target TEXT)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF to_regclass(format('public.%I', target || '_staging')) IS NULL THEN
+    RAISE EXCEPTION 'No staging table for %', target;
+  END IF;
+  EXECUTE format('TRUNCATE public.%I', target || '_staging');
+END;
+$$;
+
+-- ============================================================================
+-- PUBLISH: replace the target's rows with the staged rows, atomically
+-- ============================================================================
+-- Refuses to publish unless staging holds exactly expected_rows, so a load
+-- with failed batches, or a staging table emptied by another run, leaves the
+-- live table untouched. TRUNCATE makes readers wait for the (server-local)
+-- copy instead of seeing a partial table, and leaves no dead rows behind.
+CREATE OR REPLACE FUNCTION staged_load_publish(target TEXT, expected_rows BIGINT)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  staging TEXT := target || '_staging';
+  staged BIGINT;
+  columns TEXT;
+  published BIGINT;
+BEGIN
+  IF to_regclass(format('public.%I', staging)) IS NULL THEN
+    RAISE EXCEPTION 'No staging table for %', target;
+  END IF;
+
+  EXECUTE format('SELECT COUNT(*) FROM public.%I', staging) INTO staged;
+  IF staged <> expected_rows THEN
+    RAISE EXCEPTION 'Staging table % holds % rows, expected %; nothing published', staging, staged, expected_rows;
+  END IF;
+
+  SELECT string_agg(format('%I', a.attname), ', ' ORDER BY a.attnum)
+    INTO columns
+    FROM pg_attribute a
+   WHERE a.attrelid = format('public.%I', staging)::regclass
+     AND a.attnum > 0
+     AND NOT a.attisdropped;
+
+  EXECUTE format('TRUNCATE public.%I', target);
+  EXECUTE format('INSERT INTO public.%I (%s) SELECT %s FROM public.%I', target, columns, columns, staging);
+  GET DIAGNOSTICS published = ROW_COUNT;
+  EXECUTE format('TRUNCATE public.%I', staging);
+
+  RETURN published;
+END;
+$$;
+
+-- ============================================================================
+-- PUBLISH ALL: several targets in one transaction (e.g. profiles + scores)
+-- ============================================================================
+-- Every staging table must hold its expected_rows before anything is
+-- published. The targets are truncated in one statement, so foreign keys
+-- between them are allowed, and refilled in the order given: list
+-- referenced tables before the tables that reference them.
+CREATE OR REPLACE FUNCTION staged_load_publish_all(targets TEXT[], expected_rows BIGINT[])
+RETURNS BIGINT[]
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  i INT;
+  staging TEXT;
+  staged BIGINT;
+  columns TEXT;
+  published BIGINT;
+  counts BIGINT[] := '{}';
+BEGIN
+  IF array_length(targets, 1) IS DISTINCT FROM array_length(expected_rows, 1) THEN
+    RAISE EXCEPTION 'targets and expected_rows must have the same length';
+  END IF;
+
+  FOR i IN 1 .. array_length(targets, 1) LOOP
+    staging := targets[i] || '_staging';
+    IF to_regclass(format('public.%I', staging)) IS NULL THEN
+      RAISE EXCEPTION 'No staging table for %', targets[i];
+    END IF;
+    EXECUTE format('SELECT COUNT(*) FROM public.%I', staging) INTO staged;
+    IF staged <> expected_rows[i] THEN
+      RAISE EXCEPTION 'Staging table % holds % rows, expected %; nothing published', staging, staged, expected_rows[i];
+    END IF;
+  END LOOP;
+
+  EXECUTE (SELECT 'TRUNCATE ' || string_agg(format('public.%I', target), ', ') FROM unnest(targets) AS target);
+
+  FOR i IN 1 .. array_length(targets, 1) LOOP
+    staging := targets[i] || '_staging';
+    SELECT string_agg(format('%I', a.attname), ', ' ORDER BY a.attnum)
+      INTO columns
+      FROM pg_attribute a
+     WHERE a.attrelid = format('public.%I', staging)::regclass
+       AND a.attnum > 0
+       AND NOT a.attisdropped;
+    EXECUTE format('INSERT INTO public.%I (%s) SELECT %s FROM public.%I', targets[i], columns, columns, staging);
+    GET DIAGNOSTICS published = ROW_COUNT;
+    counts := counts || published;
+    EXECUTE format('TRUNCATE public.%I', staging);
+  END LOOP;
+
+  RETURN counts;
+END;
+$$;
+
+COMMENT ON FUNCTION staged_load_begin(TEXT) IS 'Empties <target>_staging before a staged reload.';
+COMMENT ON FUNCTION staged_load_publish(TEXT, BIGINT) IS 'Atomically replaces <target> with the rows in <target>_staging (which must hold expected_rows rows), then empties staging. Returns rows published.';
+COMMENT ON FUNCTION staged_load_publish_all(TEXT[], BIGINT[]) IS 'staged_load_publish for several targets in one transaction, in the order given. Returns rows published per target.';
+
+-- ============================================================================
+-- PERMISSIONS: service role only
+-- ============================================================================
+-- Both functions TRUNCATE and INSERT into company-scoped tables, which RLS
+-- does not guard, so they must not be callable with the public anon key.
+-- The import scripts call them with SUPABASE_SERVICE_ROLE_KEY.
+REVOKE EXECUTE ON FUNCTION staged_load_begin(TEXT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION staged_load_publish(TEXT, BIGINT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION staged_load_publish_all(TEXT[], BIGINT[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION staged_load_begin(TEXT) TO service_role;
+GRANT EXECUTE ON FUNCTION staged_load_publish(TEXT, BIGINT) TO service_role;
+GRANT EXECUTE ON FUNCTION staged_load_publish_all(TEXT[], BIGINT[]) TO service_role;
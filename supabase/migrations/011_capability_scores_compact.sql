@@ -0,0 +1,122 @@
+-- Compact Capability Scores (dictionary-encoded LONG format)
+-- capability_scores repeats the dimension and construct names and the four
+-- *_synthetic strings on each of a respondent's 32 rows. This layout stores
+-- each name once in a lookup table and each respondent's metadata once in a
+-- profile row, so a score row is only (respondent_id, construct_id, score).
+--
+-- Loaded by: python scripts/import_capability_long_format.py --layout compact
+-- (profiles and scores are staged and published together with
+-- staged_load_publish_all; apply 010_staged_reload.sql first)
+-- Read through capability_scores_expanded (same columns as capability_scores).
+
+-- ============================================================================
+-- LOOKUPS (8 dimensions, 32 constructs)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS capability_dimensions (
+  dimension_id SMALLINT PRIMARY KEY CHECK (dimension_id BETWEEN 1 AND 8),
+  dimension TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS capability_constructs (
+  construct_id SMALLINT PRIMARY KEY CHECK (construct_id BETWEEN 1 AND 32),
+  dimension_id SMALLINT NOT NULL REFERENCES capability_dimensions(dimension_id),
+  construct TEXT NOT NULL
+);
+
+-- ============================================================================
+-- RESPONDENT PROFILES (one row per respondent)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS capability_respondent_profiles (
+  respondent_id TEXT PRIMARY KEY,
+  company_id UUID NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+  industry_synthetic TEXT,
+  country_synthetic TEXT,
+  continent_synthetic TEXT,
+  role_synthetic TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_capability_profiles_company ON capability_respondent_profiles(company_id);
+CREATE INDEX IF NOT EXISTS idx_capability_profiles_industry ON capability_respondent_profiles(industry_synthetic);
+CREATE INDEX IF NOT EXISTS idx_capability_profiles_continent ON capability_respondent_profiles(continent_synthetic);
+
+-- ============================================================================
+-- SCORES (one narrow row per construct score per respondent)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS capability_score_values (
+  respondent_id TEXT NOT NULL REFERENCES capability_respondent_profiles(respondent_id) ON DELETE CASCADE,
+  construct_id SMALLINT NOT NULL REFERENCES capability_constructs(construct_id),
+  score DECIMAL(5,2) NOT NULL,
+  PRIMARY KEY (respondent_id, construct_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_capability_score_values_construct ON capability_score_values(construct_id);
+
+-- Staging tables for staged reloads (staged_load_begin/publish_all from
+-- 010_staged_reload.sql): same columns and checks, only the upsert key indexed
+CREATE TABLE IF NOT EXISTS capability_respondent_profiles_staging
+  (LIKE capability_respondent_profiles INCLUDING DEFAULTS INCLUDING CONSTRAINTS);
+CREATE UNIQUE INDEX IF NOT EXISTS capability_respondent_profiles_staging_key
+  ON capability_respondent_profiles_staging(respondent_id);
+
+CREATE TABLE IF NOT EXISTS capability_score_values_staging
+  (LIKE capability_score_values INCLUDING DEFAULTS INCLUDING CONSTRAINTS);
+CREATE UNIQUE INDEX IF NOT EXISTS capability_score_values_staging_key
+  ON capability_score_values_staging(respondent_id, construct_id);
+
+-- ============================================================================
+-- EXPANDED VIEW (capability_scores' columns, without id/created_at)
+-- ============================================================================
+-- security_invoker: the caller's RLS policies on the underlying tables apply
+CREATE OR REPLACE VIEW capability_scores_expanded
+WITH (security_invoker = true) AS
+SELECT
+  v.respondent_id,
+  p.company_id,
+  c.dimension_id::INTEGER AS dimension_id,
+  d.dimension,
+  v.construct_id::INTEGER AS construct_id,
+  c.construct,
+  v.score,
+  p.industry_synthetic,
+  p.country_synthetic,
+  p.continent_synthetic,
+  p.role_synthetic
+FROM capability_score_values v
+JOIN capability_respondent_profiles p ON p.respondent_id = v.respondent_id
+JOIN capability_constructs c ON c.construct_id = v.construct_id
+JOIN capability_dimensions d ON d.dimension_id = c.dimension_id;
+
+-- ============================================================================
+-- ROW LEVEL SECURITY (company scoping as on capability_scores)
+-- ============================================================================
+ALTER TABLE capability_dimensions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE capability_constructs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE capability_respondent_profiles ENABLE ROW LEVEL SECURITY;
+ALTER TABLE capability_score_values ENABLE ROW LEVEL SECURITY;
+
+-- Staging: RLS on with no policies, so only the service role reaches it
+ALTER TABLE capability_respondent_profiles_staging ENABLE ROW LEVEL SECURITY;
+ALTER TABLE capability_score_values_staging ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON capability_respondent_profiles_staging, capability_score_values_staging FROM PUBLIC, anon, authenticated;
+
+CREATE POLICY "Anyone can view capability dimensions"
+  ON capability_dimensions FOR SELECT USING (true);
+
+CREATE POLICY "Anyone can view capability constructs"
+  ON capability_constructs FOR SELECT USING (true);
+
+CREATE POLICY "Users can view capability profiles from their company"
+  ON capability_respondent_profiles FOR SELECT
+  USING (company_id IN (SELECT company_id FROM demo_users WHERE email = current_setting('app.user_email', true)));
+
+CREATE POLICY "Users can view capability score values from their company"
+  ON capability_score_values FOR SELECT
+  USING (respondent_id IN (SELECT respondent_id FROM capability_respondent_profiles));
+
+COMMENT ON TABLE capability_dimensions IS 'Capability dimension names by dimension_id (compact capability layout).';
+COMMENT ON TABLE capability_constructs IS 'Capability construct names and dimensions by construct_id (compact capability layout).';
+COMMENT ON TABLE capability_respondent_profiles IS 'Company and synthetic metadata, once per capability respondent (compact capability layout).';
+COMMENT ON TABLE capability_score_values IS 'Capability scores as (respondent_id, construct_id, score) - names resolved through capability_constructs/capability_dimensions.';
+COMMENT ON TABLE capability_respondent_profiles_staging IS 'Load area for staged capability_respondent_profiles reloads (see staged_load_publish_all). Not read by the app.';
+COMMENT ON TABLE capability_score_values_staging IS 'Load area for staged capability_score_values reloads (see staged_load_publish). Not read by the app.';
+COMMENT ON VIEW capability_scores_expanded IS 'capability_score_values joined back to the capability_scores column layout.';